@@ -0,0 +1,415 @@
+# 첨부파일 다운로드 도우미
+#
+# 스파이더의 parse_thread 는 첨부파일 정보(URL, 기본 파일명, Referer, 쿠키)만
+# 수집해서 아이템에 담고, 실제 다운로드는 AttachmentPipeline 이 별도의
+# 스레드 풀에서 수행한다. 여기 있는 함수들은 그 공통 로직이다.
+#
+# 같은 첨부파일(여러 사이트에 함께 올라오는 신청서 HWP 등)을 스레드마다 다시
+# 저장하지 않도록, 다운로드한 파일은 BlobStore 에 내용 해시(SHA-256)로 한 번만
+# 저장하고 스레드 디렉토리에는 하드링크를 만든다.
+
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from urllib.parse import unquote
+
+import requests
+
+from bizsup.throttle import OVERLOAD_STATUSES
+
+
+logger = logging.getLogger(__name__)
+
+# 파일 다운로드 시 사용할 브라우저와 같은 헤더 (Referer 는 요청마다 설정)
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+# 스트리밍 다운로드 청크 크기와 HTML 오류 페이지 판별에 사용할 앞부분 크기
+CHUNK_SIZE = 8192
+SNIFF_SIZE = 1024
+# BlobStore 에서 크기와 함께 파일을 빨리 찾는 데 사용하는 앞부분 해시 크기
+PARTIAL_HASH_SIZE = 64 * 1024
+# 응답 기록(bizsup/replay.py)에 남길 첨부파일 응답 헤더 (파일명, 형식, 재검증)
+RECORD_HEADERS = ("Content-Type", "Content-Disposition", "ETag", "Last-Modified")
+# 첨부파일 요청의 (연결, 읽기) 타임아웃 - 응답이 없는 서버에서 스레드가 멈추지 않도록
+DOWNLOAD_TIMEOUT = (10, 60)
+
+
+class AttachmentServerError(Exception):
+    """
+    서버가 첨부파일 요청에 응답하지 못함 (연결 오류, 타임아웃, 429/5xx) - 속도 조절에서 오류로 센다
+    """
+
+
+def response_cookies(response):
+    """
+    응답의 Set-Cookie 헤더에서 쿠키 추출 (첨부파일 요청에 재사용)
+    """
+    cookies = {}
+    for cookie in response.headers.getlist('Set-Cookie'):
+        if b'=' in cookie:
+            key, value = cookie.split(b'=', 1)
+            if b';' in value:
+                value = value.split(b';', 1)[0]
+            cookies[key.decode('utf-8')] = value.decode('utf-8')
+    return cookies
+
+
+def attachment_spec(response, url, base_filename):
+    """
+    파이프라인으로 넘길 첨부파일 정보 생성
+    """
+    return {
+        'url': response.urljoin(url),
+        'base_filename': base_filename,
+        'referer': response.url,
+        'cookies': response_cookies(response),
+    }
+
+
+def safe_filename(filename):
+    """
+    파일명에 사용할 수 없는 문자 제거
+    """
+    return ''.join(c for c in filename if c.isalnum() or c in ' ._-').strip()
+
+
+def decode_server_filename(server_filename, decoding='unquote'):
+    """
+    Content-Disposition 의 파일명 디코딩
+
+    - 'unquote': URL 인코딩된 한글 파일명 (기본값)
+    - 'latin1': latin1 로 잘못 해석된 UTF-8 파일명 복원
+    """
+    if decoding == 'latin1':
+        return server_filename.encode('latin1').decode('utf-8', errors='ignore')
+    return unquote(server_filename)
+
+
+def guess_extension(filename, content_type, default_extension=''):
+    """
+    파일명에 확장자가 없으면 Content-Type 헤더로 확장자 추측
+    조건이 맞는 것이 없으면 default_extension 을 붙인다 (기본값은 그대로 반환)
+    """
+    if "." in filename[-5:] or not content_type:
+        return filename
+
+    content_type = content_type.lower()
+    if 'application/pdf' in content_type:
+        return filename + '.pdf'
+    if 'application/msword' in content_type or 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' in content_type:
+        return filename + '.doc'
+    if 'application/vnd.ms-excel' in content_type or 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' in content_type:
+        return filename + '.xls'
+    if 'image/' in content_type:
+        ext = content_type.replace('image/', '')
+        return filename + f'.{ext}'
+    return filename + default_extension
+
+
+def is_html_error_page(head):
+    """
+    다운로드 본문 앞부분이 파일이 아닌 HTML 오류 페이지인지 확인
+    """
+    head = head[:SNIFF_SIZE].lower()
+    return b'<!doctype html>' in head or b'<html' in head
+
+
+def stream_to_file(chunks, att_path):
+    """
+    청크 이터레이터를 att_path 에 스트리밍으로 저장
+
+    앞부분 SNIFF_SIZE 바이트만 모아 HTML 오류 페이지인지 확인하고, 이후 청크는
+    메모리에 쌓지 않고 같은 디렉토리의 임시 파일에 바로 기록한다.
+    다운로드가 끝나면 임시 파일을 최종 경로로 원자적으로 교체하므로 중간에
+    실패해도 불완전한 파일이 남지 않는다. 임시 파일 이름은 호출마다 달라서 같은
+    첨부파일을 동시에 받아도 충돌하지 않는다. HTML 오류 페이지면 False 를 반환한다.
+    """
+    chunks = iter(chunks)
+    head = b''
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= SNIFF_SIZE:
+            break
+
+    if is_html_error_page(head):
+        return False
+
+    att_path = Path(att_path)
+    tmp_path = att_path.with_name(f".{att_path.name}.{uuid.uuid4().hex}.part")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(head)
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, att_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return True
+
+
+def link_file(src, dst):
+    """
+    src 를 dst 로 하드링크 (하드링크를 만들 수 없는 파일시스템이면 복사)
+
+    호출마다 다른 임시 이름으로 만든 뒤 원자적으로 교체하므로 기존 dst 가 있거나
+    같은 dst 를 동시에 만들어도 안전하다.
+    """
+    src, dst = Path(src), Path(dst)
+    if dst.exists() and os.path.samefile(src, dst):
+        return
+    tmp_path = dst.with_name(f".{dst.name}.{uuid.uuid4().hex}.part")
+    try:
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+class BlobStore:
+    """
+    첨부파일 본문을 내용 해시로 한 번만 저장하는 디렉토리
+
+    blob 경로는 <root>/<크기>-<앞부분 해시>/<전체 SHA-256> 이다.
+    스트리밍하면서 해시를 계산하므로 파일을 다시 읽지 않고, 같은 내용의 파일은
+    이미 있는 blob 을 그대로 사용한다.
+
+    Content-Length 로 크기를 미리 알 수 있으면 앞부분 PARTIAL_HASH_SIZE 바이트를
+    받은 시점에 같은 크기와 앞부분 해시의 blob 이 있는지 확인하고, 있으면 나머지를
+    받지 않고 그 blob 을 사용한다.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def bucket(self, size, partial_hash):
+        return self.root / f"{size}-{partial_hash}"
+
+    def find(self, size, partial_hash):
+        """
+        크기와 앞부분 해시가 같은 blob 경로 (없으면 None)
+        """
+        bucket = self.bucket(size, partial_hash)
+        if not bucket.is_dir():
+            return None
+        for blob in bucket.iterdir():
+            if not blob.name.startswith('.'):
+                return blob
+        return None
+
+    def store(self, chunks, expected_size=None):
+        """
+        청크 이터레이터를 blob 으로 저장
+
+        (blob 경로, 상태) 를 반환한다. HTML 오류 페이지면 None 을 반환한다.
+        - 'stored': 새 blob 으로 저장
+        - 'linked': 끝까지 받았지만 같은 내용의 blob 이 이미 있음
+        - 'skipped': 크기와 앞부분 해시가 같은 blob 이 있어 나머지를 받지 않음
+        """
+        chunks = iter(chunks)
+        head = b''
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= SNIFF_SIZE:
+                break
+
+        if is_html_error_page(head):
+            return None
+
+        full_hash = hashlib.sha256()
+        partial_hash = hashlib.sha256()
+        partial_digest = None
+        size = 0
+
+        known = None
+
+        tmp_path = self.root / f".{uuid.uuid4().hex}.part"
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in _prepend(head, chunks):
+                    f.write(chunk)
+                    full_hash.update(chunk)
+                    if partial_digest is None:
+                        partial_hash.update(chunk[:PARTIAL_HASH_SIZE - size])
+                    size += len(chunk)
+
+                    if partial_digest is None and size >= PARTIAL_HASH_SIZE:
+                        partial_digest = partial_hash.hexdigest()[:16]
+                        if expected_size:
+                            known = self.find(expected_size, partial_digest)
+                            if known is not None:
+                                break
+
+            if known is not None:
+                tmp_path.unlink()
+                return known, 'skipped'
+
+            if partial_digest is None:
+                partial_digest = partial_hash.hexdigest()[:16]
+
+            bucket = self.bucket(size, partial_digest)
+            blob = bucket / full_hash.hexdigest()
+            if blob.exists():
+                tmp_path.unlink()
+                return blob, 'linked'
+            bucket.mkdir(exist_ok=True)
+            os.replace(tmp_path, blob)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return blob, 'stored'
+
+
+def _prepend(head, chunks):
+    if head:
+        yield head
+    yield from chunks
+
+
+def content_length(response):
+    """
+    디코딩 후 본문 크기를 알 수 있으면 Content-Length 값 (모르면 None)
+    """
+    if response.headers.get('Content-Encoding', 'identity') != 'identity':
+        return None
+    try:
+        return int(response.headers.get('Content-Length'))
+    except (TypeError, ValueError):
+        return None
+
+
+def conditional_headers(validators):
+    """
+    저장된 검증자로 조건부 요청 헤더 생성
+
+    이전에 저장한 파일이 없으면 304 응답을 받아도 쓸 파일이 없으므로 빈 dict 를 반환한다.
+    """
+    if not validators or not validators.get('path') or not Path(validators['path']).exists():
+        return {}
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+
+def download_attachment(spec, target_dir, decoding='unquote', default_extension='', validators=None, blob_store=None):
+    """
+    첨부파일 하나를 다운로드하여 target_dir 에 저장
+
+    네트워크와 디스크 I/O 를 수행하는 블로킹 함수이므로 반드시 리액터가 아닌
+    스레드 풀에서 호출해야 한다. 실패하면 None 을 반환하고, 성공하면 아래 정보를 반환한다.
+
+    - path: 저장된 (304 이면 이전에 저장한) 파일 경로
+    - status: 'miss' (검증자 없음), 'modified' (재검증 후 새로 받음), 'not_modified' (304)
+    - etag, last_modified: 다음 재검증에 사용할 검증자
+    - dedup: blob_store 를 사용했을 때 BlobStore.store() 의 상태 (그 외에는 None)
+    - size: 저장된 파일 크기
+    - latency: 요청부터 응답 헤더를 받을 때까지 걸린 시간 (초, 속도 조절에 사용)
+    - headers: 응답 헤더 중 RECORD_HEADERS (응답 기록에 사용)
+
+    연결 오류, 타임아웃, 서버 과부하 응답(429/5xx)이면 AttachmentServerError 를 발생시킨다.
+    validators 로 이전 다운로드의 검증자를 넘기면 조건부 요청을 보낸다.
+    blob_store 를 넘기면 본문은 blob 으로 저장하고 att_path 에는 하드링크를 만든다.
+    """
+    url = spec['url']
+    logger.info(f"Downloading attachment: {url}")
+
+    headers = dict(DEFAULT_HEADERS)
+    headers['Referer'] = spec.get('referer', '')
+    headers.update(spec.get('headers') or {})
+    conditional = conditional_headers(validators)
+    headers.update(conditional)
+
+    try:
+        r = requests.get(
+            url, headers=headers, cookies=spec.get('cookies') or {}, stream=True, allow_redirects=True,
+            timeout=DOWNLOAD_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        raise AttachmentServerError(str(e)) from e
+
+    with r:
+        if r.status_code == 304 and conditional:
+            logger.info(f"Attachment not modified: {url}")
+            return {
+                'path': Path(validators['path']),
+                'status': 'not_modified',
+                'etag': r.headers.get('ETag') or validators.get('etag'),
+                'last_modified': r.headers.get('Last-Modified') or validators.get('last_modified'),
+                'dedup': None,
+                'size': 0,
+                'latency': r.elapsed.total_seconds(),
+                'headers': {},
+            }
+
+        if r.status_code in OVERLOAD_STATUSES:
+            raise AttachmentServerError(f"HTTP {r.status_code}")
+        if r.status_code != 200:
+            logger.error(f"Failed to download attachment: HTTP {r.status_code}")
+            return None
+
+        # 파일명 확인 - Content-Disposition 헤더에서 파일명 추출 시도
+        filename = spec['base_filename']
+        cd = r.headers.get('Content-Disposition', '')
+        if 'filename=' in cd:
+            try:
+                server_filename = cd.split('filename=')[1].strip('"\'')
+                if server_filename:
+                    # 서버가 제공한 파일명 사용
+                    filename = decode_server_filename(server_filename, decoding)
+            except Exception as e:
+                logger.error(f"Error parsing filename: {str(e)}")
+
+        filename = guess_extension(filename, r.headers.get('Content-Type'), default_extension)
+        filename = safe_filename(filename)
+
+        target_dir = Path(target_dir)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        att_path = target_dir / filename
+
+        # 첫 청크로 HTML 오류 페이지를 확인한 뒤 나머지는 임시 파일로 바로 기록
+        dedup = None
+        chunks = r.iter_content(chunk_size=CHUNK_SIZE)
+        if blob_store is not None:
+            stored = blob_store.store(chunks, content_length(r))
+            if stored is not None:
+                blob, dedup = stored
+                link_file(blob, att_path)
+        else:
+            stored = stream_to_file(chunks, att_path)
+
+        if not stored:
+            logger.warning(f"Received HTML instead of file. Site may require authentication for downloads.")
+            # 오류 페이지로 판단되면 저장하지 않음
+            return None
+
+    if dedup in ('linked', 'skipped'):
+        logger.info(f"Attachment already stored ({dedup}), linked to {att_path}")
+    else:
+        logger.info(f"Successfully downloaded attachment to {att_path}")
+    return {
+        'path': att_path,
+        'status': 'modified' if conditional else 'miss',
+        'etag': r.headers.get('ETag'),
+        'last_modified': r.headers.get('Last-Modified'),
+        'dedup': dedup,
+        'size': att_path.stat().st_size,
+        'latency': r.elapsed.total_seconds(),
+        'headers': {name: r.headers[name] for name in RECORD_HEADERS if name in r.headers},
+    }
@@ -0,0 +1,279 @@
+# 기록한 응답(fixture)으로 스파이더 벤치마크
+#
+#   scrapy crawl btp -s FIXTURE_RECORD_DIR=fixtures        # 네트워크가 되는 곳에서 한 번 기록
+#   python -m bizsup.bench fixtures btp jbba dip --latency 200 --bandwidth 256 -s DOWNLOAD_DELAY=0
+#
+# 재생 서버(bizsup/replay.py)를 로컬에 띄우고 스파이더마다 빈 작업 디렉토리에서 별도
+# 프로세스로 크롤링한 뒤 아래 값을 출력한다 (--json 이면 한 줄에 하나씩 JSON).
+#
+# - pages/s, items/s: 받은 응답 수와 아이템 수를 스파이더가 열려 있던 시간으로 나눈 값
+# - bytes written: 작업 디렉토리에 쓴 파일 크기 합 (.md, 첨부파일, 저장소 파일)
+# - peak RSS: 크롤링 프로세스의 최대 RSS
+# - CPU: 콜백별(parse, parse_thread ...) CPU 시간과 나머지(엔진, 다운로드, 파이프라인) 시간
+#
+# 같은 fixture 디렉토리에 여러 스파이더를 함께 기록해도 된다 (키에 호스트가 들어감).
+#
+# bizsup/fixtures 에는 합성 게시판(bizsup/loadgen.py)에서 기록한 jbba, jbtp, btp, dip 의
+# 목록 1페이지, 상세 페이지 10개, 첨부파일이 들어 있다 (실제 사이트 응답이 아님).
+#
+#   python -m bizsup.bench fixtures jbba jbtp btp dip -a max_pages=1 -s DOWNLOAD_DELAY=0
+#
+# 다시 기록할 때는 합성 게시판을 띄우고 재생하면서 기록한다.
+#
+#   python -m bizsup.loadgen serve --threads 12 --attachments 1 --attachment-kb 2 --size-sigma 0.3 --seed 1 --port 8791
+#   scrapy crawl jbba -a max_pages=1 -s FIXTURE_REPLAY_URL=http://127.0.0.1:8791 -s FIXTURE_RECORD_DIR=fixtures \
+#       -s 'DOWNLOAD_HANDLERS={"http": "bizsup.replay.ReplayDownloadHandler", "https": "bizsup.replay.ReplayDownloadHandler"}' \
+#       -s INCREMENTAL_CRAWL=False -s HTTPCACHE_ENABLED=False -s DOWNLOAD_DELAY=0
+# fixture 디렉토리가 비어 있거나 스파이더 도메인(allowed_domains)의 응답이 없으면 그 스파이더는
+# 실행하지 않고 기록 방법을 출력하며, 실패한 스파이더가 있으면 종료 코드 1 로 끝난다.
+# 증분 크롤링과 HTTP 캐시는 끄고, Playwright 페이지 풀은 쓰지 않는다.
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bizsup.replay import add_server_arguments, require_fixtures, serve
+from bizsup.sites import SITES_FILE_ENV, sites_file
+
+
+# 벤치마크 프로세스에 덮어쓸 설정
+BENCH_SETTINGS = {
+    "DOWNLOAD_HANDLERS": {
+        "http": "bizsup.replay.ReplayDownloadHandler",
+        "https": "bizsup.replay.ReplayDownloadHandler",
+    },
+    "HTTPCACHE_ENABLED": False,
+    "INCREMENTAL_CRAWL": False,
+    "PLAYWRIGHT_POOL_SIZE": 0,
+    "LOG_LEVEL": "ERROR",
+}
+
+
+class StageTimingMiddleware:
+    """
+    콜백별 CPU 시간을 cpu/<callback> 통계에 기록하는 스파이더 미들웨어
+
+    콜백 결과를 하나씩 꺼낼 때마다 스레드 CPU 시간을 재므로 스파이더에 가장 가까운
+    번호(가장 큰 번호)에 두어야 다른 미들웨어의 처리 시간이 섞이지 않는다.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats)
+
+    def stage(self, response):
+        callback = response.request.callback if response.request is not None else None
+        return f"cpu/{getattr(callback, '__name__', 'parse')}"
+
+    def process_spider_output(self, response, result, spider):
+        key = self.stage(response)
+        iterator = iter(result)
+        while True:
+            start = time.thread_time()
+            try:
+                output = next(iterator)
+            except StopIteration:
+                self.stats.inc_value(key, time.thread_time() - start)
+                return
+            self.stats.inc_value(key, time.thread_time() - start)
+            yield output
+
+    async def process_spider_output_async(self, response, result, spider):
+        key = self.stage(response)
+        iterator = result.__aiter__()
+        while True:
+            start = time.thread_time()
+            try:
+                output = await iterator.__anext__()
+            except StopAsyncIteration:
+                self.stats.inc_value(key, time.thread_time() - start)
+                return
+            self.stats.inc_value(key, time.thread_time() - start)
+            yield output
+
+
+def directory_size(path):
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file() and not f.is_symlink())
+
+
+def bench_spider(spider, replay_url, settings=(), spider_args=()):
+    """
+    재생 서버(replay_url)를 상대로 스파이더 하나를 새 프로세스와 빈 작업 디렉토리에서 실행하고 결과 반환
+
+    settings, spider_args 는 "NAME=VALUE" 목록이다. 실패하면 RuntimeError 를 던진다.
+    bizsup/loadgen.py 의 규모별 측정에서도 사용한다.
+    """
+    # 작업 디렉토리가 바뀌어도 프로젝트 설정과 패키지를 찾도록
+    project_dir = Path(__file__).resolve().parents[1]
+    env = dict(os.environ)
+    env.setdefault("SCRAPY_SETTINGS_MODULE", "bizsup.settings")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(project_dir), env.get("PYTHONPATH")]))
+    # 빈 작업 디렉토리에서는 상대 경로 SITES_FILE 을 찾지 못하므로 절대 경로로 넘김 (bbs_<site> 스파이더)
+    if SITES_FILE_ENV not in env:
+        from scrapy.utils.project import get_project_settings
+        path = sites_file(get_project_settings())
+        if path is not None:
+            env[SITES_FILE_ENV] = str(path)
+
+    command = [sys.executable, "-m", "bizsup.bench", "-", spider, "--replay-url", replay_url]
+    for pair in settings:
+        command += ["-s", pair]
+    for pair in spider_args:
+        command += ["-a", pair]
+    with tempfile.TemporaryDirectory(prefix=f"bench-{spider}-") as workdir:
+        result = subprocess.run(command, capture_output=True, text=True, cwd=workdir, env=env)
+        lines = result.stdout.strip().splitlines()
+        if result.returncode != 0 or not lines:
+            raise RuntimeError(result.stderr[-2000:])
+        report = json.loads(lines[-1])
+        report["bytes_written"] = directory_size(workdir)
+    return report
+
+
+def run_crawl(spider, replay_url, overrides, spider_args=None):
+    """
+    현재 프로세스에서 크롤링 한 번 실행하고 결과를 JSON 으로 출력
+    """
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    settings = get_project_settings()
+    settings.setdict(BENCH_SETTINGS, priority="cmdline")
+    settings.set("FIXTURE_REPLAY_URL", replay_url, priority="cmdline")
+    spider_middlewares = dict(settings.getdict("SPIDER_MIDDLEWARES"))
+    spider_middlewares["bizsup.bench.StageTimingMiddleware"] = 1000
+    settings.set("SPIDER_MIDDLEWARES", spider_middlewares, priority="cmdline")
+    settings.setdict(overrides, priority="cmdline")
+
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(spider)
+    process.crawl(crawler, **(spider_args or {}))
+    process.start()
+
+    stats = crawler.stats.get_stats()
+    if "finish_reason" not in stats:
+        # 미들웨어/파이프라인을 불러오지 못하는 등 크롤링이 시작되지 않음 (원인은 위 로그)
+        sys.exit(f"{spider}: crawl did not run")
+    if stats["finish_reason"] != "finished":
+        sys.exit(f"{spider}: crawl did not finish ({stats['finish_reason']})")
+    if not stats.get("response_received_count"):
+        # 재생 서버에 없는 URL 이거나 다운로드 핸들러를 불러오지 못함
+        sys.exit(f"{spider}: no responses received from {replay_url}")
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_total = usage.ru_utime + usage.ru_stime
+    stages = {key[len("cpu/"):]: round(value, 3) for key, value in stats.items() if key.startswith("cpu/")}
+    stages["other"] = round(cpu_total - sum(stages.values()), 3)
+    # 프로세스 시작 시간을 빼고 스파이더가 열려 있던 시간만 사용
+    elapsed = stats.get("elapsed_time_seconds", 0)
+    pages = stats.get("response_received_count", 0)
+    items = stats.get("item_scraped_count", 0)
+    print(json.dumps({
+        "spider": spider,
+        "pages": pages,
+        "items": items,
+        "errors": stats.get("log_count/ERROR", 0),
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 2) if elapsed else None,
+        "items_per_sec": round(items / elapsed, 2) if elapsed else None,
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "cpu_seconds": round(cpu_total, 3),
+        "cpu_stages": stages,
+    }))
+
+
+def spider_domains(spiders):
+    """
+    스파이더 이름별 allowed_domains (프로젝트 설정의 스파이더 로더로 찾음)
+    """
+    from scrapy.spiderloader import SpiderLoader
+    from scrapy.utils.project import get_project_settings
+
+    loader = SpiderLoader.from_settings(get_project_settings())
+    domains = {}
+    for spider in spiders:
+        try:
+            domains[spider] = list(getattr(loader.load(spider), "allowed_domains", None) or ())
+        except KeyError:
+            domains[spider] = None
+    return domains
+
+
+def recorded_for(domains, hosts):
+    return any(host == domain or host.endswith(f".{domain}") for domain in domains for host in hosts)
+
+
+def format_report(report):
+    stages = ", ".join(f"{name} {seconds}s" for name, seconds in report["cpu_stages"].items())
+    return (
+        f"{report['spider']:>12}: {report['pages']} pages, {report['items']} items, {report['errors']} errors "
+        f"in {report['seconds']}s ({report['pages_per_sec']} pages/s, {report['items_per_sec']} items/s)\n"
+        f"{'':>14}{report['bytes_written'] / 1024:.1f} KB written, peak RSS {report['peak_rss_mb']} MB, "
+        f"CPU {report['cpu_seconds']}s ({stages})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기록한 응답으로 스파이더 벤치마크")
+    parser.add_argument("fixtures", help="FIXTURE_RECORD_DIR 로 기록한 디렉토리")
+    parser.add_argument("spiders", nargs="+")
+    add_server_arguments(parser)
+    parser.add_argument("-s", dest="settings", action="append", default=[], metavar="NAME=VALUE", help="설정 덮어쓰기")
+    parser.add_argument("-a", dest="spider_args", action="append", default=[], metavar="NAME=VALUE", help="스파이더 인자")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON 으로 출력")
+    parser.add_argument("--replay-url", help="(내부용) 이미 떠 있는 replay 서버 주소로 한 번만 실행")
+    args = parser.parse_args()
+
+    if args.replay_url:
+        run_crawl(
+            args.spiders[0], args.replay_url,
+            dict(pair.split("=", 1) for pair in args.settings),
+            dict(pair.split("=", 1) for pair in args.spider_args),
+        )
+        return
+
+    hosts = require_fixtures(args.fixtures).hosts()
+    domains = spider_domains(args.spiders)
+    server = serve(args.fixtures, latency_ms=args.latency, bandwidth_kb=args.bandwidth)
+    replay_url = f"http://{server.server_address[0]}:{server.server_address[1]}"
+    if not args.json:
+        print(f"Replaying {args.fixtures} on {replay_url} (latency {args.latency}ms, bandwidth {args.bandwidth or '-'} KB/s)")
+    failed = False
+    try:
+        for spider in args.spiders:
+            # 기록이 없는 스파이더는 재생 서버의 404 만 받으므로 실행하지 않음
+            if domains[spider] is None:
+                print(f"{spider}: unknown spider", file=sys.stderr)
+                failed = True
+                continue
+            if domains[spider] and not recorded_for(domains[spider], hosts):
+                print(
+                    f"{spider}: no recorded responses for {', '.join(domains[spider])} in {args.fixtures}, "
+                    f"record with: scrapy crawl {spider} -s FIXTURE_RECORD_DIR={args.fixtures}",
+                    file=sys.stderr,
+                )
+                failed = True
+                continue
+            try:
+                report = bench_spider(spider, replay_url, args.settings, args.spider_args)
+            except RuntimeError as e:
+                print(f"{spider}: failed\n{e}")
+                failed = True
+                continue
+            print(json.dumps(report) if args.json else format_report(report))
+    finally:
+        server.shutdown()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
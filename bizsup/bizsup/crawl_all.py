@@ -0,0 +1,126 @@
+# 여러 사이트를 한 프로세스(한 reactor)에서 함께 크롤링
+#
+#   python -m bizsup.crawl_all                  # bbs_* 를 뺀 모든 스파이더
+#   python -m bizsup.crawl_all --bbs            # server.csv 의 모든 사이트 (bbs_<site>)
+#   python -m bizsup.crawl_all btp jbba -a max_pages=2 -s DOWNLOAD_DELAY=1
+#
+# 예의(politeness) 제한은 도메인 단위다. DOWNLOAD_DELAY 와 CONCURRENT_REQUESTS_PER_DOMAIN 은
+# Scrapy 다운로더의 도메인 슬롯마다 적용되므로 서로 다른 호스트의 스파이더는 동시에
+# 실행하고, 전체 시간은 가장 느린 사이트 하나로 정해진다.
+# 다운로드 슬롯은 크롤러마다 따로 있어서, 같은 도메인을 보는 스파이더(btp/gntp,
+# snip/snipBottom ...)는 한 그룹으로 묶어 차례로 실행해 한 호스트에 동시에 몰리지 않게 한다.
+
+import argparse
+import time
+
+from scrapy.crawler import CrawlerProcess
+from scrapy.utils.project import get_project_settings
+from scrapy.utils.reactor import install_reactor
+
+
+def spider_domains(spidercls):
+    """
+    스파이더가 요청하는 도메인 집합 (allowed_domains, www. 제외)
+    """
+    domains = set()
+    for domain in getattr(spidercls, "allowed_domains", None) or ():
+        domains.add(domain[4:] if domain.startswith("www.") else domain)
+    return domains or {spidercls.name}
+
+
+def same_domain(a, b):
+    return any(x == y or x.endswith(f".{y}") or y.endswith(f".{x}") for x in a for y in b)
+
+
+def group_by_domain(spider_classes):
+    """
+    도메인이 겹치는 스파이더끼리 묶은 그룹 목록 [[spidercls, ...], ...]
+
+    그룹 안의 스파이더는 차례로, 그룹끼리는 동시에 실행한다.
+    """
+    groups = []  # [(domains, [spidercls, ...])]
+    for spidercls in spider_classes:
+        domains = spider_domains(spidercls)
+        members = [spidercls]
+        for group in [group for group in groups if same_domain(group[0], domains)]:
+            groups.remove(group)
+            domains |= group[0]
+            members = group[1] + members
+        groups.append((domains, members))
+    return [members for _, members in groups]
+
+
+def select_spiders(loader, names, bbs):
+    if names:
+        return [loader.load(name) for name in names]
+    return [
+        loader.load(name)
+        for name in loader.list()
+        if name.startswith("bbs_") == bbs
+    ]
+
+
+def parse_pairs(pairs, option):
+    result = {}
+    for pair in pairs or ():
+        if "=" not in pair:
+            raise SystemExit(f"{option} 값은 NAME=VALUE 형식이어야 합니다: {pair}")
+        key, value = pair.split("=", 1)
+        result[key] = value
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="여러 사이트를 한 프로세스에서 도메인별 예의 제한으로 크롤링")
+    parser.add_argument("spiders", nargs="*", help="실행할 스파이더 (없으면 전체)")
+    parser.add_argument("--bbs", action="store_true", help="server.csv 의 사이트(bbs_<site>)를 실행")
+    parser.add_argument("-a", dest="spider_args", action="append", metavar="NAME=VALUE", help="모든 스파이더에 넘길 인자")
+    parser.add_argument("-s", dest="settings", action="append", metavar="NAME=VALUE", help="설정 덮어쓰기")
+    args = parser.parse_args()
+
+    settings = get_project_settings()
+    settings.setdict(parse_pairs(args.settings, "-s"), priority="cmdline")
+    spider_args = parse_pairs(args.spider_args, "-a")
+
+    process = CrawlerProcess(settings)
+    groups = group_by_domain(select_spiders(process.spider_loader, args.spiders, args.bbs))
+    if not groups:
+        raise SystemExit("실행할 스파이더가 없습니다")
+
+    # 크롤러들이 reactor 를 설치하기 전에 가져오면 기본 reactor 가 설치되므로 설정의 reactor 를 먼저 설치
+    install_reactor(settings["TWISTED_REACTOR"], settings["ASYNCIO_EVENT_LOOP"])
+    from twisted.internet import defer, reactor
+
+    crawlers = []
+
+    @defer.inlineCallbacks
+    def run_group(group):
+        for spidercls in group:
+            crawler = process.create_crawler(spidercls)
+            crawlers.append(crawler)
+            try:
+                yield process.crawl(crawler, **spider_args)
+            except Exception as e:
+                # 한 사이트가 실패해도 같은 그룹의 다음 사이트는 계속 실행
+                print(f"{spidercls.name}: crawl failed: {e!r}")
+
+    for group in groups:
+        print(f"Group: {', '.join(spidercls.name for spidercls in group)}")
+    started = time.monotonic()
+    defer.DeferredList([run_group(group) for group in groups]).addBoth(lambda _: reactor.callWhenRunning(reactor.stop))
+    process.start(stop_after_crawl=False)
+    elapsed = time.monotonic() - started
+
+    print(f"\n{'spider':<20} {'items':>6} {'pages':>6} {'errors':>6} {'seconds':>8}  finish_reason")
+    for crawler in crawlers:
+        stats = crawler.stats.get_stats()
+        print(
+            f"{crawler.spidercls.name:<20} {stats.get('item_scraped_count', 0):>6} "
+            f"{stats.get('response_received_count', 0):>6} {stats.get('log_count/ERROR', 0):>6} "
+            f"{stats.get('elapsed_time_seconds', 0):>8.1f}  {stats.get('finish_reason')}"
+        )
+    print(f"Total wall time: {elapsed:.1f}s for {len(crawlers)} spiders in {len(groups)} domain groups")
+
+
+if __name__ == "__main__":
+    main()
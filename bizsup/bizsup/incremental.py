@@ -0,0 +1,288 @@
+# 증분 크롤링
+#
+# 한 번 수집한 스레드를 사이트 이름과 스레드 ID(board_seq, wr_id, dataSid ...)로
+# SQLite 파일에 기록해 두고, 목록 페이지의 스레드가 모두 이미 수집한 것이면
+# 그 뒤 페이지는 요청하지 않는다.
+#
+# 이미 수집한 스레드를 다시 볼 때는 두 가지 방식이 있다.
+#
+# - 재검증 (HTTP 캐시에 ThreadPageCachePolicy 를 쓰고 INCREMENTAL_REVALIDATE 가 켜져 있을 때)
+#   스레드 페이지를 이전 응답의 검증자(ETag, Last-Modified)로 조건부 요청
+#   (If-None-Match, If-Modified-Since)하고, 서버가 304 로 응답하면 다시 파싱하거나
+#   파일을 다시 쓰지 않는다. 바뀐 스레드는 다시 수집한다.
+# - 건너뛰기 (그 밖의 경우) 이미 수집한 스레드는 요청하지 않는다.
+#
+# 첨부파일은 두 방식 모두 AttachmentValidatorStore 의 검증자로 조건부 요청한다.
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from scrapy import signals
+from scrapy.extensions.httpcache import RFC2616Policy
+from scrapy.utils.misc import load_object
+from w3lib.url import url_query_parameter
+
+
+class SeenThreadIndex:
+    """
+    이미 수집한 스레드를 (site, thread_id) 로 기록하는 SQLite 색인
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_threads ("
+            " site TEXT NOT NULL,"
+            " thread_id TEXT NOT NULL,"
+            " url TEXT,"
+            " seen_at TEXT,"
+            " PRIMARY KEY (site, thread_id))"
+        )
+        self.conn.commit()
+
+    def count(self, site):
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM seen_threads WHERE site = ?", (site,)
+        ).fetchone()
+        return row[0]
+
+    def is_seen(self, site, thread_id):
+        row = self.conn.execute(
+            "SELECT 1 FROM seen_threads WHERE site = ? AND thread_id = ?", (site, thread_id)
+        ).fetchone()
+        return row is not None
+
+    def mark_seen(self, site, thread_id, url):
+        """
+        스레드를 기록하고, 처음 기록한 스레드면 True 반환
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO seen_threads (site, thread_id, url, seen_at) VALUES (?, ?, ?, ?)",
+                (site, thread_id, url, datetime.now().isoformat(timespec="seconds")),
+            )
+        return cursor.rowcount > 0
+
+    def close(self):
+        self.conn.close()
+
+
+class AttachmentValidatorStore:
+    """
+    첨부파일 URL별 검증자(ETag, Last-Modified)와 저장 경로를 기록하는 SQLite 저장소
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS attachment_validators ("
+            " url TEXT PRIMARY KEY,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " path TEXT,"
+            " checked_at TEXT)"
+        )
+        self.conn.commit()
+
+    def get(self, url):
+        row = self.conn.execute(
+            "SELECT etag, last_modified, path FROM attachment_validators WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, path = row
+        return {"etag": etag, "last_modified": last_modified, "path": path}
+
+    def set(self, url, etag, last_modified, path):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO attachment_validators (url, etag, last_modified, path, checked_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, str(path), datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+class ThreadPageCachePolicy(RFC2616Policy):
+    """
+    스레드 페이지만 저장하고 다시 요청할 때마다 서버에 재검증하는 HTTP 캐시 정책
+
+    - meta["revalidate"] 가 있는 요청만 캐시한다 (목록 페이지는 항상 새로 받음)
+    - Playwright 로 렌더링한 요청은 캐시하지 않는다
+    - 검증자(ETag 또는 Last-Modified)가 있는 200 응답만 저장한다
+    - 저장된 응답은 만료 시간과 관계없이 항상 조건부 요청으로 재검증한다
+
+    서버가 304 로 응답하면 HttpCacheMiddleware 가 저장된 응답을 'cached' 플래그와
+    함께 돌려주고, 스파이더는 IncrementalMixin.thread_unchanged() 로 이를 확인한다.
+    """
+
+    def should_cache_request(self, request):
+        if not request.meta.get("revalidate") or request.meta.get("playwright"):
+            return False
+        return super().should_cache_request(request)
+
+    def should_cache_response(self, response, request):
+        if response.status != 200:
+            return False
+        if b"no-store" in self._parse_cachecontrol(response):
+            return False
+        return b"ETag" in response.headers or b"Last-Modified" in response.headers
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        # 저장된 응답을 그대로 쓰지 않고 항상 검증자를 붙여 서버에 확인
+        self._set_conditional_validators(request, cachedresponse)
+        return False
+
+
+def revalidating_cache_enabled(settings):
+    """
+    HTTP 캐시가 ThreadPageCachePolicy(또는 하위 클래스)로 켜져 있는지
+    """
+    if not settings.getbool("HTTPCACHE_ENABLED"):
+        return False
+    policy = load_object(settings.get("HTTPCACHE_POLICY"))
+    return issubclass(policy, ThreadPageCachePolicy)
+
+
+class IncrementalMixin:
+    """
+    이미 수집한 스레드를 건너뛰거나 재검증하는 스파이더 믹스인
+
+    thread_id_param 으로 스레드 URL에서 스레드 ID를 꺼내고(없으면 URL 전체),
+    아이템이 수집되면(item_scraped) SeenThreadIndex 에 기록한다.
+    INCREMENTAL_CRAWL 설정이나 스파이더 인자(-a incremental=0)로 끌 수 있다.
+
+    스레드 페이지를 요청하는 스파이더는 threads_to_request() 로 요청할 URL을 고른다.
+    재검증 방식이면 이미 수집한 스레드도 돌려주므로 meta["revalidate"] 와 함께
+    요청하고 parse_thread 에서 thread_unchanged() 로 304 를 확인해야 한다.
+    """
+
+    # 스레드 URL에서 스레드 ID를 담고 있는 파라미터 이름
+    thread_id_param = None
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.seen_index = None
+        spider.revalidate_seen = False
+        spider.known_thread_count = 0
+        spider.thread_counter = 0
+
+        enabled = crawler.settings.getbool("INCREMENTAL_CRAWL", True)
+        if getattr(spider, "incremental", None) is not None:
+            enabled = spider.incremental not in ("0", "false", "False", "no")
+        if enabled:
+            spider.seen_index = SeenThreadIndex(crawler.settings.get("SEEN_THREADS_DB", "seen_threads.db"))
+            spider.known_thread_count = spider.seen_index.count(spider.name)
+            spider.revalidate_seen = (
+                crawler.settings.getbool("INCREMENTAL_REVALIDATE", True)
+                and revalidating_cache_enabled(crawler.settings)
+            )
+            mode = "재검증" if spider.revalidate_seen else "건너뛰기"
+            spider.logger.info(f"증분 크롤링({mode}): 이미 수집한 스레드 {spider.known_thread_count}개")
+            crawler.signals.connect(spider.thread_scraped, signal=signals.item_scraped)
+            crawler.signals.connect(spider.close_seen_index, signal=signals.spider_closed)
+        return spider
+
+    def thread_id(self, url):
+        """
+        스레드 URL에서 스레드 ID 추출 (찾지 못하면 URL 전체)
+        """
+        if self.thread_id_param:
+            value = url_query_parameter(url, self.thread_id_param)
+            if value:
+                return value
+        return url
+
+    def thread_index(self, url):
+        """
+        출력 파일 이름에 사용할 스레드 번호
+
+        실행마다 번호가 바뀌지 않도록 스레드 ID를 사용하고, ID가 없으면 발견 순서를 사용한다.
+        """
+        thread_id = self.thread_id(url)
+        if thread_id != url:
+            return thread_id
+        self.thread_counter += 1
+        return self.thread_counter
+
+    def is_thread_seen(self, url):
+        return self.seen_index is not None and self.seen_index.is_seen(self.name, self.thread_id(url))
+
+    def all_threads_seen(self, urls):
+        """
+        목록 페이지의 스레드가 모두 이미 수집한 것인지 (페이지네이션 중단 조건)
+        """
+        return bool(urls) and all(self.is_thread_seen(url) for url in urls)
+
+    def filter_seen_threads(self, urls):
+        """
+        이미 수집한 스레드를 제외한 URL 목록
+        """
+        if self.seen_index is None:
+            return list(urls)
+        new_urls = [url for url in urls if not self.is_thread_seen(url)]
+        skipped = len(urls) - len(new_urls)
+        if skipped:
+            self.logger.info(f"Skipped {skipped} already seen threads")
+            self.crawler.stats.inc_value("incremental/skipped", skipped)
+        return new_urls
+
+    def threads_to_request(self, urls):
+        """
+        요청할 스레드 URL 목록
+
+        재검증 방식이면 이미 수집한 스레드도 포함하고(조건부 요청으로 바뀌었는지 확인),
+        건너뛰기 방식이면 filter_seen_threads() 와 같다.
+        """
+        if not self.revalidate_seen:
+            return self.filter_seen_threads(urls)
+        known = sum(1 for url in urls if self.is_thread_seen(url))
+        if known:
+            self.logger.info(f"Revalidating {known} already seen threads")
+            self.crawler.stats.inc_value("incremental/revalidate", known)
+        return list(urls)
+
+    def thread_unchanged(self, response):
+        """
+        스레드 페이지가 이전 크롤링 이후 바뀌지 않았는지 확인 (304 재검증)
+
+        재검증 방식(revalidate_seen)일 때만 조건부 요청 여부와 결과를 revalidation/pages/*
+        통계에 기록한다. HTTP 캐시가 꺼져 있거나 다른 정책이면 항상 거짓이고 세지 않는다.
+        참이면 parse_thread 는 다시 파싱하거나 .md 파일을 다시 쓰지 않고 끝낸다.
+        """
+        if not self.revalidate_seen or not response.meta.get("revalidate"):
+            return False
+        stats = self.crawler.stats
+        headers = response.request.headers
+        if b"If-None-Match" not in headers and b"If-Modified-Since" not in headers:
+            stats.inc_value("revalidation/pages/miss")
+            return False
+        stats.inc_value("revalidation/pages/revalidated")
+        if "cached" not in response.flags:
+            return False
+        stats.inc_value("revalidation/pages/hit")
+        self.logger.info(f"Thread not modified, skipping: {response.url}")
+        return True
+
+    def thread_scraped(self, item, response, spider):
+        if spider is not self:
+            return
+        url = item.get("url") or item.get("thread_url")
+        if url:
+            if self.seen_index.mark_seen(self.name, self.thread_id(url), url):
+                self.crawler.stats.inc_value("incremental/new")
+            else:
+                # 재검증에서 바뀐 것으로 확인되어 다시 수집한 스레드
+                self.crawler.stats.inc_value("incremental/updated")
+
+    def close_seen_index(self, spider):
+        if spider is self:
+            self.seen_index.close()
@@ -0,0 +1,478 @@
+# 규모 테스트용 가상 게시판 서버와 측정 도구
+#
+# 실제 게시판은 10개씩 6페이지뿐이라 수만 개 스레드와 수천 개 첨부파일에서 스파이더와
+# 파이프라인이 어떻게 동작하는지 확인할 수 없다. 이 서버(BoardHandler)는 스파이더의 선택자에 맞는
+# 게시판 레이아웃을 원하는 규모로 만들어 내는 로컬 서버다.
+#
+# - jbba.kr: 그누보드 (.td_subject a, wr_id, #bo_v_con, #bo_v_file download.php)
+# - jbtp.or.kr: list.jbtp / view.jbtp?dataSid=, .bbs_filedown a.sbtn_down
+# - btp.or.kr: Board.do, .stitle a, board_seq, .board_view_cont, .file_list
+# - dip.or.kr: tr[onclick="read(...)"], boardRead.ubs?fboardnum=, div.read__content
+#
+# 요청은 bizsup/replay.py 와 같은 방식으로 받는다. 벤치마크 프로세스의 ReplayDownloadHandler 와
+# AttachmentPipeline 이 원래 호스트를 X-Replay-Host 헤더로 보내면 그 호스트의 레이아웃으로
+# 응답한다. 게시글 내용과 첨부파일 크기는 (seed, 스레드 번호) 로 정해지므로 같은 설정이면
+# 실행마다 같은 게시판이 만들어진다.
+#
+#   python -m bizsup.loadgen serve --threads 10000 --rows 20 --port 8900
+#   python -m bizsup.loadgen bench jbba --threads 100 1000 10000 --rows 20 --attachments 3 --csv jbba.csv
+#
+# bench 는 스레드 수마다 서버를 새로 띄우고 bizsup/bench.py 로 스파이더를 실행해서
+# 규모에 따른 처리량(pages/s, items/s)과 최대 RSS, CPU 시간을 표(와 CSV)로 출력한다.
+
+import argparse
+import csv
+import hashlib
+import math
+import random
+import time
+from html import escape
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+from bizsup.bench import bench_spider
+from bizsup.replay import REPLAY_HOST_HEADER, ReplayHandler, add_server_arguments, start_server
+
+
+# 규모 측정에서 덮어쓸 설정 - 예의 제한이 아니라 스파이더와 파이프라인의 처리 능력을 잰다
+LOAD_SETTINGS = {
+    "DOWNLOAD_DELAY": "0",
+    "ADAPTIVE_THROTTLE_ENABLED": "False",
+    "CONCURRENT_REQUESTS_PER_DOMAIN": "8",
+    "ATTACHMENT_BLOB_DIR": "attachment_blobs",
+}
+
+# 여러 게시글에 함께 올라오는 첨부파일(신청서 양식 등)의 수
+SHARED_FILES = 5
+# 첨부파일 본문을 채우는 반복 블록 크기
+FILL_BLOCK = 64 * 1024
+FILE_EXTENSIONS = (".hwp", ".pdf", ".zip", ".xlsx")
+CONTENT_TYPES = {
+    ".hwp": "application/x-hwp",
+    ".pdf": "application/pdf",
+    ".zip": "application/zip",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+PARAGRAPHS = (
+    "지역 중소기업의 기술 경쟁력 강화를 위한 지원사업 참여 기업을 다음과 같이 모집합니다.",
+    "신청 자격은 공고일 기준 도내에 본사 또는 사업장을 둔 중소기업이며, 세부 요건은 첨부된 공고문을 확인하시기 바랍니다.",
+    "지원 내용은 시제품 제작, 시험 인증, 마케팅 비용이며 기업당 최대 5천만원 이내에서 지원합니다.",
+    "제출 서류는 사업신청서, 사업자등록증 사본, 중소기업 확인서이며 온라인으로 접수합니다.",
+    "문의 사항은 담당 부서로 연락 주시기 바랍니다.",
+)
+
+
+class Board:
+    """
+    스레드 번호로 게시글 제목, 본문, 첨부파일이 정해지는 가상 게시판
+
+    스레드 번호는 1..threads 이고 목록 1페이지에 가장 최근(가장 큰 번호) 게시글이 온다.
+    게시글마다 첨부파일은 0..attachments 개, 크기는 중앙값 attachment_kb 의 로그 정규 분포
+    (size_sigma) 를 따르고, shared 비율만큼은 여러 게시글에 같은 파일(SHARED_FILES 개 중 하나)을 단다.
+    """
+
+    def __init__(self, threads=1000, rows=10, attachments=2, attachment_kb=100, size_sigma=1.0,
+                 shared=0.1, seed=0):
+        self.threads = threads
+        self.rows = rows
+        self.attachments = attachments
+        self.attachment_kb = attachment_kb
+        self.size_sigma = size_sigma
+        self.shared = shared
+        self.seed = seed
+        self.fill = random.Random(seed).randbytes(FILL_BLOCK)
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(self.threads / self.rows))
+
+    def page_threads(self, page):
+        """
+        목록 page 페이지의 스레드 번호 (범위를 벗어나면 빈 목록)
+        """
+        first = self.threads - (page - 1) * self.rows
+        return list(range(first, max(first - self.rows, 0), -1)) if page >= 1 else []
+
+    def exists(self, thread):
+        return 1 <= thread <= self.threads
+
+    def title(self, thread):
+        return f"[공고] 2026년 중소기업 지원사업 참여기업 모집 공고 제{thread}호"
+
+    def date(self, thread):
+        return f"2026-{thread % 12 + 1:02d}-{thread % 28 + 1:02d}"
+
+    def content(self, thread):
+        rng = random.Random(f"{self.seed}:{thread}")
+        paragraphs = [PARAGRAPHS[rng.randrange(len(PARAGRAPHS))] for _ in range(rng.randint(3, 12))]
+        return "".join(f"<p>{escape(p)}</p>" for p in paragraphs)
+
+    def files(self, thread):
+        """
+        게시글의 첨부파일 목록 [(이름, 크기, 공유 파일 번호 또는 None)]
+        """
+        rng = random.Random(f"{self.seed}:{thread}:files")
+        files = []
+        for no in range(rng.randint(0, self.attachments)):
+            if rng.random() < self.shared:
+                shared = rng.randrange(SHARED_FILES)
+                rng_shared = random.Random(f"{self.seed}:shared:{shared}")
+                size = self.file_size(rng_shared)
+                files.append((f"신청서양식_{shared}{FILE_EXTENSIONS[shared % len(FILE_EXTENSIONS)]}", size, shared))
+            else:
+                extension = FILE_EXTENSIONS[rng.randrange(len(FILE_EXTENSIONS))]
+                files.append((f"공고문_{thread}_{no}{extension}", self.file_size(rng), None))
+        return files
+
+    def file_size(self, rng):
+        return max(1, int(rng.lognormvariate(math.log(self.attachment_kb * 1024), self.size_sigma)))
+
+    def file_body(self, thread, no):
+        """
+        첨부파일 본문 (없으면 None) - 앞부분만 파일마다 다르고 나머지는 공통 블록을 반복
+        """
+        files = self.files(thread) if self.exists(thread) else []
+        if not 0 <= no < len(files):
+            return None
+        name, size, shared = files[no]
+        head = f"{self.seed}:{'shared:' + str(shared) if shared is not None else f'{thread}:{no}'}\n".encode()
+        body = head + self.fill * (size // FILL_BLOCK + 1)
+        return name, body[:size]
+
+
+class Layout:
+    """
+    사이트 하나의 게시판 HTML 레이아웃
+
+    route() 가 경로와 쿼리를 보고 list_page / thread_page / download 중 하나로 응답한다.
+    """
+
+    # Content-Disposition 파일명 인코딩 ('latin1': UTF-8 바이트 그대로, 'quote': URL 인코딩)
+    filename_encoding = "quote"
+
+    def route(self, board, path, query):
+        raise NotImplementedError
+
+    def page(self, title, body):
+        return f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{escape(title)}</title></head><body>{body}</body></html>"
+
+    def list_response(self, board, page):
+        threads = board.page_threads(page)
+        return 200, "text/html; charset=utf-8", self.list_page(board, page, threads).encode()
+
+    def thread_response(self, board, thread):
+        if not board.exists(thread):
+            return 404, "text/html; charset=utf-8", self.page("없음", "<p>게시글이 없습니다.</p>").encode()
+        return 200, "text/html; charset=utf-8", self.thread_page(board, thread, board.files(thread)).encode()
+
+    def download_response(self, board, thread, no):
+        found = board.file_body(thread, no)
+        if found is None:
+            return 404, "text/html; charset=utf-8", self.page("없음", "<p>파일이 없습니다.</p>").encode()
+        name, body = found
+        extension = name[name.rfind("."):]
+        if self.filename_encoding == "latin1":
+            filename = name.encode("utf-8").decode("latin-1")
+        else:
+            filename = quote(name)
+        return 200, CONTENT_TYPES.get(extension, "application/octet-stream"), body, f'attachment; filename="{filename}"'
+
+
+def int_param(query, name, default=0):
+    try:
+        return int(query.get(name, [default])[0])
+    except ValueError:
+        return default
+
+
+class GnuboardLayout(Layout):
+    filename_encoding = "latin1"
+
+    def route(self, board, path, query):
+        if path.endswith("/download.php"):
+            return self.download_response(board, int_param(query, "wr_id"), int_param(query, "no"))
+        if path.endswith("/board.php") and "wr_id" in query:
+            return self.thread_response(board, int_param(query, "wr_id"))
+        if path.endswith("/board.php"):
+            return self.list_response(board, int_param(query, "page", 1))
+        return None
+
+    def list_page(self, board, page, threads):
+        rows = "".join(
+            f'<tr><td class="td_num">{thread}</td><td class="td_subject"><a href="/bbs/board.php?bo_table=sub01_09&amp;wr_id={thread}">'
+            f'{escape(board.title(thread))}</a></td><td class="td_date">{board.date(thread)}</td></tr>'
+            for thread in threads
+        )
+        return self.page("공지사항", f'<table class="board_list"><tbody>{rows}</tbody></table>')
+
+    def thread_page(self, board, thread, files):
+        links = "".join(
+            f'<li><a href="/bbs/download.php?bo_table=sub01_09&amp;wr_id={thread}&amp;no={no}"><strong>{escape(name)}</strong></a></li>'
+            for no, (name, _, _) in enumerate(files)
+        )
+        return self.page(board.title(thread), (
+            f'<h1 class="board_view_subject">{escape(board.title(thread))}</h1>'
+            f'<div class="bo_v_info"><strong>관리자</strong><span class="if_date">{board.date(thread)}</span></div>'
+            f'<section id="bo_v_file"><ul>{links}</ul></section>'
+            f'<div id="bo_v_con">{board.content(thread)}</div>'
+        ))
+
+
+class JbtpLayout(Layout):
+    filename_encoding = "latin1"
+    query = "boardId=BBS_0000006&amp;menuCd=DOM_000000102001000000"
+
+    def route(self, board, path, query):
+        if path.endswith("/fileDown.jbtp"):
+            return self.download_response(board, int_param(query, "fileId"), int_param(query, "fileSeq"))
+        if path.endswith("/view.jbtp"):
+            return self.thread_response(board, int_param(query, "dataSid"))
+        if path.endswith("/list.jbtp"):
+            return self.list_response(board, int_param(query, "pageNo", 1))
+        return None
+
+    def list_page(self, board, page, threads):
+        rows = "".join(
+            f'<tr><td>{thread}</td><td class="subject"><a href="/board/view.jbtp?{self.query}&amp;dataSid={thread}">'
+            f'{escape(board.title(thread))}</a></td><td>{board.date(thread)}</td></tr>'
+            for thread in threads
+        )
+        return self.page("사업공고", f'<table class="bbs_list"><tbody>{rows}</tbody></table>')
+
+    def thread_page(self, board, thread, files):
+        files_html = "".join(
+            f'<dd>{escape(name)} <a class="sbtn_down" href="/board/fileDown.jbtp?fileId={thread}&amp;fileSeq={no}">다운로드</a></dd>'
+            for no, (name, _, _) in enumerate(files)
+        )
+        return self.page(board.title(thread), (
+            f'<div class="board_view"><div class="t_tit">{escape(board.title(thread))}</div>'
+            f'<ul class="t_info"><li>관리자</li><li>{board.date(thread)}</li></ul>'
+            f'<dl class="bbs_filedown"><dt>첨부파일</dt>{files_html}</dl>'
+            f'<div class="cont">{board.content(thread)}</div></div>'
+        ))
+
+
+class BtpLayout(Layout):
+    def route(self, board, path, query):
+        if not path.endswith("/Board.do"):
+            return None
+        mode = query.get("mode", [""])[0]
+        if mode == "download":
+            return self.download_response(board, int_param(query, "board_seq"), int_param(query, "fileSeq"))
+        if mode == "view":
+            return self.thread_response(board, int_param(query, "board_seq"))
+        return self.list_response(board, int_param(query, "page", 1))
+
+    def list_page(self, board, page, threads):
+        rows = "".join(
+            f'<tr><td>{thread}</td><td class="stitle"><a href="/kor/CMS/Board/Board.do?mCode=MN013&amp;mode=view&amp;board_seq={thread}">'
+            f'{escape(board.title(thread))}</a></td><td>{board.date(thread)}</td></tr>'
+            for thread in threads
+        )
+        return self.page("사업공고", f'<table class="table_list"><tbody>{rows}</tbody></table>')
+
+    def thread_page(self, board, thread, files):
+        links = "".join(
+            f'<li><a href="/kor/CMS/Board/Board.do?mCode=MN013&amp;mode=download&amp;board_seq={thread}&amp;fileSeq={no}">{escape(name)}</a></li>'
+            for no, (name, _, _) in enumerate(files)
+        )
+        return self.page(board.title(thread), (
+            f'<div class="board_view_tit">{escape(board.title(thread))}</div>'
+            f'<div class="view_info"><span>관리자</span><span>{board.date(thread)}</span></div>'
+            f'<ul class="file_list">{links}</ul>'
+            f'<div class="board_view_cont">{board.content(thread)}</div>'
+        ))
+
+
+class DipLayout(Layout):
+    def route(self, board, path, query):
+        if path.endswith("/fileDown.ubs"):
+            return self.download_response(board, int_param(query, "fboardnum"), int_param(query, "fileno"))
+        if path.endswith("/boardRead.ubs"):
+            return self.thread_response(board, int_param(query, "fboardnum"))
+        if path.endswith("/boardList.ubs"):
+            return self.list_response(board, int_param(query, "sfpage", 1))
+        return None
+
+    def list_page(self, board, page, threads):
+        rows = "".join(
+            f'<tr onclick="javascript:read(\'dipadmin\',\'{thread}\')"><td>{thread}</td>'
+            f'<td>{escape(board.title(thread))}</td><td>{board.date(thread)}</td></tr>'
+            for thread in threads
+        )
+        return self.page("사업공고", f'<div class="board__item"><table><tbody>{rows}</tbody></table></div>')
+
+    def thread_page(self, board, thread, files):
+        links = "".join(
+            f'<dd><a href="/home/notice/businessbbs/fileDown.ubs?fboardnum={thread}&amp;fileno={no}">{escape(name)}</a></dd>'
+            for no, (name, _, _) in enumerate(files)
+        )
+        columns = [
+            '<div class="board-read-table__column"><div class="board-read-table__content">사업공고</div></div>',
+            ('<div class="board-read-table__column board-read-table__column3">'
+             '<div class="board-read-table__column3--item"><div class="board-read-table__content"><span>관리자</span></div></div>'
+             f'<div class="board-read-table__column3--item"><div class="board-read-table__content"><span>{board.date(thread)}</span></div></div></div>'),
+            '<div class="board-read-table__column"><div class="board-read-table__content">전체</div></div>',
+            '<div class="board-read-table__column"><div class="board-read-table__content">-</div></div>',
+            f'<div class="board-read-table__column"><div class="board-read-table__content"><dl class="horizontal"><dt>첨부</dt>{links}</dl></div></div>',
+        ]
+        return self.page(board.title(thread), (
+            f'<div class="read__title"><h3>{escape(board.title(thread))}</h3></div>'
+            f'<div class="board-read-table">{"".join(columns)}</div>'
+            f'<div class="read__content">{board.content(thread)}</div>'
+        ))
+
+
+# 호스트(끝부분 일치) -> 레이아웃
+LAYOUTS = {
+    "jbba.kr": GnuboardLayout(),
+    "jbtp.or.kr": JbtpLayout(),
+    "btp.or.kr": BtpLayout(),
+    "dip.or.kr": DipLayout(),
+}
+
+
+def find_layout(host):
+    host = host.split(":")[0].lower()
+    for domain, layout in LAYOUTS.items():
+        if host == domain or host.endswith(f".{domain}"):
+            return layout
+    return None
+
+
+class BoardHandler(ReplayHandler):
+    """
+    X-Replay-Host(없으면 Host) 헤더의 레이아웃으로 가상 게시판 페이지와 첨부파일을 만들어 응답
+    """
+
+    board = None
+
+    def replay(self):
+        layout = find_layout(self.headers.get(REPLAY_HOST_HEADER) or self.headers.get("Host") or "")
+        parts = urlsplit(self.path)
+        response = layout.route(self.board, parts.path, parse_qs(parts.query)) if layout else None
+        if response is None:
+            self.send_error(404, "Unknown board")
+            return
+        if self.latency:
+            time.sleep(self.latency)
+        status, content_type, body, *disposition = response
+        # 같은 보드 설정이면 페이지 내용이 같으므로 내용 해시를 ETag 로 써서 재검증(304)도 흉내 냄
+        etag = f'"{hashlib.md5(body).hexdigest()}"' if status == 200 else None
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if etag:
+            self.send_header("ETag", etag)
+        if disposition:
+            self.send_header("Content-Disposition", disposition[0])
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.write_body(body)
+
+
+def make_server(board, host="127.0.0.1", port=0, latency_ms=0, bandwidth_kb=0):
+    handler = type("LoadBoardHandler", (BoardHandler,), {
+        "board": board,
+        "latency": latency_ms / 1000,
+        "bandwidth": bandwidth_kb * 1024,
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def add_board_arguments(parser):
+    parser.add_argument("--rows", type=int, default=10, help="목록 페이지당 게시글 수")
+    parser.add_argument("--attachments", type=int, default=2, help="게시글당 최대 첨부파일 수")
+    parser.add_argument("--attachment-kb", type=float, default=100, help="첨부파일 크기 중앙값 (KB)")
+    parser.add_argument("--size-sigma", type=float, default=1.0, help="첨부파일 크기 로그 정규 분포의 sigma")
+    parser.add_argument("--shared", type=float, default=0.1, help="여러 게시글에 같은 파일을 다는 비율")
+    parser.add_argument("--seed", type=int, default=0)
+    add_server_arguments(parser)
+
+
+def make_board(args, threads):
+    return Board(threads, args.rows, args.attachments, args.attachment_kb, args.size_sigma, args.shared, args.seed)
+
+
+def run_serve(args):
+    board = make_board(args, args.threads)
+    server = make_server(board, args.host, args.port, args.latency, args.bandwidth)
+    print(f"Serving {board.threads} threads in {board.pages} pages for {', '.join(LAYOUTS)} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def serve_board(board, latency_ms=0, bandwidth_kb=0):
+    """
+    가상 게시판 서버를 임의 포트의 백그라운드 스레드로 시작
+    """
+    return start_server(make_server(board, latency_ms=latency_ms, bandwidth_kb=bandwidth_kb))
+
+
+def run_bench(args):
+    settings = [f"{name}={value}" for name, value in LOAD_SETTINGS.items()] + args.settings
+    print(f"{'threads':>8} {'pages':>7} {'items':>7} {'errors':>6} {'seconds':>8} {'pages/s':>8} {'items/s':>8} "
+          f"{'MB written':>10} {'peak RSS MB':>11} {'CPU s':>7}")
+    rows = []
+    for threads in args.threads:
+        board = make_board(args, threads)
+        server = serve_board(board, args.latency, args.bandwidth)
+        replay_url = f"http://{server.server_address[0]}:{server.server_address[1]}"
+        try:
+            report = bench_spider(args.spider, replay_url, settings, [f"max_pages={board.pages}"] + args.spider_args)
+        except RuntimeError as e:
+            print(f"{threads:>8} failed\n{e}")
+            continue
+        finally:
+            server.shutdown()
+        row = {"threads": threads, **{key: value for key, value in report.items() if key != "cpu_stages"}}
+        row.update({f"cpu_{stage}": seconds for stage, seconds in report["cpu_stages"].items()})
+        rows.append(row)
+        print(
+            f"{threads:>8} {report['pages']:>7} {report['items']:>7} {report['errors']:>6} {report['seconds']:>8} "
+            f"{report['pages_per_sec']:>8} {report['items_per_sec']:>8} {report['bytes_written'] / 2 ** 20:>10.1f} "
+            f"{report['peak_rss_mb']:>11} {report['cpu_seconds']:>7}"
+        )
+
+    if args.csv and rows:
+        fields = list(dict.fromkeys(key for row in rows for key in row))
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Saved {len(rows)} rows to {args.csv}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="규모 테스트용 가상 게시판 서버와 측정 도구")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="가상 게시판 서버 실행")
+    serve_parser.add_argument("--threads", type=int, default=1000, help="게시글 수")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8900)
+    add_board_arguments(serve_parser)
+
+    bench_parser = commands.add_parser("bench", help="게시글 수를 늘려 가며 스파이더 처리량과 메모리 측정")
+    bench_parser.add_argument("spider", help="jbba, jbtp, btp, dip")
+    bench_parser.add_argument("--threads", type=int, nargs="+", default=[100, 1000, 10000], help="측정할 게시글 수 목록")
+    bench_parser.add_argument("-s", dest="settings", action="append", default=[], metavar="NAME=VALUE", help="설정 덮어쓰기")
+    bench_parser.add_argument("-a", dest="spider_args", action="append", default=[], metavar="NAME=VALUE", help="스파이더 인자")
+    bench_parser.add_argument("--csv", help="결과를 저장할 CSV 파일")
+    add_board_arguments(bench_parser)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        run_serve(args)
+    else:
+        run_bench(args)
+
+
+if __name__ == "__main__":
+    main()
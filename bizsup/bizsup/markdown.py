@@ -0,0 +1,290 @@
+# 게시글 본문 HTML -> Markdown 변환
+#
+# 모든 스파이더의 parse_thread 가 공유하는 변환 함수.
+# - 'html2text' (기본값): 기존과 같은 html2text 변환. 설정한 변환기를 스레드마다
+#   하나만 만들어 재사용한다.
+# - 'lxml': Scrapy 선택자가 이미 파싱해 둔 lxml 트리를 그대로 순회해서 Markdown 을
+#   만든다. HTML 을 문자열로 직렬화했다가 다시 파싱하지 않아 더 빠르지만, 테이블과
+#   목록 등의 출력이 html2text 와 조금 다르다.
+# MARKDOWN_ENGINE 설정으로 선택한다.
+#
+# 변환한 본문은 아이템의 markdown 필드로 넘기고, 파일은 MarkdownWriterPipeline 이
+# markdown_document() 로 머리말(제목, 원본 URL, 작성자, 작성일)을 붙여
+# write_markdown_files() 로 스레드 풀에서 쓴다 (bizsup/pipelines.py).
+
+import os
+import re
+import threading
+import uuid
+from pathlib import Path
+
+import html2text
+from lxml import html as lxml_html
+
+
+ENGINES = ("lxml", "html2text")
+
+_local = threading.local()
+
+
+def html2text_converter():
+    """
+    현재 스레드의 html2text 변환기 (처음 호출할 때 한 번만 생성하고 설정)
+    """
+    converter = getattr(_local, "html2text", None)
+    if converter is None:
+        converter = html2text.HTML2Text()
+        converter.ignore_links = False  # 링크 유지
+        converter.ignore_images = False  # 이미지 유지
+        converter.ignore_tables = False  # 테이블 유지
+        converter.body_width = 0  # 줄바꿈 방지
+        converter.unicode_snob = True  # 유니코드 문자 유지
+        converter.mark_code = True  # 코드 블록 마킹
+        _local.html2text = converter
+    return converter
+
+
+def html_to_markdown(content, engine="html2text"):
+    """
+    본문을 Markdown 으로 변환
+
+    content 는 Scrapy Selector (response.css(...)[0]) 또는 HTML 문자열이다.
+    Selector 를 넘기면 'lxml' 엔진은 이미 파싱된 트리를 바로 사용한다.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown markdown engine: {engine}")
+
+    if engine == "html2text":
+        if not isinstance(content, str):
+            content = content.get()
+        return html2text_converter().handle(content)
+
+    if isinstance(content, str):
+        element = lxml_html.fragment_fromstring(content, create_parent="div")
+    else:
+        element = content.root
+    return LxmlMarkdownConverter().convert(element)
+
+
+def markdown_document(title, url, body, author=None, date=None):
+    """
+    게시글 Markdown 파일 내용 (제목, 원본 URL, 작성자/작성일이 있으면 그것까지, 그리고 본문)
+    """
+    parts = [f"# {title}\n\n", f"원본 URL: {url}\n\n"]
+    if author:
+        parts.append(f"작성자: {author}\n\n")
+    if date:
+        parts.append(f"작성일: {date}\n\n")
+    parts.append("## 내용\n\n")
+    parts.append(body)
+    return "".join(parts)
+
+
+def write_text_atomic(path, text):
+    """
+    text 를 UTF-8 로 path 에 쓰고 쓴 바이트 수 반환
+
+    같은 디렉토리의 임시 파일에 쓴 뒤 원자적으로 교체하므로 중간에 실패해도
+    반쯤 쓴 파일이 남지 않는다. 임시 파일 이름은 호출마다 달라서 같은 경로를 동시에
+    써도 서로의 임시 파일을 덮어쓰지 않는다. 상위 디렉토리가 없으면 만든다.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = text.encode("utf-8")
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.part")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return len(data)
+
+
+def write_markdown_files(batch):
+    """
+    [(경로, 내용)] 을 차례로 쓰고 (쓴 바이트 수, [(경로, 오류)]) 반환 (스레드 풀에서 실행)
+
+    파일 하나가 실패해도 나머지는 계속 쓴다.
+    """
+    written = 0
+    errors = []
+    for path, text in batch:
+        try:
+            written += write_text_atomic(path, text)
+        except OSError as e:
+            errors.append((path, e))
+    return written, errors
+
+
+_WHITESPACE = re.compile(r"\s+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+_SKIP_TAGS = {"script", "style", "noscript", "head", "title", "meta", "link", "iframe", "button", "select", "option"}
+_BLOCK_TAGS = {
+    "p", "div", "section", "article", "header", "footer", "main", "aside", "nav",
+    "center", "form", "fieldset", "figure", "figcaption", "address", "dl", "dd", "dt",
+    "body", "html",
+}
+_HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+
+class LxmlMarkdownConverter:
+    """
+    lxml 요소 트리를 순회하면서 Markdown 문자열 생성
+
+    html2text 출력과 같은 규칙(제목 #, 굵게 **, 기울임 _, 링크 [](), 이미지 ![](),
+    목록 * / 1., 코드 블록 ```)을 사용하고, 테이블은 | 로 구분된 Markdown 테이블로 만든다.
+    """
+
+    def convert(self, element):
+        text = self.render_block(element)
+        lines = [line.rstrip() for line in text.split("\n")]
+        return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip() + "\n"
+
+    def render_children(self, element):
+        parts = []
+        if element.text:
+            parts.append(self.text(element.text, parts))
+        for child in element:
+            parts.append(self.render(child))
+            if child.tail:
+                parts.append(self.text(child.tail, parts))
+        return "".join(parts)
+
+    def text(self, value, parts):
+        value = _WHITESPACE.sub(" ", value)
+        # 블록 다음에 오는 텍스트는 줄 앞 공백 제거
+        if not parts or parts[-1].endswith("\n"):
+            value = value.lstrip(" ")
+        return value
+
+    def render_block(self, element):
+        return f"\n\n{self.render_children(element).strip()}\n\n"
+
+    def render(self, element):
+        tag = element.tag
+        if not isinstance(tag, str):
+            # 주석, 처리 명령
+            return ""
+        tag = tag.lower()
+
+        if tag in _SKIP_TAGS:
+            return ""
+        if tag in _HEADING_TAGS:
+            text = self.inline(element)
+            return f"\n\n{'#' * _HEADING_TAGS[tag]} {text}\n\n" if text else ""
+        if tag in _BLOCK_TAGS:
+            return self.render_block(element)
+        if tag == "br":
+            return "\n"
+        if tag == "hr":
+            return "\n\n* * *\n\n"
+        if tag in ("strong", "b"):
+            return self.wrap(element, "**")
+        if tag in ("em", "i"):
+            return self.wrap(element, "_")
+        if tag == "code":
+            return self.wrap(element, "`")
+        if tag == "a":
+            return self.link(element)
+        if tag == "img":
+            src = element.get("src")
+            if not src:
+                return ""
+            return f"![{element.get('alt', '').strip()}]({src})"
+        if tag == "pre":
+            return f"\n\n```\n{element.text_content().strip(chr(10))}\n```\n\n"
+        if tag == "blockquote":
+            body = _BLANK_LINES.sub("\n\n", self.render_children(element).strip())
+            quoted = "\n".join(f"> {line}" if line else ">" for line in body.split("\n"))
+            return f"\n\n{quoted}\n\n"
+        if tag in ("ul", "ol"):
+            return f"\n\n{self.render_list(element, 0)}\n\n"
+        if tag == "li":
+            # 목록 밖의 li
+            return f"\n* {self.render_children(element).strip()}\n"
+        if tag == "table":
+            return self.render_table(element)
+        return self.render_children(element)
+
+    def inline(self, element):
+        return _WHITESPACE.sub(" ", self.render_children(element)).strip()
+
+    def wrap(self, element, marker):
+        text = self.inline(element)
+        return f"{marker}{text}{marker}" if text else ""
+
+    def link(self, element):
+        text = self.inline(element)
+        href = (element.get("href") or "").strip()
+        if not href or href.startswith(("javascript:", "#")):
+            return text
+        return f"[{text}]({href})"
+
+    def render_list(self, element, depth):
+        ordered = element.tag.lower() == "ol"
+        indent = "  " * depth
+        lines = []
+        number = 1
+        for li in element:
+            if not isinstance(li.tag, str) or li.tag.lower() != "li":
+                continue
+            marker = f"{number}. " if ordered else "* "
+            number += 1
+
+            parts = []
+            if li.text:
+                parts.append(self.text(li.text, parts))
+            nested = []
+            for child in li:
+                if isinstance(child.tag, str) and child.tag.lower() in ("ul", "ol"):
+                    nested.append(self.render_list(child, depth + 1))
+                else:
+                    parts.append(self.render(child))
+                if child.tail:
+                    parts.append(self.text(child.tail, parts))
+
+            body = _BLANK_LINES.sub("\n\n", "".join(parts).strip())
+            body_lines = body.split("\n") if body else [""]
+            lines.append(f"{indent}{marker}{body_lines[0]}")
+            lines.extend(f"{indent}  {line}" if line else "" for line in body_lines[1:])
+            lines.extend(nested)
+        return "\n".join(lines)
+
+    def render_table(self, element):
+        rows = []
+        for tr in element.iter("tr"):
+            # 중첩 테이블의 행은 바깥 셀 내용으로 처리
+            if next(tr.iterancestors("table"), None) is not element:
+                continue
+            cells = []
+            for cell in tr:
+                if not isinstance(cell.tag, str) or cell.tag.lower() not in ("td", "th"):
+                    continue
+                if next(cell.iter("table"), None) is not None:
+                    # 셀 안의 레이아웃 테이블은 텍스트만 사용 (셀끼리 붙지 않게 공백으로 연결)
+                    text = " ".join(cell.itertext())
+                else:
+                    text = self.render_children(cell)
+                text = _WHITESPACE.sub(" ", text).strip().replace("|", "\\|")
+                cells.append(text)
+                try:
+                    colspan = int(cell.get("colspan", 1))
+                except ValueError:
+                    colspan = 1
+                cells.extend([""] * (colspan - 1))
+            if cells:
+                rows.append(cells)
+
+        if not rows:
+            return ""
+        width = max(len(row) for row in rows)
+        lines = []
+        for i, row in enumerate(rows):
+            row = row + [""] * (width - len(row))
+            lines.append("| " + " | ".join(row) + " |")
+            if i == 0:
+                lines.append("|" + "|".join(["---"] * width) + "|")
+        return "\n\n" + "\n".join(lines) + "\n\n"
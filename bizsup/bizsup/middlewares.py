@@ -4,10 +4,13 @@
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
 
+from bizsup.throttle import OVERLOAD_STATUSES, AdaptiveThrottle
+
 
 class BizsupSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -101,3 +104,77 @@ class BizsupDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class RenderingMiddleware:
+    """
+    meta["playwright"] 가 지정되지 않은 요청에 스파이더의 렌더링 판정 적용
+
+    RenderingProbeMixin 을 사용하는 스파이더의 use_playwright 값에 따라
+    요청을 Playwright 또는 기본 HTTP 핸들러로 보낸다.
+    """
+
+    def process_request(self, request, spider):
+        use_playwright = getattr(spider, "use_playwright", None)
+        if use_playwright is not None:
+            request.meta.setdefault("playwright", use_playwright)
+        return None
+
+
+class AdaptiveThrottleMiddleware:
+    """
+    응답 시간과 오류로 호스트별 지연 시간과 동시 요청 수를 조절 (bizsup/throttle.py)
+
+    재시도 미들웨어(550)가 5xx 응답과 타임아웃을 재시도 요청으로 바꾸기 전에 보도록
+    그보다 큰 번호에 둔다. 캐시에서 온 응답과 Playwright 렌더링 시간은 응답 시간에
+    반영하지 않는다. 같은 AdaptiveThrottle 을 spider.throttle 로 AttachmentPipeline 과 공유한다.
+    ADAPTIVE_THROTTLE_ENABLED 설정으로 끈다.
+    """
+
+    def __init__(self, crawler, throttle):
+        self.crawler = crawler
+        self.throttle = throttle
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("ADAPTIVE_THROTTLE_ENABLED", True):
+            raise NotConfigured
+        middleware = cls(crawler, AdaptiveThrottle.from_crawler(crawler))
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        return middleware
+
+    def spider_opened(self, spider):
+        self.throttle.configure(spider)
+        spider.throttle = self.throttle
+
+    def downloader_slot(self, request):
+        key = request.meta.get("download_slot")
+        if key is None:
+            return None, None
+        return key, self.crawler.engine.downloader.slots.get(key)
+
+    def process_request(self, request, spider):
+        # 첨부파일 결과로 바뀐 상태를 다음 페이지 요청 전에 슬롯에 반영 (재시도 요청 등)
+        key, slot = self.downloader_slot(request)
+        if slot is not None:
+            self.throttle.apply(key, slot)
+        return None
+
+    def process_response(self, request, response, spider):
+        key, slot = self.downloader_slot(request)
+        if key is None or "cached" in response.flags:
+            return response
+        latency = None if request.meta.get("playwright") else request.meta.get("download_latency")
+        self.throttle.record(key, latency, ok=response.status not in OVERLOAD_STATUSES)
+        if slot is not None:
+            self.throttle.apply(key, slot)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        key, slot = self.downloader_slot(request)
+        if key is None or isinstance(exception, IgnoreRequest):
+            return None
+        self.throttle.record(key, ok=False)
+        if slot is not None:
+            self.throttle.apply(key, slot)
+        return None
@@ -0,0 +1,96 @@
+# 목록 페이지 페이지네이션
+#
+# 페이지 번호가 URL 파라미터(page=, pageNo=, sfpage= ...)로 정해지는 게시판은
+# 첫 목록 페이지를 받은 시점에 max_pages 까지의 모든 페이지 URL을 알 수 있다.
+# PaginationMixin 은 이 경우 나머지 목록 페이지 요청을 한 번에 생성(fanout)해서
+# 페이지를 하나씩 차례로 따라가는 것보다 목록 수집을 빨리 끝낸다.
+# 요청들은 같은 도메인 다운로드 슬롯을 공유하므로 동시 요청 수와 지연 시간은
+# CONCURRENT_REQUESTS_PER_DOMAIN / DOWNLOAD_DELAY 설정을 그대로 따른다.
+#
+# fanout 은 첫 크롤링(이미 수집한 스레드가 없는 사이트)에서만 쓴다. 이미 수집한 스레드가
+# 있으면 PAGINATION_MODE 가 fanout 이어도 serial 로 바꾸는데,
+#
+# - fanout 은 첫 페이지에서 max_pages 까지 모두 요청하므로 모든 스레드를 이미 수집한
+#   페이지에서 멈출(IncrementalMixin.all_threads_seen) 수 없고
+# - 두 번째 실행부터는 새 스레드가 보통 앞 한두 페이지에만 있어서, 한 페이지씩 따라가다
+#   멈추는 쪽이 요청 수가 훨씬 적기 때문이다.
+#
+# 이미 수집한 사이트도 모든 목록 페이지를 한 번에 다시 보려면 스파이더 인자
+# -a pagination=fanout 으로 직접 고른다 (스파이더 인자는 이 규칙보다 우선).
+
+import scrapy
+from w3lib.url import add_or_replace_parameter
+
+
+class PaginationMixin:
+    """
+    목록 페이지 요청 생성 믹스인
+
+    - 'fanout' (기본값): 첫 목록 페이지에서 max_pages 까지 모든 페이지를 한 번에 요청
+    - 'serial': 스파이더의 get_next_page_url() 로 다음 페이지 하나만 요청
+
+    PAGINATION_MODE 설정이나 스파이더 인자(-a pagination=serial)로 선택한다.
+    page_param 이 없는 스파이더는 항상 serial 로 동작한다.
+    PAGINATION_MODE 가 fanout 이어도 IncrementalMixin 으로 이미 수집한 스레드가 있는
+    사이트는 serial 로 동작해서 모든 스레드가 이미 수집된 페이지에서 페이지네이션을
+    멈출 수 있게 한다 (스파이더 인자로 fanout 을 고르면 그대로 fanout).
+    """
+
+    # 페이지 번호를 담는 URL 파라미터 이름
+    page_param = None
+
+    def get_pagination_mode(self):
+        if not self.page_param:
+            return 'serial'
+        # 스파이더 인자로 고른 방식은 그대로 사용
+        mode = getattr(self, 'pagination', None)
+        if mode:
+            return mode
+        mode = self.settings.get('PAGINATION_MODE', 'fanout')
+        if mode == 'fanout' and getattr(self, 'known_thread_count', 0):
+            return 'serial'
+        return mode
+
+    def get_page_url(self, url, page):
+        """
+        URL의 page_param 값을 page 로 바꾼 URL
+        """
+        return add_or_replace_parameter(url, self.page_param, str(page))
+
+    def list_page_requests(self, response, callback=None, meta=None, stop=False):
+        """
+        현재 목록 페이지 다음에 가져올 목록 페이지 요청 생성
+
+        stop 이 참이면 (현재 페이지의 스레드가 모두 이미 수집한 것이면) 더 요청하지 않는다.
+        """
+        callback = callback or self.parse
+        current_page = self.get_current_page(response.url)
+
+        if stop:
+            self.logger.info(f"All threads on page {current_page} already seen, stopping pagination")
+            return
+
+        if self.get_pagination_mode() == 'fanout':
+            # fanout 으로 생성된 페이지에서는 다시 요청을 만들지 않음
+            if response.meta.get('page_fanout'):
+                return
+            pages = range(current_page + 1, self.max_pages + 1)
+            if pages:
+                self.logger.info(f"Fanning out list pages {current_page + 1}-{self.max_pages}")
+            for page in pages:
+                yield scrapy.Request(
+                    url=self.get_page_url(response.url, page),
+                    callback=callback,
+                    meta={**(meta or {}), 'page_fanout': True}
+                )
+            return
+
+        if current_page < self.max_pages:
+            next_page_url = self.get_next_page_url(response, current_page)
+            if next_page_url:
+                self.logger.info(f"Following next page: {next_page_url}")
+                yield scrapy.Request(url=next_page_url, callback=callback, meta=dict(meta or {}))
+            else:
+                self.logger.warning(f"Could not find next page URL for page {current_page}")
+        else:
+            self.logger.info(f"Completed all {self.max_pages} pages")
@@ -4,10 +4,287 @@
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
 
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
+from scrapy.exceptions import DropItem
+
+from bizsup.attachments import AttachmentServerError, BlobStore, download_attachment
+from bizsup.incremental import AttachmentValidatorStore
+from bizsup.markdown import markdown_document, write_markdown_files
+from bizsup.replay import record_attachment, replay_request_url
 
 
 class BizsupPipeline:
     def process_item(self, item, spider):
         return item
+
+
+class MarkdownWriterPipeline:
+    """
+    아이템의 markdown 필드(본문)를 markdown_path 에 Markdown 파일로 쓰는 파이프라인
+
+    콜백은 파싱만 하고 파일 쓰기는 여기서 한다. 머리말은 아이템의 title, url, author, date
+    필드로 만든다 (markdown_document). 쓴 뒤에는 아이템에서 markdown 필드를 뺀다.
+
+    파일은 MARKDOWN_BATCH_SIZE 개씩 모아 전용 스레드 풀(MARKDOWN_WRITER_THREADS)에서 한 번에
+    쓴다. 배치가 덜 찼어도 MARKDOWN_FLUSH_INTERVAL 초가 지나면 쓴다. 여러 응답의 아이템이
+    동시에 처리되므로 아이템마다 기다려도 배치가 찬다. 쓰는 중인 배치가 스레드 수의 두 배를
+    넘으면 가장 오래된 배치가 끝날 때까지 기다려 메모리에 쌓이는 본문을 제한한다.
+
+    아이템은 자기 파일이 들어 있는 배치를 다 쓴 뒤에 다음 파이프라인으로 넘긴다. 파일을
+    쓰지 못하면 DropItem 으로 버려서, item_scraped 에서 스레드를 수집한 것으로 기록하는
+    IncrementalMixin 이 다음 실행에서 그 스레드를 건너뛰지 않게 한다.
+    파일은 임시 파일에 쓴 뒤 원자적으로 교체한다. 결과는 markdown/* 통계에 기록한다.
+    """
+
+    def __init__(self, threads=2, batch_size=32, flush_interval=1.0, stats=None):
+        self.threads = threads
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = stats
+        self.executor = None
+        self.pending = []  # 아직 넘기지 않은 [(경로, 내용)]
+        self.pending_flushed = None  # pending 을 넘기면 스레드 풀 future 로 완료되는 asyncio future
+        self.batches = deque()  # 쓰는 중인 [(future, 파일 수)] (넘긴 순서)
+        self.flush_timer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            threads=crawler.settings.getint("MARKDOWN_WRITER_THREADS", 2),
+            batch_size=crawler.settings.getint("MARKDOWN_BATCH_SIZE", 32),
+            flush_interval=crawler.settings.getfloat("MARKDOWN_FLUSH_INTERVAL", 1.0),
+            stats=crawler.stats,
+        )
+
+    def open_spider(self, spider):
+        self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="markdown")
+
+    def close_spider(self, spider):
+        # 남은 파일을 넘기고 모두 쓸 때까지 대기
+        self.flush(spider)
+        self.executor.shutdown(wait=True)
+        self.collect(spider, wait=True)
+
+    def flush(self, spider):
+        """
+        모아 둔 파일을 배치 하나로 스레드 풀에 넘김
+        """
+        if self.flush_timer is not None:
+            self.flush_timer.cancel()
+            self.flush_timer = None
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        future = self.executor.submit(write_markdown_files, batch)
+        self.batches.append((future, len(batch)))
+        if self.pending_flushed is not None:
+            self.pending_flushed.set_result(future)
+            self.pending_flushed = None
+        self.collect(spider)
+
+    def collect(self, spider, wait=False):
+        """
+        끝난 배치의 결과를 통계와 로그에 기록 (wait 이면 모두 끝날 때까지)
+        """
+        while self.batches and (wait or self.batches[0][0].done()):
+            future, count = self.batches.popleft()
+            written, errors = future.result()
+            for path, error in errors:
+                spider.logger.error(f"Error writing Markdown {path}: {error}")
+            self.stats.inc_value("markdown/batches")
+            self.stats.inc_value("markdown/files", count - len(errors))
+            self.stats.inc_value("markdown/bytes", written)
+            if errors:
+                self.stats.inc_value("markdown/errors", len(errors))
+            spider.logger.debug(f"Saved {count - len(errors)} Markdown files")
+
+    async def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        body = adapter.pop('markdown', None)
+        path = adapter.get('markdown_path')
+        if body is None or not path:
+            return item
+
+        if self.pending_flushed is None:
+            self.pending_flushed = asyncio.get_running_loop().create_future()
+        flushed = self.pending_flushed
+        self.pending.append((path, markdown_document(
+            adapter.get('title'), adapter.get('url'), body, adapter.get('author'), adapter.get('date')
+        )))
+        if len(self.pending) >= self.batch_size:
+            self.flush(spider)
+        elif self.flush_timer is None:
+            self.flush_timer = asyncio.get_running_loop().call_later(self.flush_interval, self.flush, spider)
+
+        # 쓰기가 밀리면 가장 오래된 배치가 끝날 때까지 대기
+        while len(self.batches) > self.threads * 2:
+            await asyncio.wrap_future(self.batches[0][0])
+            self.collect(spider)
+
+        # 이 아이템의 파일이 들어 있는 배치를 다 쓸 때까지 대기
+        written, errors = await asyncio.wrap_future(await flushed)
+        self.collect(spider)
+        for failed_path, error in errors:
+            if failed_path == path:
+                raise DropItem(f"Markdown not written: {path} ({error})")
+        return item
+
+
+class AttachmentPipeline:
+    """
+    아이템의 attachments 필드에 담긴 첨부파일을 다운로드하는 파이프라인
+
+    다운로드는 리액터 스레드가 아닌 전용 스레드 풀에서 수행하므로 큰 첨부파일을
+    받는 동안에도 목록/상세 페이지 크롤링이 멈추지 않는다.
+    동시 다운로드 수는 ATTACHMENT_CONCURRENCY 설정으로 제한한다.
+
+    ATTACHMENT_VALIDATORS_DB 가 설정되어 있으면 첨부파일의 ETag/Last-Modified 를
+    기록해 두고 다음 크롤링에서 조건부 요청을 보내, 바뀌지 않은 파일(304)은
+    다시 쓰지 않는다. 결과는 revalidation/attachments/* 통계에 기록한다.
+
+    ATTACHMENT_BLOB_DIR 이 설정되어 있으면 본문은 사이트와 관계없이 내용 해시로
+    한 번만 저장하고 스레드 디렉토리에는 하드링크를 만든다 (BlobStore 참고).
+    중복 제거 결과는 attachments/dedup/* 통계에 기록한다.
+
+    AdaptiveThrottleMiddleware 가 켜져 있으면(spider.throttle) 첨부파일 요청도 같은
+    호스트의 지연 시간과 동시 요청 수를 따르고, 응답 시간과 서버 오류를 그 상태에 기록한다.
+
+    FIXTURE_REPLAY_URL 이 있으면 첨부파일도 재생 서버에서 받고, FIXTURE_RECORD_DIR 로
+    기록 중이면 받은 첨부파일을 응답 헤더와 함께 기록한다 (bizsup/replay.py).
+
+    스파이더 속성으로 사이트별 동작을 조정할 수 있다.
+    - attachment_filename_decoding: 서버 파일명 디코딩 방식 ('unquote' 또는 'latin1')
+    - attachment_default_extension: 확장자를 추측하지 못했을 때 붙일 확장자
+    """
+
+    def __init__(self, concurrency=4, validators_db=None, blob_dir=None, stats=None, replay_url=None):
+        self.concurrency = concurrency
+        self.replay_url = replay_url
+        self.validators_db = validators_db
+        self.blob_dir = blob_dir
+        self.stats = stats
+        self.executor = None
+        self.validator_store = None
+        self.blob_store = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            concurrency=crawler.settings.getint("ATTACHMENT_CONCURRENCY", 4),
+            validators_db=crawler.settings.get("ATTACHMENT_VALIDATORS_DB"),
+            blob_dir=crawler.settings.get("ATTACHMENT_BLOB_DIR"),
+            stats=crawler.stats,
+            replay_url=crawler.settings.get("FIXTURE_REPLAY_URL"),
+        )
+
+    def open_spider(self, spider):
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="attachments"
+        )
+        if self.validators_db:
+            self.validator_store = AttachmentValidatorStore(self.validators_db)
+        if self.blob_dir:
+            self.blob_store = BlobStore(self.blob_dir)
+
+    def close_spider(self, spider):
+        # 진행 중인 다운로드가 끝날 때까지 대기
+        self.executor.shutdown(wait=True)
+        if self.validator_store is not None:
+            self.validator_store.close()
+
+    def get_validators(self, url):
+        if self.validator_store is None:
+            return None
+        return self.validator_store.get(url)
+
+    def record_result(self, spec, result):
+        """
+        다운로드 결과의 검증자 저장과 재검증/중복 제거 통계 기록 (리액터 스레드에서 호출)
+        """
+        if result['dedup']:
+            self.stats.inc_value(f"attachments/dedup/{result['dedup']}")
+            if result['dedup'] != 'stored':
+                self.stats.inc_value("attachments/dedup/bytes_saved", result['size'])
+        if self.validator_store is None:
+            return
+        status = result['status']
+        if status == 'miss':
+            self.stats.inc_value("revalidation/attachments/miss")
+        else:
+            self.stats.inc_value("revalidation/attachments/revalidated")
+            if status == 'not_modified':
+                self.stats.inc_value("revalidation/attachments/hit")
+        if result['etag'] or result['last_modified']:
+            self.validator_store.set(spec['url'], result['etag'], result['last_modified'], result['path'])
+
+    async def download(self, spec, target_dir, decoding, default_extension, spider):
+        """
+        스레드 풀에서 첨부파일 하나 다운로드 (spider.throttle 이 있으면 호스트 속도 조절을 따름)
+        """
+        loop = asyncio.get_running_loop()
+        fetch_spec = spec
+        if self.replay_url:
+            # 재생 서버에서 받기 (bizsup/replay.py)
+            url, headers = replay_request_url(spec['url'], self.replay_url)
+            fetch_spec = {**spec, 'url': url, 'headers': headers}
+        call = (
+            self.executor, download_attachment, fetch_spec, target_dir, decoding, default_extension,
+            self.get_validators(spec['url']), self.blob_store,
+        )
+
+        throttle = getattr(spider, 'throttle', None)
+        if throttle is None:
+            result = await loop.run_in_executor(*call)
+        else:
+            host = urlparse(spec['url']).hostname or ''
+            slots = spider.crawler.engine.downloader.slots
+            async with throttle.attachment_slot(host, slots.get(host)):
+                try:
+                    result = await loop.run_in_executor(*call)
+                except AttachmentServerError:
+                    throttle.record(host, ok=False)
+                    raise
+            if result is not None:
+                throttle.record(host, result['latency'])
+            slot = slots.get(host)
+            if slot is not None:
+                throttle.apply(host, slot)
+
+        # FIXTURE_RECORD_DIR 로 기록 중이면 첨부파일도 기록
+        store = getattr(spider, 'fixture_store', None)
+        if store is not None and result is not None and result['status'] != 'not_modified':
+            await loop.run_in_executor(self.executor, record_attachment, store, spec['url'], result)
+        return result
+
+    async def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        attachments = adapter.get('attachments')
+        if not attachments:
+            return item
+
+        target_dir = adapter.get('attachment_dir')
+        decoding = getattr(spider, 'attachment_filename_decoding', 'unquote')
+        default_extension = getattr(spider, 'attachment_default_extension', '')
+
+        results = await asyncio.gather(
+            *[self.download(spec, target_dir, decoding, default_extension, spider) for spec in attachments],
+            return_exceptions=True,
+        )
+
+        saved = []
+        for spec, result in zip(attachments, results):
+            if isinstance(result, Exception):
+                spider.logger.error(f"Error downloading attachment {spec['url']}: {str(result)}")
+            elif result is not None:
+                self.record_result(spec, result)
+                saved.append(str(result['path']))
+
+        # 피드에는 첨부파일 요청 정보 대신 저장된 파일 경로만 남긴다
+        adapter['attachments'] = saved
+        return item
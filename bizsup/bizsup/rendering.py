@@ -0,0 +1,250 @@
+# 페이지 렌더링 방식 선택
+#
+# Playwright 다운로드 핸들러와 scrapy_browser 미들웨어(리소스 차단, 페이지 풀)는
+# 프로젝트 전체가 아니라 브라우저 렌더링이 필요한 스파이더에서만 등록한다.
+# 그래서 정적 사이트 스파이더는 scrapy_playwright, scrapy_browser 없이도 실행된다.
+# 핸들러가 등록된 스파이더에서도
+# meta["playwright"] 가 없는 요청은 기본 HTTP/1.1 핸들러로 처리되므로,
+# 정적 페이지는 브라우저를 거치지 않는다.
+#
+# RenderingProbeMixin 을 사용하는 스파이더는 사이트가 JavaScript 렌더링을
+# 필요로 하는지 첫 크롤링에서 직접 판정하고 그 결과를 파일에 저장해 둔다.
+
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import scrapy
+
+
+PLAYWRIGHT_DOWNLOAD_HANDLERS = {
+    "http": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
+    "https": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
+}
+
+# Playwright 로 렌더링하는 스파이더에 추가할 scrapy_browser 미들웨어
+PLAYWRIGHT_MIDDLEWARES = {
+    "DOWNLOADER_MIDDLEWARES": {
+        "scrapy_browser.middlewares.ResourceBlockingMiddleware": 544,
+        "scrapy_browser.middlewares.PagePoolMiddleware": 950,
+    },
+    "SPIDER_MIDDLEWARES": {
+        # 콜백에 넘긴 Playwright 페이지를 콜백이 끝나면 반환
+        "scrapy_browser.middlewares.PageLifecycleMiddleware": 10,
+    },
+}
+
+
+def use_playwright_settings(settings):
+    """
+    스파이더의 update_settings() 에서 Playwright 핸들러와 scrapy_browser 미들웨어 등록
+
+    custom_settings 의 DOWNLOADER_MIDDLEWARES 는 프로젝트 설정을 통째로 덮어쓰므로
+    프로젝트 설정의 미들웨어에 합쳐서 등록한다.
+    """
+    settings.set("DOWNLOAD_HANDLERS", PLAYWRIGHT_DOWNLOAD_HANDLERS, priority="spider")
+    for name, components in PLAYWRIGHT_MIDDLEWARES.items():
+        merged = settings.getdict(name)
+        merged.update(components)
+        settings.set(name, merged, priority="spider")
+
+
+class RenderingVerdictStore:
+    """
+    사이트별 렌더링 판정(정적/동적)을 저장하는 작은 JSON 파일 저장소
+
+    {"btp": {"needs_js": false, "raw_links": 10, "rendered_links": 10,
+             "checked_at": "2025-04-08T10:00:00"}, ...}
+    """
+
+    def __init__(self, path, max_age_days=0):
+        self.path = Path(path)
+        self.max_age_days = max_age_days
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            settings.get("RENDERING_VERDICTS_FILE", "rendering_verdicts.json"),
+            settings.getint("RENDERING_VERDICT_MAX_AGE_DAYS", 0),
+        )
+
+    def load(self):
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self, verdicts):
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(verdicts, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, site):
+        """
+        저장된 판정 반환 (없거나 max_age_days 가 지났으면 None)
+        """
+        verdict = self.load().get(site)
+        if verdict is None:
+            return None
+        if self.max_age_days > 0:
+            checked_at = datetime.fromisoformat(verdict["checked_at"])
+            if datetime.now() - checked_at > timedelta(days=self.max_age_days):
+                return None
+        return verdict
+
+    def set(self, site, needs_js, raw_links, rendered_links):
+        verdicts = self.load()
+        verdicts[site] = {
+            "needs_js": needs_js,
+            "raw_links": raw_links,
+            "rendered_links": rendered_links,
+            "checked_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self.save(verdicts)
+
+    def forget(self, site):
+        verdicts = self.load()
+        if verdicts.pop(site, None) is not None:
+            self.save(verdicts)
+
+
+class RenderingProbeMixin:
+    """
+    사이트의 JavaScript 렌더링 필요 여부를 자동으로 판정하는 스파이더 믹스인
+
+    저장된 판정이 없으면 첫 시작 URL을 원본(HTTP)과 Playwright 렌더링 두 방식으로
+    가져와 thread_link_selector 로 추출되는 스레드 링크 수를 비교한다.
+    렌더링했을 때 링크가 더 많이 나오면 JavaScript 가 필요한 사이트로 판정한다.
+    판정은 RenderingVerdictStore 에 저장되어 다음 실행부터는 바로 해당 방식으로
+    크롤링하며, 요청의 meta["playwright"] 는 RenderingMiddleware 가 채운다.
+
+    정적 사이트로 판정된 사이트의 목록 페이지에서 링크가 하나도 나오지 않으면
+    클라이언트 렌더링으로 바뀐 것으로 보고 판정을 지워 다음 실행에서 다시 판정한다.
+
+    fixed_rendering 이 'static' 또는 'browser' 인 스파이더는 판정하지 않고 그 방식으로
+    크롤링한다.
+    """
+
+    # 목록 페이지에서 스레드 링크를 가리키는 CSS 선택자 (판정에 사용)
+    thread_link_selector = None
+    # 렌더링 방식 고정 ('static', 'browser' - None 이면 판정)
+    fixed_rendering = None
+
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        # 판정 전이거나 JavaScript 가 필요한 사이트만 Playwright 핸들러/미들웨어 등록
+        if cls.fixed_rendering is not None:
+            needs_js = cls.fixed_rendering == "browser"
+        else:
+            verdict = RenderingVerdictStore.from_settings(settings).get(cls.name)
+            needs_js = verdict is None or verdict["needs_js"]
+        if needs_js:
+            use_playwright_settings(settings)
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.rendering_store = RenderingVerdictStore.from_settings(crawler.settings)
+        if cls.fixed_rendering is not None:
+            spider.use_playwright = cls.fixed_rendering == "browser"
+        else:
+            verdict = spider.rendering_store.get(spider.name)
+            # None 이면 아직 판정 전 (start_requests 에서 판정)
+            spider.use_playwright = None if verdict is None else verdict["needs_js"]
+        spider.probe_responses = {}
+        return spider
+
+    async def start(self):
+        # Scrapy 2.13 이상은 start() 를 사용하므로 start_requests() 로 위임
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        if self.fixed_rendering is not None:
+            for url in self.start_urls:
+                yield scrapy.Request(url, callback=self.parse, dont_filter=True)
+            return
+        if self.use_playwright is not None:
+            self.logger.info(f"렌더링 판정 사용: {'Playwright' if self.use_playwright else 'HTTP'}")
+            for url in self.start_urls:
+                yield scrapy.Request(url, callback=self.parse_checked, dont_filter=True)
+            return
+
+        # 판정 전: 첫 시작 URL을 두 방식으로 가져와 비교
+        url = self.start_urls[0]
+        self.logger.info(f"렌더링 판정 시작: {url}")
+        for mode in ("raw", "rendered"):
+            yield scrapy.Request(
+                url,
+                callback=self.parse_rendering_probe,
+                errback=self.rendering_probe_failed,
+                dont_filter=True,
+                meta={"playwright": mode == "rendered", "rendering_probe": mode},
+            )
+        for url in self.start_urls[1:]:
+            yield scrapy.Request(url, dont_filter=True)
+
+    def count_thread_links(self, response):
+        """
+        목록 페이지에서 thread_link_selector 로 찾은 스레드 링크 수
+        """
+        if response is None:
+            return 0
+        return len(response.css(self.thread_link_selector))
+
+    def parse_rendering_probe(self, response):
+        self.probe_responses[response.meta["rendering_probe"]] = response
+        yield from self.finish_rendering_probe()
+
+    def rendering_probe_failed(self, failure):
+        mode = failure.request.meta["rendering_probe"]
+        self.logger.warning(f"렌더링 판정 요청 실패 ({mode}): {failure.value}")
+        self.probe_responses[mode] = None
+        yield from self.finish_rendering_probe()
+
+    def finish_rendering_probe(self):
+        """
+        두 판정 요청이 모두 끝나면 판정을 저장하고 선택한 응답으로 크롤링 계속
+        """
+        if len(self.probe_responses) < 2:
+            return
+
+        raw = self.probe_responses.pop("raw")
+        rendered = self.probe_responses.pop("rendered")
+        raw_links = self.count_thread_links(raw)
+        rendered_links = self.count_thread_links(rendered)
+        self.logger.info(f"렌더링 판정: HTTP {raw_links}개, Playwright {rendered_links}개 링크")
+
+        if raw is None or rendered is None:
+            # 한쪽이 실패하면 판정을 저장하지 않고 성공한 응답으로 진행
+            self.use_playwright = raw is None
+            response = rendered if raw is None else raw
+            if response is None:
+                self.logger.error("렌더링 판정 요청이 모두 실패했습니다")
+                return
+        else:
+            self.use_playwright = rendered_links > raw_links
+            self.rendering_store.set(self.name, self.use_playwright, raw_links, rendered_links)
+            response = rendered if self.use_playwright else raw
+
+        self.crawler.stats.set_value("rendering/needs_js", self.use_playwright)
+        self.logger.info(f"렌더링 판정 결과: {'Playwright 필요' if self.use_playwright else '정적 페이지'}")
+        yield from self.parse(response)
+
+    def parse_checked(self, response):
+        """
+        저장된 판정으로 가져온 시작 페이지 처리 - 정적 판정이 여전히 맞는지 확인
+        """
+        if not self.use_playwright and self.count_thread_links(response) == 0:
+            self.logger.warning(
+                "정적 사이트로 판정되었지만 스레드 링크가 없습니다. "
+                "클라이언트 렌더링으로 바뀌었을 수 있어 다음 실행에서 다시 판정합니다"
+            )
+            self.rendering_store.forget(self.name)
+        yield from self.parse(response)
@@ -0,0 +1,287 @@
+# 응답 기록(fixture)과 로컬 재생 서버 (게시판 대역 서버)
+#
+# FIXTURE_RECORD_DIR 설정을 주고 크롤링하면 FixtureRecorderMiddleware 가 받은 목록/상세
+# 페이지를, AttachmentPipeline 이 받은 첨부파일을 그 디렉토리에 파일로 저장하고
+# index.json 에 (method, host+path, 요청 본문 해시) 와 응답 헤더를 기록한다.
+#
+# 기록한 디렉토리를 replay 서버로 띄우고 FIXTURE_REPLAY_URL 을 주면, ReplayDownloadHandler 와
+# AttachmentPipeline 이 실제 사이트로 가는 요청을 로컬 서버로 보내고(원래 호스트는
+# X-Replay-Host 헤더로 전달) 응답 URL 은 원래 URL 로 되돌리므로 스파이더 코드는 그대로
+# 네트워크 없이 실행된다.
+# 서버는 응답마다 지연 시간과 대역폭 제한을 넣을 수 있다.
+#
+#   scrapy crawl btp -s FIXTURE_RECORD_DIR=fixtures/btp
+#   python -m bizsup.replay fixtures/btp --port 8800 --latency 200 --bandwidth 512
+#   python -m bizsup.bench fixtures/btp btp          # 재생 서버를 띄우고 벤치마크 (bizsup/bench.py)
+#
+# Playwright 로 렌더링한 페이지는 렌더링 결과 HTML 을 기록하고, 재생할 때는 브라우저 없이
+# 그 HTML 을 돌려준다. 페이지를 직접 조작하는 스파이더(egbiz 의 '더보기' 클릭)는
+# 첫 렌더링 결과까지만 재생된다.
+
+import argparse
+import hashlib
+import json
+import mimetypes
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from scrapy import signals
+from scrapy.core.downloader.handlers.http11 import HTTP11DownloadHandler
+from scrapy.exceptions import NotConfigured
+
+from bizsup.attachments import RECORD_HEADERS
+
+
+INDEX_FILE = "index.json"
+REPLAY_HOST_HEADER = "X-Replay-Host"
+# 대역폭 제한을 적용할 때 한 번에 쓰는 크기
+WRITE_CHUNK = 16 * 1024
+
+
+def request_key(method, host, path, body):
+    """
+    기록과 재생에서 같은 요청을 찾는 키
+    """
+    return f"{method.upper()} {host}{path} {hashlib.sha1(body or b'').hexdigest()}"
+
+
+def url_path(url):
+    parts = urlsplit(url)
+    return f"{parts.path or '/'}{'?' + parts.query if parts.query else ''}"
+
+
+def url_host(url):
+    return (urlsplit(url).hostname or "").lower()
+
+
+class FixtureStore:
+    """
+    기록한 응답 디렉토리 (index.json + 응답 본문 파일)
+
+    페이지와 첨부파일 다운로드 스레드에서 함께 기록하므로 add() 는 잠금 안에서 실행한다.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        self.lock = threading.Lock()
+        index_path = self.path / INDEX_FILE
+        if index_path.exists():
+            with open(index_path, encoding="utf-8") as f:
+                for entry in json.load(f):
+                    self.entries[entry["key"]] = entry
+
+    def add(self, method, url, request_body, status, headers, body):
+        key = request_key(method, url_host(url), url_path(url), request_body)
+        content_type = headers.get("Content-Type")
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                extension = mimetypes.guess_extension((content_type or "").split(";")[0].strip()) or ".bin"
+                entry = {"key": key, "file": f"{len(self.entries) + 1:05d}{extension}"}
+                self.entries[key] = entry
+            entry.update({"url": url, "status": status, "headers": headers})
+            self.path.mkdir(parents=True, exist_ok=True)
+            (self.path / entry["file"]).write_bytes(body)
+
+    def find(self, method, host, path, body):
+        return self.entries.get(request_key(method, host, path, body))
+
+    def read(self, entry):
+        return (self.path / entry["file"]).read_bytes()
+
+    def save(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / INDEX_FILE, "w", encoding="utf-8") as f:
+            json.dump(list(self.entries.values()), f, ensure_ascii=False, indent=2)
+
+    def hosts(self):
+        return {url_host(entry["url"]) for entry in self.entries.values()}
+
+
+def require_fixtures(path):
+    """
+    기록한 응답이 있는 FixtureStore (비어 있거나 없으면 기록 방법을 알려 주고 종료)
+    """
+    store = FixtureStore(path)
+    if not store.entries:
+        raise SystemExit(
+            f"No recorded responses in {path} (missing or empty {INDEX_FILE}).\n"
+            f"Record them first where the sites are reachable, e.g.:\n"
+            f"  scrapy crawl <spider> -s FIXTURE_RECORD_DIR={path}"
+        )
+    return store
+
+
+class FixtureRecorderMiddleware:
+    """
+    받은 응답을 FIXTURE_RECORD_DIR 에 기록하는 다운로더 미들웨어
+
+    압축 해제가 끝난 본문을 기록하도록 HttpCompressionMiddleware(590) 보다 작은 번호에 둔다.
+    spider.fixture_store 로 AttachmentPipeline 과 저장소를 공유한다.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get("FIXTURE_RECORD_DIR")
+        if not path:
+            raise NotConfigured
+        middleware = cls(FixtureStore(path))
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def spider_opened(self, spider):
+        spider.fixture_store = self.store
+
+    def process_response(self, request, response, spider):
+        if "cached" in response.flags:
+            return response
+        headers = {}
+        for name in RECORD_HEADERS:
+            value = response.headers.get(name)
+            if value:
+                headers[name] = value.decode("latin-1")
+        self.store.add(request.method, request.url, request.body, response.status, headers, response.body)
+        return response
+
+    def spider_closed(self, spider):
+        self.store.save()
+        spider.logger.info(f"Recorded {len(self.store.entries)} responses to {self.store.path}")
+
+
+def record_attachment(store, url, result):
+    """
+    download_attachment() 로 저장한 첨부파일을 기록 (다운로드 스레드에서 호출)
+    """
+    store.add("GET", url, b"", 200, result["headers"], Path(result["path"]).read_bytes())
+
+
+def replay_request_url(url, replay_url):
+    """
+    실제 URL 을 재생 서버 URL 로 바꾸고 원래 호스트를 담을 헤더와 함께 반환
+    """
+    return replay_url.rstrip("/") + url_path(url), {REPLAY_HOST_HEADER: url_host(url)}
+
+
+class ReplayDownloadHandler(HTTP11DownloadHandler):
+    """
+    FIXTURE_REPLAY_URL 의 재생 서버에서 응답을 받는 다운로드 핸들러
+
+    요청 URL 을 재생 서버 주소로 바꿔 보내고(원래 호스트는 X-Replay-Host 헤더),
+    응답 URL 은 원래 URL 로 되돌린다. 미들웨어와 스파이더는 원래 URL 만 보므로
+    허용 도메인, 다운로드 슬롯, 상대 링크 처리가 실제 크롤링과 같다.
+    DOWNLOAD_HANDLERS 의 http/https 에 cmdline 우선순위로 등록해서 스파이더가
+    등록한 Playwright 핸들러를 대신한다 (재생할 때는 브라우저를 쓰지 않음).
+    """
+
+    def __init__(self, crawler):
+        self.replay_url = crawler.settings.get("FIXTURE_REPLAY_URL")
+        if not self.replay_url:
+            raise NotConfigured
+        super().__init__(crawler)
+
+    async def download_request(self, request):
+        url, headers = replay_request_url(request.url, self.replay_url)
+        replayed = request.replace(url=url)
+        replayed.headers.update(headers)
+        response = await super().download_request(replayed)
+        return response.replace(url=request.url)
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    store = None
+    latency = 0.0  # 응답마다 더할 지연 시간 (초)
+    bandwidth = 0  # 초당 바이트 (0 이면 제한 없음)
+
+    def replay(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        host = (self.headers.get(REPLAY_HOST_HEADER) or "").lower()
+        entry = self.store.find(self.command, host, self.path, body)
+        if entry is None:
+            self.send_error(404, "No recorded response")
+            return
+        if self.latency:
+            time.sleep(self.latency)
+        content = self.store.read(entry)
+        self.send_response(entry["status"])
+        for name, value in (entry.get("headers") or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.write_body(content)
+
+    def write_body(self, content):
+        if not self.bandwidth:
+            self.wfile.write(content)
+            return
+        for start in range(0, len(content), WRITE_CHUNK):
+            chunk = content[start:start + WRITE_CHUNK]
+            self.wfile.write(chunk)
+            time.sleep(len(chunk) / self.bandwidth)
+
+    # 하위 클래스(bizsup/loadgen.py)가 replay() 만 바꿔도 되도록 메서드를 거쳐 호출
+    def do_GET(self):
+        self.replay()
+
+    do_POST = do_GET
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(path, host="127.0.0.1", port=0, latency_ms=0, bandwidth_kb=0):
+    handler = type("FixtureReplayHandler", (ReplayHandler,), {
+        "store": FixtureStore(path),
+        "latency": latency_ms / 1000,
+        "bandwidth": bandwidth_kb * 1024,
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def start_server(server):
+    """
+    서버를 백그라운드 스레드로 시작 (server.server_address 로 주소 확인, server.shutdown() 으로 종료)
+    """
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve(path, host="127.0.0.1", port=0, latency_ms=0, bandwidth_kb=0):
+    """
+    기록한 디렉토리를 재생하는 서버를 백그라운드 스레드로 시작
+    """
+    return start_server(make_server(path, host, port, latency_ms, bandwidth_kb))
+
+
+def add_server_arguments(parser):
+    parser.add_argument("--latency", type=int, default=0, help="응답마다 더할 지연 시간 (ms)")
+    parser.add_argument("--bandwidth", type=int, default=0, help="연결마다 대역폭 제한 (KB/s, 0 이면 제한 없음)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기록한 응답을 재생하는 로컬 게시판 대역 서버")
+    parser.add_argument("path", help="FIXTURE_RECORD_DIR 로 기록한 디렉토리")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    require_fixtures(args.path)
+    server = make_server(args.path, args.host, args.port, args.latency, args.bandwidth)
+    print(f"Replaying {len(server.RequestHandlerClass.store.entries)} responses from {args.path} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
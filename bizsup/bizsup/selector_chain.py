@@ -0,0 +1,159 @@
+# 선택자 대체 목록(fallback chain) 학습
+#
+# 게시판마다 제목/본문/목록 링크를 찾기 위해 여러 CSS 선택자를 우선순위 순서로
+# 시도하는데, 한 사이트에서는 보통 같은 선택자가 계속 맞는다. SelectorChainMixin 은
+# 사이트와 필드별로 맞은 선택자(winner)를 파일에 기록해 두고 다음 페이지와 다음
+# 실행에서 그 선택자만 먼저 평가한다.
+#
+# 목록 뒤쪽의 선택자는 대개 넓은 대체 선택자(div.board_list a 등)라서, 한 번 맞았다고
+# 계속 먼저 쓰면 더 구체적인 선택자가 다시 맞아도 알 수 없다. 그래서
+#
+# - winner 는 우선순위 순서로 평가해서 앞의 선택자가 모두 맞지 않았을 때만 기록하고
+# - SELECTOR_RECHECK_INTERVAL 번마다, 또는 winner 결과 개수가 크게 바뀌면
+#   우선순위 순서로 다시 평가해서 앞의 선택자가 맞으면 winner 를 바꾼다.
+
+import json
+import os
+from pathlib import Path
+
+from scrapy import signals
+from scrapy.selector import SelectorList
+
+
+# winner 결과 개수가 처음 본 개수의 이 배수 이상 늘거나 줄면 우선순위 순서로 다시 평가
+COUNT_CHANGE_FACTOR = 2
+
+class SelectorWinnerStore:
+    """
+    사이트/필드별로 맞은 선택자를 저장하는 작은 JSON 파일 저장소
+
+    {"jbtp": {"title": ".board_view .t_tit::text", "content": ".view_cont"}, ...}
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings.get("SELECTOR_WINNERS_FILE", "selector_winners.json"))
+
+    def load(self):
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self, winners):
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(winners, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, site):
+        return dict(self.load().get(site, {}))
+
+    def set(self, site, site_winners):
+        winners = self.load()
+        winners[site] = site_winners
+        self.save(winners)
+
+
+class SelectorChainMixin:
+    """
+    맞은 선택자(winner)를 먼저 평가하는 선택자 대체 목록 믹스인
+
+    select_first(response, field, selectors) 는 구조가 바뀌지 않은 사이트에서는
+    페이지마다 winner 하나만 평가한다. selectors 는 우선순위 순서(구체적인 것부터)다.
+    결과는 selectors/{hit,recheck,learned,drift,miss} 통계에 기록한다.
+    바뀐 winner 는 스파이더가 끝날 때 SELECTOR_WINNERS_FILE 에 저장한다.
+    """
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.selector_store = SelectorWinnerStore.from_settings(crawler.settings)
+        spider.selector_winners = spider.selector_store.get(spider.name)
+        spider.selector_winners_changed = False
+        spider.selector_recheck_interval = crawler.settings.getint("SELECTOR_RECHECK_INTERVAL", 20)
+        spider.selector_uses = {}
+        spider.selector_counts = {}
+        crawler.signals.connect(spider.save_selector_winners, signal=signals.spider_closed)
+        return spider
+
+    def select_first(self, response, field, selectors, check=None):
+        """
+        selectors 중 우선순위가 가장 높은 맞는 선택자의 결과 (SelectorList)
+
+        check 가 있으면 결과가 비어 있지 않은 것에 더해 check(result) 도 참이어야 맞은 것으로 본다.
+        맞는 선택자가 없으면 빈 SelectorList 를 반환한다.
+        """
+        def matches(result):
+            return bool(result) and (check is None or check(result))
+
+        winner = self.selector_winners.get(field)
+        winner_result = None
+        if winner in selectors and not self.selector_recheck_due(field):
+            winner_result = response.css(winner)
+            if matches(winner_result) and not self.selector_count_changed(field, len(winner_result)):
+                self.crawler.stats.inc_value("selectors/hit")
+                return winner_result
+
+        # winner 가 없거나 맞지 않거나 다시 확인할 때: 우선순위 순서로 평가
+        for selector in selectors:
+            result = winner_result if selector == winner and winner_result is not None else response.css(selector)
+            if matches(result):
+                self.record_selector(field, selector, response.url, len(result))
+                return result
+
+        self.record_selector(field, None, response.url)
+        return SelectorList([])
+
+    def selector_recheck_due(self, field):
+        """
+        이번 평가에서 winner 앞의 선택자도 다시 확인할지 (SELECTOR_RECHECK_INTERVAL 번마다)
+        """
+        uses = self.selector_uses.get(field, 0) + 1
+        self.selector_uses[field] = uses
+        return bool(self.selector_recheck_interval) and uses % self.selector_recheck_interval == 0
+
+    def selector_count_changed(self, field, count):
+        """
+        winner 결과 개수가 이전에 본 개수에서 COUNT_CHANGE_FACTOR 배 이상 바뀌었는지
+        """
+        baseline = self.selector_counts.setdefault(field, count)
+        return count * COUNT_CHANGE_FACTOR <= baseline or count >= baseline * COUNT_CHANGE_FACTOR
+
+    def record_selector(self, field, selector, url, count=None):
+        """
+        우선순위 순서로 평가해서 field 에서 처음 맞은 선택자 기록
+
+        selector 가 None 이면 모든 선택자가 맞지 않은 것이다. selector 앞의 선택자가 모두
+        맞지 않은 경우에만 호출해야 한다. select_first() 밖에서 선택자를 평가한 경우
+        (예: 브라우저 페이지 안)에도 사용한다. count 는 결과 개수다.
+        """
+        stats = self.crawler.stats
+        if selector is None:
+            stats.inc_value("selectors/miss")
+            return
+        if count is not None:
+            self.selector_counts[field] = count
+        winner = self.selector_winners.get(field)
+        if selector == winner:
+            stats.inc_value("selectors/recheck")
+            return
+
+        if winner is None:
+            stats.inc_value("selectors/learned")
+            self.logger.info(f"Selector for {field}: {selector}")
+        else:
+            stats.inc_value("selectors/drift")
+            self.logger.warning(f"Selector drift for {field}: {winner} -> {selector} ({url})")
+        self.selector_winners[field] = selector
+        self.selector_winners_changed = True
+
+    def save_selector_winners(self, spider):
+        if spider is self and self.selector_winners_changed:
+            self.selector_store.set(self.name, self.selector_winners)
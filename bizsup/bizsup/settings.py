@@ -12,6 +12,11 @@ BOT_NAME = "bizsup"
 SPIDER_MODULES = ["bizsup.spiders"]
 NEWSPIDER_MODULE = "bizsup.spiders"
 
+# 범용 게시판 스파이더(bbs_<site>)의 사이트 설정 파일 (bizsup/sites.py)
+# 상대 경로는 scrapy.cfg 가 있는 디렉토리 기준, BIZSUP_SITES_FILE 환경 변수가 있으면 그것을 사용
+# 스파이더 클래스는 모듈을 가져올 때 만들어지므로 -s 로는 바꿀 수 없다 (환경 변수 사용)
+SITES_FILE = "../server.csv"
+
 
 # Crawl responsibly by identifying yourself (and your website) on the user-agent
 #USER_AGENT = "bizsup (+http://www.yourdomain.com)"
@@ -20,16 +25,44 @@ NEWSPIDER_MODULE = "bizsup.spiders"
 ROBOTSTXT_OBEY = False
 
 # Configure maximum concurrent requests performed by Scrapy (default: 16)
-CONCURRENT_REQUESTS = 1
+# 사이트별 예의 제한은 아래 도메인 단위 설정으로 지키고, 전체 동시 요청 수는 여러 사이트를
+# 함께 크롤링할 때(bizsup/crawl_all.py) 서로 다른 호스트의 요청이 한 줄로 서지 않을 만큼만 둔다
+# (사이트 4개 x ADAPTIVE_THROTTLE_MAX_CONCURRENCY)
+CONCURRENT_REQUESTS = 8
 
 # Configure a delay for requests for the same website (default: 0)
 # See https://docs.scrapy.org/en/latest/topics/settings.html#download-delay
 # See also autothrottle settings and docs
+# DOWNLOAD_DELAY 와 CONCURRENT_REQUESTS_PER_DOMAIN 은 도메인(다운로드 슬롯)마다 적용된다
 DOWNLOAD_DELAY = 3
 # The download delay setting will honor only one of:
 CONCURRENT_REQUESTS_PER_DOMAIN = 1
 #CONCURRENT_REQUESTS_PER_IP = 16
 
+# 목록 페이지네이션 방식 (bizsup/pagination.py 참고)
+# "fanout": 첫 목록 페이지에서 모든 페이지를 한 번에 요청, "serial": 한 페이지씩 차례로
+# 이미 수집한 스레드가 있는 사이트(두 번째 실행부터)는 모두 수집한 페이지에서 멈추도록
+# serial 로 동작한다. 모든 페이지를 다시 보려면 -a pagination=fanout
+PAGINATION_MODE = "fanout"
+
+# 증분 크롤링 (bizsup/incremental.py 참고)
+# 모두 이미 수집한 목록 페이지에서 페이지네이션을 멈춘다.
+# 이미 수집한 스레드는 아래 HTTP 캐시(ThreadPageCachePolicy)가 켜져 있으면 조건부 요청으로
+# 재검증하고(304 면 건너뜀, 바뀌었으면 다시 수집), 캐시가 꺼져 있거나
+# INCREMENTAL_REVALIDATE = False 이면 요청하지 않고 건너뛴다.
+INCREMENTAL_CRAWL = True
+INCREMENTAL_REVALIDATE = True
+SEEN_THREADS_DB = "seen_threads.db"
+
+# 게시글 본문 HTML -> Markdown 변환 방식 (bizsup/markdown.py 참고)
+# "html2text": 기존 html2text 변환 (기본값), "lxml": 선택자의 lxml 트리를 바로 변환 (더 빠르지만 출력이 조금 다름)
+MARKDOWN_ENGINE = "html2text"
+
+# 사이트/필드별로 맞은 CSS 선택자 기록 파일 (bizsup/selector_chain.py 참고)
+SELECTOR_WINNERS_FILE = "selector_winners.json"
+# 이 횟수마다 기록한 선택자보다 우선순위가 높은 선택자도 다시 확인 (0 이면 끔)
+SELECTOR_RECHECK_INTERVAL = 20
+
 # Disable cookies (enabled by default)
 #COOKIES_ENABLED = False
 
@@ -44,15 +77,21 @@ CONCURRENT_REQUESTS_PER_DOMAIN = 1
 
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
+# Playwright 페이지 풀/리소스 차단 미들웨어(scrapy_browser)는 Playwright 를 쓰는 스파이더만
+# 등록한다 (bizsup/rendering.py 의 use_playwright_settings)
 #SPIDER_MIDDLEWARES = {
 #    "bizsup.middlewares.BizsupSpiderMiddleware": 543,
 #}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "bizsup.middlewares.BizsupDownloaderMiddleware": 543,
-#}
+DOWNLOADER_MIDDLEWARES = {
+    # FIXTURE_RECORD_DIR 가 있으면 압축 해제/재시도가 끝난 응답을 기록 (bizsup/replay.py)
+    "bizsup.replay.FixtureRecorderMiddleware": 100,
+    "bizsup.middlewares.RenderingMiddleware": 543,
+    # 재시도(550)보다 먼저 응답/예외를 보고 호스트별 지연 시간과 동시 요청 수 조절
+    "bizsup.middlewares.AdaptiveThrottleMiddleware": 560,
+}
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -62,11 +101,45 @@ CONCURRENT_REQUESTS_PER_DOMAIN = 1
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "bizsup.pipelines.BizsupPipeline": 300,
-#}
+ITEM_PIPELINES = {
+    "bizsup.pipelines.MarkdownWriterPipeline": 200,
+    "bizsup.pipelines.AttachmentPipeline": 300,
+}
+
+# 게시글 Markdown 파일 쓰기 (MarkdownWriterPipeline) - 스레드 수, 한 번에 쓰는 파일 수,
+# 배치가 덜 찼을 때 기다리는 최대 시간 (초)
+MARKDOWN_WRITER_THREADS = 2
+MARKDOWN_BATCH_SIZE = 32
+MARKDOWN_FLUSH_INTERVAL = 1.0
+
+# 첨부파일 동시 다운로드 수 (AttachmentPipeline 전용 스레드 풀 크기)
+ATTACHMENT_CONCURRENCY = 4
+# 첨부파일 재검증용 ETag/Last-Modified 저장 파일 (비우면 재검증하지 않음)
+ATTACHMENT_VALIDATORS_DB = "attachment_validators.db"
+# 첨부파일 본문을 내용 해시로 한 번만 저장하는 디렉토리 (비우면 스레드 디렉토리에 바로 저장)
+# 모든 사이트가 공유하므로 출력 디렉토리와 같은 파일시스템에 두어야 하드링크를 만들 수 있다
+ATTACHMENT_BLOB_DIR = "attachment_blobs"
+
+# 호스트별 적응형 속도 조절 (bizsup/throttle.py) - DOWNLOAD_DELAY 와
+# CONCURRENT_REQUESTS_PER_DOMAIN (3초, 1개)에서 시작해 응답 시간과 오류에 따라 아래 범위에서 조절
+# 작은 공공기관 포털이 대부분이므로 도메인당 최대 2개, 1초 간격까지만 늘리고,
+# 목표 시간 안에 온 성공 응답이 ADAPTIVE_THROTTLE_WINDOW 개 쌓일 때마다 한 단계씩 늘린다
+# 사이트별 범위는 스파이더 속성 throttle_min_delay / throttle_max_delay / throttle_max_concurrency
+ADAPTIVE_THROTTLE_ENABLED = True
+ADAPTIVE_THROTTLE_MIN_DELAY = 1.0
+ADAPTIVE_THROTTLE_MAX_DELAY = 30.0
+ADAPTIVE_THROTTLE_MAX_CONCURRENCY = 2
+ADAPTIVE_THROTTLE_TARGET_LATENCY = 2.0
+ADAPTIVE_THROTTLE_WINDOW = 10
+
+# 응답 기록과 재생 (bizsup/replay.py, bizsup/bench.py)
+# FIXTURE_RECORD_DIR: 받은 페이지와 첨부파일을 이 디렉토리에 기록
+# FIXTURE_REPLAY_URL: 첨부파일을 이 재생 서버에서 받음 (페이지는 bench 가 ReplayDownloadHandler 로 연결)
+FIXTURE_RECORD_DIR = None
+FIXTURE_REPLAY_URL = None
 
 # Enable and configure the AutoThrottle extension (disabled by default)
+# (AdaptiveThrottleMiddleware 와 함께 켜지 않는다)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
 #AUTOTHROTTLE_ENABLED = True
 # The initial download delay
@@ -81,9 +154,13 @@ CONCURRENT_REQUESTS_PER_DOMAIN = 1
 
 # Enable and configure HTTP caching (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
-#HTTPCACHE_ENABLED = True
-#HTTPCACHE_EXPIRATION_SECS = 0
-#HTTPCACHE_DIR = "httpcache"
+# 스레드 페이지만 검증자와 함께 저장하고 다시 크롤링할 때 조건부 요청으로 재검증한다
+# (bizsup/incremental.py 의 ThreadPageCachePolicy 참고).
+# 재검증 결과는 revalidation/pages/{miss,revalidated,hit} 통계에 기록된다.
+HTTPCACHE_ENABLED = True
+HTTPCACHE_POLICY = "bizsup.incremental.ThreadPageCachePolicy"
+HTTPCACHE_EXPIRATION_SECS = 0
+HTTPCACHE_DIR = "httpcache"
 #HTTPCACHE_IGNORE_HTTP_CODES = []
 #HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
 
@@ -91,7 +168,32 @@ CONCURRENT_REQUESTS_PER_DOMAIN = 1
 TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
 FEED_EXPORT_ENCODING = "utf-8"
 
-DOWNLOAD_HANDLERS = {
-    "http": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
-    "https": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
-}
+# Playwright 다운로드 핸들러는 브라우저 렌더링이 필요한 스파이더(egbiz, snip)만
+# custom_settings 로 등록한다 (bizsup/rendering.py 참고).
+# 나머지 게시판은 첫 크롤링에서 렌더링 필요 여부를 판정해 파일에 저장하고,
+# 정적 사이트로 판정되면 기본 HTTP/1.1 핸들러만 사용한다.
+RENDERING_VERDICTS_FILE = "rendering_verdicts.json"
+# 판정을 다시 할 주기 (일, 0 이면 사이트가 바뀐 것이 감지될 때만)
+RENDERING_VERDICT_MAX_AGE_DAYS = 30
+
+# Playwright 로 렌더링하는 페이지에서 차단할 리소스 (scrapy_browser/browser.py 참고)
+# none: 차단 안 함, default: 이미지/미디어/폰트/추적기, text: default + 스타일시트
+PLAYWRIGHT_BLOCK_PROFILE = "default"
+# 차단하지 않을 요청 URL 정규식 (사이트에 꼭 필요한 XHR 등)
+PLAYWRIGHT_BLOCK_ALLOW = []
+# 추가로 차단할 추적기 도메인
+PLAYWRIGHT_BLOCK_DOMAINS = []
+# 차단하지 않은 요청의 전송 바이트를 playwright/transfer/bytes 통계에 기록
+PLAYWRIGHT_TRACK_TRANSFER_BYTES = True
+
+# 사이트(컨텍스트)별로 동시에 사용하고 재사용할 Playwright 페이지 수 (0 이면 풀 사용 안 함)
+PLAYWRIGHT_POOL_SIZE = 4
+# 페이지를 닫고 새로 만들기 전까지 재사용할 횟수
+PLAYWRIGHT_POOL_MAX_NAVIGATIONS = 20
+# 크롤러와 브라우저 프로세스 RSS 합계가 이 값(MB)을 넘으면 반환된 페이지를 닫음 (0 이면 확인 안 함)
+PLAYWRIGHT_POOL_MAX_RSS_MB = 2048
+# 스파이더 콜백이 이 시간(초) 안에 반환하지 않은 페이지는 닫음 (0 이면 확인 안 함)
+PLAYWRIGHT_PAGE_HOLD_TIMEOUT = 600
+# 여러 스파이더 실행이 브라우저 하나를 나눠 쓰려면 미리 띄운 Chromium 에 연결한다
+# (chromium --remote-debugging-port=9222)
+#PLAYWRIGHT_CDP_URL = "http://localhost:9222"
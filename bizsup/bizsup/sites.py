@@ -0,0 +1,202 @@
+# server.csv 사이트 설정을 추출 계획(SitePlan)으로 컴파일
+#
+# server.csv 의 한 줄이 게시판 하나다. 사이트 이름과 시작 URL 만 있으면 나머지
+# 열(페이지/스레드 ID 파라미터, 목록/제목/본문/첨부파일 선택자, 렌더링 방식,
+# 최대 페이지 수)은 기존 스파이더들이 쓰던 공통 기본값을 사용한다.
+# 선택자 열에는 여러 선택자를 '|' 로 구분해 우선순위대로 적는다.
+#
+#   site,url,page_param,thread_id_param,list_selector,title_selector,...
+#   jbba,https://www.jbba.kr/bbs/board.php?bo_table=sub01_09,page,wr_id,.td_subject a,...
+#
+# 시작할 때 모든 줄을 한 번 컴파일해 두므로 스파이더는 페이지마다 설정을 해석하지
+# 않고 미리 만들어 둔 선택자 목록만 평가한다. '#' 으로 시작하는 줄은 메모로 건너뛴다.
+#
+# 파일 위치는 SITES_FILE 설정이고 BIZSUP_SITES_FILE 환경 변수가 있으면 그것을 쓴다.
+# 상대 경로는 Scrapy 프로젝트 디렉토리(scrapy.cfg 가 있는 곳, 없으면 현재 디렉토리) 기준이다.
+
+import csv
+import logging
+import os
+from pathlib import Path
+from urllib.parse import urlparse
+
+from scrapy.utils.conf import closest_scrapy_cfg
+
+from w3lib.url import url_query_parameter
+
+
+logger = logging.getLogger(__name__)
+
+# SITES_FILE 설정보다 우선하는 환경 변수
+SITES_FILE_ENV = "BIZSUP_SITES_FILE"
+
+COLUMNS = (
+    "site", "url", "page_param", "thread_id_param", "list_selector", "title_selector",
+    "content_selector", "attachment_selector", "rendering", "max_pages",
+)
+
+RENDERING_MODES = ("auto", "static", "browser")
+
+# 선택자 열이 비어 있을 때 사용할 기존 스파이더들의 대체 선택자
+DEFAULT_LIST_SELECTORS = (
+    ".stitle a", ".td_subject a", "td.subject a", ".subject a", ".title a", ".table_list tr a",
+)
+DEFAULT_TITLE_SELECTORS = (
+    ".board_view_tit::text", ".board_title::text", ".view-title::text", ".view-subject::text",
+    "h4.tit_board_view::text", "h1.board_view_subject::text", ".view_subject::text",
+    ".bo_v_tit::text", "#bo_v_title::text", ".board_view_title::text",
+)
+DEFAULT_CONTENT_SELECTORS = (
+    ".board_view_cont", ".board_content", ".view-content", ".bd_cont", ".bodyCon",
+    "#bo_v_con", ".view_content", ".board_view_content", ".board_view_con", "#bo_content",
+)
+DEFAULT_ATTACHMENT_SELECTORS = (
+    'a[href*="fileDown"]', 'a[href*="download"]', 'a[href*="file_download"]',
+)
+
+# page_param / thread_id_param 이 비어 있을 때 URL 에서 찾아볼 흔한 파라미터 이름
+COMMON_PAGE_PARAMS = ("page", "pageIndex", "pageNo", "sfpage", "cpage")
+COMMON_THREAD_ID_PARAMS = ("wr_id", "board_seq", "nttId", "dataSid", "seq", "idx", "no")
+
+# 목록에서 스레드로 따라가지 않을 URL (다운로드, 미리보기)
+DOWNLOAD_URL_PATTERNS = ("download.php", "file_download", "fileDown", "player.php")
+
+DEFAULT_MAX_PAGES = 6
+
+
+def split_selectors(value):
+    """
+    '|' 로 구분한 선택자 열을 튜플로 (비어 있으면 빈 튜플 - SitePlan 이 기본값 사용)
+    """
+    return tuple(part.strip() for part in (value or "").split("|") if part.strip())
+
+
+class SitePlan:
+    """
+    server.csv 한 줄을 컴파일한 사이트별 추출 계획
+    """
+
+    def __init__(self, site, url, page_param=None, thread_id_param=None, list_selectors=(),
+                 title_selectors=(), content_selectors=(), attachment_selectors=(),
+                 rendering="auto", max_pages=DEFAULT_MAX_PAGES):
+        self.site = site
+        self.start_url = url
+        self.page_param = page_param or self.detect_param(url, COMMON_PAGE_PARAMS) or "page"
+        self.thread_id_param = thread_id_param or None
+        self.list_selectors = tuple(list_selectors) or DEFAULT_LIST_SELECTORS
+        self.title_selectors = tuple(title_selectors) or DEFAULT_TITLE_SELECTORS
+        self.content_selectors = tuple(content_selectors) or DEFAULT_CONTENT_SELECTORS
+        self.attachment_selectors = tuple(attachment_selectors) or DEFAULT_ATTACHMENT_SELECTORS
+        self.rendering = rendering
+        self.max_pages = max_pages
+
+        # 페이지마다 다시 만들지 않도록 선택자 문자열을 미리 조합
+        self.link_selectors = tuple(f"{selector}::attr(href)" for selector in self.list_selectors)
+        self.attachment_query = ", ".join(self.attachment_selectors)
+        # 렌더링 판정(RenderingProbeMixin)에서는 목록 선택자 전체를 한 번에 센다
+        self.thread_link_selector = ", ".join(self.list_selectors)
+
+    @property
+    def spider_name(self):
+        # 같은 사이트의 기존 스파이더(jbba, gntp ...)와 이름/저장소 키가 겹치지 않도록 접두어 사용
+        return f"bbs_{self.site}"
+
+    @property
+    def allowed_domains(self):
+        host = urlparse(self.start_url).hostname or ""
+        return [host[4:] if host.startswith("www.") else host]
+
+    @staticmethod
+    def detect_param(url, names):
+        for name in names:
+            if url_query_parameter(url, name) is not None:
+                return name
+        return None
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        CSV 한 줄(dict)을 SitePlan 으로 (잘못된 줄이면 ValueError)
+        """
+        site = (row.get("site") or "").strip()
+        url = (row.get("url") or "").strip()
+        if not site or not site.isidentifier():
+            raise ValueError(f"잘못된 사이트 이름: {site!r}")
+        if urlparse(url).scheme not in ("http", "https"):
+            raise ValueError(f"잘못된 시작 URL: {url!r}")
+
+        rendering = (row.get("rendering") or "auto").strip()
+        if rendering not in RENDERING_MODES:
+            raise ValueError(f"알 수 없는 렌더링 방식: {rendering!r} ({', '.join(RENDERING_MODES)})")
+        max_pages = (row.get("max_pages") or "").strip()
+
+        return cls(
+            site,
+            url,
+            page_param=(row.get("page_param") or "").strip(),
+            thread_id_param=(row.get("thread_id_param") or "").strip(),
+            list_selectors=split_selectors(row.get("list_selector")),
+            title_selectors=split_selectors(row.get("title_selector")),
+            content_selectors=split_selectors(row.get("content_selector")),
+            attachment_selectors=split_selectors(row.get("attachment_selector")),
+            rendering=rendering,
+            max_pages=int(max_pages) if max_pages else DEFAULT_MAX_PAGES,
+        )
+
+
+def sites_file(settings=None):
+    """
+    사이트 설정 파일 경로 (BIZSUP_SITES_FILE 환경 변수 > SITES_FILE 설정, 없으면 None)
+    """
+    value = os.environ.get(SITES_FILE_ENV) or (settings.get("SITES_FILE") if settings is not None else None)
+    if not value:
+        return None
+    path = Path(value).expanduser()
+    if not path.is_absolute():
+        cfg = closest_scrapy_cfg()
+        path = (Path(cfg).parent if cfg else Path.cwd()) / path
+    return path.resolve()
+
+
+def load_sites(path):
+    """
+    사이트 설정 파일의 모든 사이트를 SitePlan 목록으로 컴파일
+
+    첫 줄이 'site' 로 시작하면 헤더로 보고, 없으면 COLUMNS 순서로 읽는다.
+    빈 줄과 '#' 메모 줄은 건너뛰고, 잘못된 줄은 경고만 남기고 건너뛴다.
+    파일이 없거나 사이트가 하나도 없으면 경고를 남기고 빈 목록을 반환한다.
+    """
+    if path is None:
+        logger.warning(f"No site config: set SITES_FILE or {SITES_FILE_ENV}")
+        return []
+    path = Path(path)
+    if not path.exists():
+        logger.warning(f"Site config not found: {path}")
+        return []
+
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = [row for row in csv.reader(f) if row and row[0].strip() and not row[0].startswith("#")]
+    if not rows:
+        logger.warning(f"No sites in {path}")
+        return []
+
+    header = COLUMNS
+    if rows[0][0].strip() == "site":
+        header = tuple(column.strip() for column in rows.pop(0))
+
+    plans = []
+    seen = set()
+    for line in rows:
+        try:
+            plan = SitePlan.from_row(dict(zip(header, line)))
+        except ValueError as e:
+            logger.warning(f"Skipping site row {line[:2]}: {e}")
+            continue
+        if plan.site in seen:
+            logger.warning(f"Duplicate site {plan.site!r} in {path}, keeping the first row")
+            continue
+        seen.add(plan.site)
+        plans.append(plan)
+    if not plans:
+        logger.warning(f"No valid sites in {path}")
+    return plans
@@ -0,0 +1,225 @@
+import scrapy
+from pathlib import Path
+
+from scrapy.utils.project import get_project_settings
+from w3lib.url import url_query_parameter
+
+from bizsup.attachments import attachment_spec, safe_filename
+from bizsup.incremental import IncrementalMixin
+from bizsup.markdown import html_to_markdown
+from bizsup.pagination import PaginationMixin
+from bizsup.rendering import RenderingProbeMixin
+from bizsup.selector_chain import SelectorChainMixin
+from bizsup.sites import COMMON_THREAD_ID_PARAMS, DOWNLOAD_URL_PATTERNS, load_sites, sites_file
+
+
+# 파일명이 아니라 버튼 이름인 첨부파일 링크 텍스트
+DOWNLOAD_BUTTON_TEXTS = ("다운로드", "내려받기", "download")
+
+
+class BbsSpider(PaginationMixin, IncrementalMixin, RenderingProbeMixin, SelectorChainMixin, scrapy.Spider):
+    """
+    server.csv 한 줄(SitePlan)로 동작하는 범용 게시판 스파이더
+
+    이 클래스는 name 이 없어서 직접 실행하지 않는다. 모듈 아래에서 server.csv 의
+    사이트마다 plan 을 채운 하위 클래스(bbs_<site>)를 만들어 등록한다.
+
+        scrapy crawl bbs_jbba
+        scrapy crawl bbs_gbtp -a max_pages=2
+    """
+
+    plan = None
+    max_pages = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_pages = int(self.max_pages or self.plan.max_pages)  # -a max_pages= 로 변경 가능
+        # 저장 디렉토리 설정
+        self.output_dir = Path(f"{self.name}_output")
+        self.output_dir.mkdir(exist_ok=True)
+
+    def thread_id(self, url):
+        """
+        스레드 ID 추출 - thread_id_param 이 없는 사이트는 흔한 ID 파라미터를 차례로 찾아봄
+        """
+        if self.thread_id_param:
+            return super().thread_id(url)
+        for param in COMMON_THREAD_ID_PARAMS:
+            value = url_query_parameter(url, param)
+            if value:
+                return value
+        return url
+
+    def parse(self, response):
+        """
+        목록 페이지에서 스레드 링크를 추출하고 페이지네이션을 처리
+        """
+        self.logger.info(f"Processing page: {response.url}")
+
+        # 이전에 맞은 목록 선택자부터 시도 (SelectorChainMixin)
+        thread_links = self.select_first(response, 'list', self.plan.link_selectors).getall()
+
+        # JavaScript 링크, 앵커, 다운로드 URL 제외 후 절대 URL로 변환 (순서 유지, 중복 제거)
+        thread_urls = []
+        for url in thread_links:
+            if not url or url.startswith('javascript:') or url.startswith('#'):
+                continue
+            if any(pattern in url for pattern in DOWNLOAD_URL_PATTERNS):
+                continue
+            absolute_url = response.urljoin(url)
+            if absolute_url not in thread_urls:
+                thread_urls.append(absolute_url)
+        self.logger.info(f"Found {len(thread_urls)} thread links")
+
+        # 이미 수집한 스레드는 건너뛰거나 조건부 요청으로 재검증 (IncrementalMixin)
+        request_thread_urls = self.threads_to_request(thread_urls)
+
+        for thread_url in request_thread_urls:
+            yield scrapy.Request(
+                url=thread_url,
+                callback=self.parse_thread,
+                meta={'thread_url': thread_url, 'index': self.thread_index(thread_url), 'revalidate': True}
+            )
+
+        # 나머지 목록 페이지 요청 (PaginationMixin)
+        yield from self.list_page_requests(response, stop=self.all_threads_seen(thread_urls))
+
+    def get_current_page(self, url):
+        """
+        URL에서 현재 페이지 번호 추출 (없으면 1페이지)
+        """
+        try:
+            return int(url_query_parameter(url, self.page_param, '1'))
+        except ValueError:
+            return 1
+
+    def get_next_page_url(self, response, current_page):
+        return self.get_page_url(response.url, current_page + 1)
+
+    def extract_title(self, response, thread_url):
+        """
+        제목 추출: 계획의 선택자 -> '제목' 표 레이아웃 -> 첫 h1/h2 -> 스레드 ID
+        """
+        title = self.select_first(
+            response, 'title', self.plan.title_selectors, check=lambda result: (result.get() or '').strip()
+        ).get()
+        if not title:
+            title = response.xpath('//th[contains(text(), "제목")]/following-sibling::td').xpath('string()').get()
+        if not title or not title.strip():
+            title = response.css('h1::text, h2::text').get()
+        if title and title.strip():
+            return title.strip()
+
+        thread_id = self.thread_id(thread_url)
+        title = f"게시글-{thread_id if thread_id != thread_url else hash(thread_url) % 10000}"
+        self.logger.warning(f"Could not extract title, using fallback: {title}")
+        return title
+
+    def extract_content(self, response):
+        """
+        본문 추출: 계획의 선택자 -> '내용' 표 레이아웃 -> 일반적인 본문 선택자
+        """
+        content = self.select_first(response, 'content', self.plan.content_selectors)
+        if not content:
+            content = response.xpath('//th[contains(text(), "내용")]/following-sibling::td')
+        if not content:
+            content = response.css('div.content, div.entry, article')
+        return content
+
+    def extract_attachments(self, response):
+        """
+        첨부파일 링크 (href, 링크 텍스트) 목록 - 미리 조합한 선택자 하나로 한 번에 찾음
+        """
+        attachments = []
+        processed_urls = set()
+        for link in response.css(self.plan.attachment_query):
+            href = link.attrib.get('href')
+            if not href or href in processed_urls:
+                continue
+            if href.startswith('javascript:') or '#' in href or 'player' in href or 'preview' in href:
+                continue
+            processed_urls.add(href)
+            text = ' '.join(link.css('::text').getall()).strip()
+            if text.lower() in DOWNLOAD_BUTTON_TEXTS:
+                # "다운로드" 버튼만 링크인 게시판 (jbtp 등) - 파일명은 부모 요소의 텍스트
+                text = ' '.join(link.xpath('../text()').getall()).strip() or text
+            attachments.append((href, text))
+        return attachments
+
+    def parse_thread(self, response):
+        """
+        스레드 페이지에서 본문 내용과 첨부 파일 추출
+        """
+        thread_url = response.meta.get('thread_url', response.url)
+        index = response.meta.get('index', 0)
+        self.logger.info(f"Processing thread: {thread_url}")
+
+        # 이전 크롤링 이후 바뀌지 않은 스레드는 다시 파싱하지 않음
+        if self.thread_unchanged(response):
+            return
+
+        title = self.extract_title(response, thread_url)
+        content = self.extract_content(response)
+        index_dir = self.output_dir / f"{index}"
+
+        # HTML을 Markdown으로 변환 (공유 변환기가 선택자의 lxml 트리를 바로 사용)
+        # 파일 쓰기는 MarkdownWriterPipeline 에서 수행
+        markdown_content = None
+        if content:
+            markdown_content = html_to_markdown(content[0], self.settings.get('MARKDOWN_ENGINE', 'html2text'))
+        else:
+            self.logger.error(f"Failed to extract content from {thread_url}")
+
+        # 첨부파일 정보 수집 - 실제 다운로드는 AttachmentPipeline 에서 수행
+        attachment_links = self.extract_attachments(response)
+        self.logger.info(f"Found {len(attachment_links)} unique attachments")
+        attachments = []
+        for i, (href, text) in enumerate(attachment_links):
+            base_filename = safe_filename(text)[:100] or f"file_{index}_{i}"
+            attachments.append(attachment_spec(response, href, base_filename))
+
+        yield {
+            'site': self.plan.site,
+            'url': thread_url,
+            'title': title,
+            'content_saved': bool(content),
+            'markdown': markdown_content,
+            'markdown_path': str(self.output_dir / f"{index}.md"),
+            'attachments_count': len(attachments),
+            'attachment_dir': str(index_dir),
+            'attachments': attachments
+        }
+
+
+def spider_class(plan):
+    """
+    SitePlan 으로 사이트별 스파이더 클래스 생성
+    """
+    return type(f"Bbs_{plan.site}_Spider", (BbsSpider,), {
+        '__module__': __name__,
+        'name': plan.spider_name,
+        'plan': plan,
+        'allowed_domains': plan.allowed_domains,
+        'start_urls': [plan.start_url],
+        'thread_link_selector': plan.thread_link_selector,
+        # 렌더링 방식이 고정된 사이트는 판정하지 않음 (RenderingProbeMixin)
+        'fixed_rendering': None if plan.rendering == 'auto' else plan.rendering,
+        'page_param': plan.page_param,
+        'thread_id_param': plan.thread_id_param,
+    })
+
+
+def build_spiders(settings):
+    """
+    사이트 설정 파일의 사이트마다 만든 스파이더 클래스 {클래스 이름: 클래스}
+    """
+    spiders = {}
+    for plan in load_sites(sites_file(settings)):
+        spider = spider_class(plan)
+        spiders[spider.__name__] = spider
+    return spiders
+
+
+# 사이트마다 스파이더 클래스를 모듈에 등록 (scrapy list 에 bbs_<site> 로 표시)
+# 모듈을 가져오는 시점에는 크롤러 설정이 없으므로 프로젝트 설정(settings.py)과 환경 변수만 본다.
+globals().update(build_spiders(get_project_settings()))
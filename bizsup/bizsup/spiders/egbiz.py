@@ -3,16 +3,184 @@ import logging
 import re
 from scrapy_playwright.page import PageMethod
 
+from bizsup.rendering import use_playwright_settings
+
+
+# "더보기" 한 번을 페이지 안에서 처리하는 스크립트
+# 보이는 버튼을 찾아 클릭하고, 새 목록 항목이 나타날 때까지 기다린 뒤
+# 새로 추가된 링크의 href 와 onclick 값만 JSON 으로 돌려준다.
+# 이미 돌려준 요소는 표시해 두므로 클릭마다 새 항목만 반환된다.
+MORE_BUTTON_SCRIPT = """
+async ({buttonSelectors, linkSelectors, onclickSelectors, timeout, renderTimeout, xhrPattern}) => {
+    const MARK = '__bizsupSeen';
+    const allSelector = linkSelectors.concat(onclickSelectors).join(', ');
+    const unseen = () => Array.from(document.querySelectorAll(allSelector)).filter((el) => !el[MARK]);
+    const markAll = () => document.querySelectorAll(allSelector).forEach((el) => { el[MARK] = true; });
+    const isVisible = (el) => {
+        const style = window.getComputedStyle(el);
+        return el.offsetWidth > 0 && el.offsetHeight > 0 &&
+               style.display !== 'none' && style.visibility !== 'hidden';
+    };
+
+    let button = null;
+    let buttonSelector = null;
+    for (const selector of buttonSelectors) {
+        const el = document.querySelector(selector);
+        if (el && isVisible(el)) {
+            button = el;
+            buttonSelector = selector;
+            break;
+        }
+    }
+    if (!button) {
+        return {button: null, loaded: false, links: [], onclicks: []};
+    }
+
+    // 클릭 전 항목 표시 후 새 항목(DOM 변경) 또는 목록 XHR 완료를 기다림
+    markAll();
+    const loaded = await new Promise((resolve) => {
+        let renderTimer = null;
+        let deadline = null;
+        let observer = null;
+        let resources = null;
+        const done = (value) => {
+            observer.disconnect();
+            resources.disconnect();
+            clearTimeout(renderTimer);
+            clearTimeout(deadline);
+            resolve(value);
+        };
+        observer = new MutationObserver(() => {
+            if (unseen().length) done(true);
+        });
+        observer.observe(document.body, {childList: true, subtree: true});
+        resources = new PerformanceObserver((list) => {
+            const xhr = list.getEntries().some(
+                (entry) => (entry.initiatorType === 'xmlhttprequest' || entry.initiatorType === 'fetch') &&
+                           (!xhrPattern || new RegExp(xhrPattern).test(entry.name))
+            );
+            if (xhr) {
+                clearTimeout(renderTimer);
+                renderTimer = setTimeout(() => done(unseen().length > 0), renderTimeout);
+            }
+        });
+        resources.observe({type: 'resource'});
+        deadline = setTimeout(() => done(unseen().length > 0), timeout);
+        button.click();
+    });
+
+    // 모든 선택자에 맞는 새 요소를 문서 순서대로 (선택자 하나만 쓰면 다른 목록의 링크를 놓침)
+    const collect = (selectors, read) => Array.from(document.querySelectorAll(selectors.join(', ')))
+        .filter((el) => !el[MARK]).map(read).filter((value) => value);
+    const links = collect(linkSelectors, (el) => {
+        const href = el.getAttribute('href');
+        if (!href || href.startsWith('javascript:')) return null;
+        return new URL(href, location.href).href;
+    });
+    const onclicks = collect(onclickSelectors, (el) => el.getAttribute('onclick'));
+    markAll();
+
+    return {button: buttonSelector, loaded, links, onclicks};
+}
+"""
+
+
+def dom_selector(selector):
+    """
+    Scrapy 선택자에서 ::attr(...), ::text 를 뺀 DOM 선택자
+    """
+    return selector.split('::')[0]
+
 
 class EgbizSpider(scrapy.Spider):
     name = "egbiz"
     allowed_domains = ["egbiz.or.kr"]
     start_urls = ["https://www.egbiz.or.kr/index.do"]
+    block_profile = "default"  # "더보기" 버튼 표시 여부를 확인하므로 스타일시트는 차단하지 않음
+
+    # "더보기" 버튼 CSS 선택자
+    more_button_selectors = [
+        ".more-btn",
+        ".btn_more",
+        ".btn-more",
+        ".btnMore",
+        "#btnMore",
+        "button.more",
+        "a.more",
+        ".more",
+        ".list_more",
+        ".list-more",
+        ".load_more",
+        ".load-more",
+        ".viewMore",
+        ".view_more",
+        ".view-more",
+        "button[class*='more']",
+        "a[class*='more']",
+        "a.goBoard",
+        ".view_btn",
+        ".view-btn",
+        ".btn-view",
+        ".btn_view",
+        ".btn-list",
+        ".btn_list"
+    ]
+
+    # 스레드 링크 CSS 선택자들 (여러 목록이 함께 있을 수 있으므로 모두 맞춰 합침)
+    thread_link_selectors = [
+        '.notice-list li a::attr(href)',
+        '.board-list li a::attr(href)',
+        '.board_list li a::attr(href)',
+        '.board-list td.subject a::attr(href)',
+        '.board_list td.subject a::attr(href)',
+        '.notice-board a::attr(href)',
+        'table.board-list tr td.subject a::attr(href)',
+        'table.board_list tr td.subject a::attr(href)',
+        '.notice-block a::attr(href)',
+        '.notice-item a::attr(href)',
+        '.biz_list a::attr(href)',
+        '.biz-list a::attr(href)',
+        '.list a::attr(href)',
+        '.list_body a::attr(href)',
+        '.news_list a::attr(href)',
+        '.news-list a::attr(href)',
+        '.board_news a::attr(href)',
+        '.board-news a::attr(href)',
+        '.news_board a::attr(href)',
+        'a[href*="board_seq"]::attr(href)',
+        'a[href*="seq="]::attr(href)',
+        'a[href*="idx="]::attr(href)',
+        'a[href*="board/view"]::attr(href)',
+        'a[href*="boardId"]::attr(href)',
+        'a[href*="view.do"]::attr(href)'
+    ]
+
+    # onclick 이벤트가 있는 링크도 처리
+    onclick_selectors = [
+        'a[onclick*="fnView"]::attr(onclick)',
+        'tr[onclick*="fnView"]::attr(onclick)',
+        'a[onclick*="goView"]::attr(onclick)',
+        'a[onclick*="View"]::attr(onclick)'
+    ]
+
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        # "더보기" 버튼 처리를 위해 Playwright 사용
+        use_playwright_settings(settings)
 
     def __init__(self, *args, **kwargs):
         super(EgbizSpider, self).__init__(*args, **kwargs)
-        self.all_thread_urls = []  # 모든 스레드 URL을 저장할 리스트
+        self.all_thread_urls = {}  # 모든 스레드 URL (발견 순서를 유지하는 집합으로 사용하는 dict)
         self.max_more_clicks = 6  # "더보기" 버튼 최대 클릭 수
+        self.more_wait_timeout = 10000  # 클릭 후 새 항목을 기다리는 최대 시간 (ms)
+        self.more_render_timeout = 2000  # 목록 XHR 응답 후 DOM 반영을 기다리는 최대 시간 (ms)
+        self.list_xhr_pattern = None  # 목록 XHR URL 정규식 (None 이면 모든 XHR/fetch 응답)
+
+    async def start(self):
+        # Scrapy 2.13 이상은 start() 를 사용하므로 start_requests() 로 위임
+        for request in self.start_requests():
+            yield request
 
     def start_requests(self):
         """Playwright를 사용하여 시작 요청 처리"""
@@ -38,189 +206,111 @@ class EgbizSpider(scrapy.Spider):
         
         # 초기 스레드 링크 추출
         self.logger.info("초기 스레드 링크 추출 중...")
-        thread_links = self.extract_thread_links(response)
-        self.all_thread_urls.extend(thread_links)
+        thread_links = self.add_thread_urls(self.extract_thread_links(response))
         self.logger.info(f"초기 스레드 {len(thread_links)}개 발견")
         
-        # "더보기" 버튼 클릭 처리
+        # 초기 스레드를 바로 내보낸 뒤 "더보기" 버튼 클릭 처리
         async def process_wrapper():
-            async for item in self.process_more_button(page, response, 0):
+            for url in thread_links:
+                yield {"thread_url": url}
+            async for item in self.process_more_button(page, response):
                 yield item
                 
         return process_wrapper()
 
-    async def process_more_button(self, page, response, click_count):
-        """'더보기' 버튼 클릭 처리 및 추가 항목 수집"""
-        # 클릭 제한 확인
-        if click_count >= self.max_more_clicks:
-            self.logger.info(f"최대 클릭 수 {self.max_more_clicks}에 도달")
-            # 모든 수집된 URL 반환
-            await page.close()
-            for url in self.all_thread_urls:
-                yield {"thread_url": url}
-            return
-        
-        # "더보기" 버튼 CSS 선택자
-        more_button_selectors = [
-            ".more-btn",
-            ".btn_more",
-            ".btn-more",
-            ".btnMore",
-            "#btnMore",
-            "button.more",
-            "a.more",
-            ".more",
-            ".list_more",
-            ".list-more",
-            ".load_more",
-            ".load-more",
-            ".viewMore",
-            ".view_more",
-            ".view-more",
-            "button[class*='more']",
-            "a[class*='more']",
-            "a.goBoard",
-            ".view_btn",
-            ".view-btn",
-            ".btn-view",
-            ".btn_view",
-            ".btn-list",
-            ".btn_list"
-        ]
-        
-        # 각 선택자로 버튼 찾기 시도
-        button_found = False
-        for selector in more_button_selectors:
+    def add_thread_urls(self, links):
+        """
+        처음 보는 스레드 URL만 발견 순서대로 기록하고 반환
+        """
+        new_links = [link for link in dict.fromkeys(links) if link not in self.all_thread_urls]
+        self.all_thread_urls.update(dict.fromkeys(new_links))
+        return new_links
+
+    async def process_more_button(self, page, response):
+        """
+        '더보기' 버튼 클릭 처리 및 추가 항목 수집
+
+        클릭마다 새로 나타난 스레드만 바로 아이템으로 내보내므로 뒤 단계가 목록 수집이
+        끝나기를 기다리지 않고, 아이템 수는 실제 스레드 수와 같다.
+        페이지는 오류가 나도 PageLifecycleMiddleware 가 parse 결과 처리가 끝날 때 반환한다.
+        """
+        for click_count in range(self.max_more_clicks):
+            # 버튼 탐색, 클릭, 대기, 새 링크 수집을 페이지 안에서 한 번에 처리
             try:
-                # 버튼 존재 및 가시성 확인
-                is_visible = await page.evaluate("""(selector) => {
-                    const btn = document.querySelector(selector);
-                    if (!btn) return false;
-                    const style = window.getComputedStyle(btn);
-                    return btn.offsetWidth > 0 && btn.offsetHeight > 0 && 
-                           style.display !== 'none' && style.visibility !== 'hidden';
-                }""", selector)
-                
-                if is_visible:
-                    self.logger.info(f"'더보기' 버튼 발견: {selector}")
-                    
-                    # 현재 스레드 수 확인
-                    pre_count = len(self.all_thread_urls)
-                    
-                    # 버튼 클릭 (직접 JavaScript 사용)
-                    await page.evaluate("""(selector) => {
-                        const btn = document.querySelector(selector);
-                        if (btn) {
-                            btn.click();
-                            return true;
-                        }
-                        return false;
-                    }""", selector)
-                    self.logger.info(f"'더보기' 버튼 클릭 #{click_count+1} (JavaScript 이용)")
-                    
-                    # 새 콘텐츠 로딩 대기
-                    await page.wait_for_timeout(2000)  # 2초 대기
-                    
-                    # 업데이트된 HTML 추출 및 파싱
-                    content = await page.content()
-                    updated_response = scrapy.http.HtmlResponse(
-                        url=response.url,
-                        body=content.encode('utf-8'),
-                        encoding='utf-8'
-                    )
-                    
-                    # 모든 스레드 링크 추출 (이미 수집된 URL 제외)
-                    current_links = self.extract_thread_links(updated_response)
-                    new_links = [link for link in current_links if link not in self.all_thread_urls]
-                    self.all_thread_urls.extend(new_links)
-                    
-                    self.logger.info(f"클릭 #{click_count+1}: {len(new_links)}개의 새 스레드 발견")
-                    self.logger.info(f"총 스레드 URL: {len(self.all_thread_urls)}개")
-                    
-                    button_found = True
-                    if len(new_links) > 0:
-                        # 새 링크가 추가되었으면 다음 클릭 진행
-                        # 비동기 함수에서는 yield from 대신 재귀적으로 yield
-                        async for item in self.process_more_button(page, updated_response, click_count + 1):
-                            yield item
-                    else:
-                        self.logger.info("새 스레드가 추가되지 않음. 더보기 처리 종료")
-                        break
-                    break
+                result = await page.evaluate(MORE_BUTTON_SCRIPT, {
+                    "buttonSelectors": self.more_button_selectors,
+                    "linkSelectors": [dom_selector(selector) for selector in self.thread_link_selectors],
+                    "onclickSelectors": [dom_selector(selector) for selector in self.onclick_selectors],
+                    "timeout": self.more_wait_timeout,
+                    "renderTimeout": self.more_render_timeout,
+                    "xhrPattern": self.list_xhr_pattern,
+                })
             except Exception as e:
                 self.logger.error(f"버튼 클릭 중 오류 발생: {str(e)}")
-        
-        if not button_found:
-            self.logger.info("더보기 버튼을 찾을 수 없음")
-        
-        # 모든 스레드 URL 반환
-        await page.close()
-        
-        # 한 번에 모든 URL 반환
-        for url in self.all_thread_urls:
-            yield {"thread_url": url}
+                break
+            
+            if result["button"] is None:
+                self.logger.info("더보기 버튼을 찾을 수 없음")
+                break
+            if not result["loaded"]:
+                self.logger.info(f"'더보기' 버튼 클릭 #{click_count+1} ({result['button']}): 새 항목이 나타나지 않음. 더보기 처리 종료")
+                break
+            
+            self.logger.info(f"'더보기' 버튼 클릭 #{click_count+1} ({result['button']})")
+            new_links = self.add_thread_urls(self.page_thread_links(result))
+            
+            self.logger.info(f"클릭 #{click_count+1}: {len(new_links)}개의 새 스레드 발견")
+            self.logger.info(f"총 스레드 URL: {len(self.all_thread_urls)}개")
+            
+            # 새로 발견한 스레드를 바로 내보냄
+            for url in new_links:
+                yield {"thread_url": url}
+            
+            if not new_links:
+                self.logger.info("새 스레드가 추가되지 않음. 더보기 처리 종료")
+                break
+        else:
+            self.logger.info(f"최대 클릭 수 {self.max_more_clicks}에 도달")
+
+    def page_thread_links(self, result):
+        """
+        MORE_BUTTON_SCRIPT 결과에서 스레드 URL 목록 생성
+        """
+        links = list(result["links"])
+        for onclick in result["onclicks"]:
+            constructed_url = self.onclick_thread_url(onclick)
+            if constructed_url:
+                links.append(constructed_url)
+        return list(dict.fromkeys(links))
+
+    def onclick_thread_url(self, onclick):
+        """
+        onclick 이벤트 값에서 게시물 URL 생성 (찾지 못하면 None)
+        """
+        # 게시물 ID 추출 (여러 패턴 지원)
+        # "fnView('123')", "goView(123)", "View('123', '456')" 등
+        id_match = re.search(r"(?:fnView|goView|View)\s*\(\s*'?(\d+)'?", onclick)
+        if not id_match:
+            return None
+        board_id = id_match.group(1)
+        # 일반적인 게시판 URL 패턴으로 조합
+        return f"https://www.egbiz.or.kr/board/view.do?boardId={board_id}"
 
     def extract_thread_links(self, response):
         """페이지에서 스레드 링크 추출"""
-        # 가능한 CSS 선택자들
-        selectors = [
-            '.notice-list li a::attr(href)',
-            '.board-list li a::attr(href)',
-            '.board_list li a::attr(href)',
-            '.board-list td.subject a::attr(href)',
-            '.board_list td.subject a::attr(href)',
-            '.notice-board a::attr(href)',
-            'table.board-list tr td.subject a::attr(href)',
-            'table.board_list tr td.subject a::attr(href)',
-            '.notice-block a::attr(href)',
-            '.notice-item a::attr(href)',
-            '.biz_list a::attr(href)',
-            '.biz-list a::attr(href)',
-            '.list a::attr(href)',
-            '.list_body a::attr(href)',
-            '.news_list a::attr(href)',
-            '.news-list a::attr(href)',
-            '.board_news a::attr(href)',
-            '.board-news a::attr(href)',
-            '.news_board a::attr(href)',
-            'a[href*="board_seq"]::attr(href)',
-            'a[href*="seq="]::attr(href)',
-            'a[href*="idx="]::attr(href)',
-            'a[href*="board/view"]::attr(href)',
-            'a[href*="boardId"]::attr(href)',
-            'a[href*="view.do"]::attr(href)'
-        ]
-        
-        # onclick 이벤트가 있는 링크도 처리
-        onclick_selectors = [
-            'a[onclick*="fnView"]::attr(onclick)',
-            'tr[onclick*="fnView"]::attr(onclick)',
-            'a[onclick*="goView"]::attr(onclick)',
-            'a[onclick*="View"]::attr(onclick)'
-        ]
-        
-        # 모든 일반 링크 추출
-        all_links = []
-        for selector in selectors:
-            links = response.css(selector).getall()
-            if links:
-                self.logger.info(f"{len(links)}개 링크 발견 (선택자: {selector})")
-                all_links.extend(links)
+        # 일반 링크 추출 - 선택자를 하나의 CSS 그룹으로 묶어 한 번에 평가 (모든 선택자 결과의 합집합)
+        all_links = response.css(', '.join(self.thread_link_selectors)).getall()
+        if all_links:
+            self.logger.info(f"{len(all_links)}개 링크 발견")
         
         # onclick 이벤트에서 링크 추출
-        for selector in onclick_selectors:
-            onclick_events = response.css(selector).getall()
-            if onclick_events:
-                self.logger.info(f"{len(onclick_events)}개 onclick 이벤트 발견 (선택자: {selector})")
-                for onclick in onclick_events:
-                    # 게시물 ID 추출 (여러 패턴 지원)
-                    # "fnView('123')", "goView(123)", "View('123', '456')" 등
-                    id_match = re.search(r"(?:fnView|goView|View)\s*\(\s*'?(\d+)'?", onclick)
-                    if id_match:
-                        board_id = id_match.group(1)
-                        # 일반적인 게시판 URL 패턴으로 조합
-                        constructed_url = f"https://www.egbiz.or.kr/board/view.do?boardId={board_id}"
-                        all_links.append(constructed_url)
+        onclick_events = response.css(', '.join(self.onclick_selectors)).getall()
+        if onclick_events:
+            self.logger.info(f"{len(onclick_events)}개 onclick 이벤트 발견")
+            for onclick in onclick_events:
+                constructed_url = self.onclick_thread_url(onclick)
+                if constructed_url:
+                    all_links.append(constructed_url)
         
         # 모든 링크를 절대 URL로 변환하고 중복 제거
         clean_links = []
@@ -229,5 +319,5 @@ class EgbizSpider(scrapy.Spider):
                 absolute_url = response.urljoin(link)
                 clean_links.append(absolute_url)
         
-        # 중복 제거하여 반환
-        return list(set(clean_links))
+        # 순서를 유지하며 중복 제거하여 반환
+        return list(dict.fromkeys(clean_links))
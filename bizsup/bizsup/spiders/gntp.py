@@ -1,11 +1,20 @@
 import scrapy
 import logging
+from w3lib.url import url_query_parameter
 
+from bizsup.incremental import IncrementalMixin
+from bizsup.pagination import PaginationMixin
+from bizsup.rendering import RenderingProbeMixin
+from bizsup.selector_chain import SelectorChainMixin
 
-class GntpSpider(scrapy.Spider):
+
+class GntpSpider(PaginationMixin, IncrementalMixin, RenderingProbeMixin, SelectorChainMixin, scrapy.Spider):
     name = "gntp"
     allowed_domains = ["btp.or.kr"]
     start_urls = ["https://www.btp.or.kr/kor/CMS/Board/Board.do?mCode=MN013"]  # Verified URL from sample.html
+    thread_link_selector = 'table.bdListTbl tbody tr td.subject p.stitle a'  # 렌더링 판정용 스레드 링크 선택자
+    page_param = 'page'  # 페이지 번호 URL 파라미터 (PaginationMixin, 다음 페이지 URL에도 사용)
+    thread_id_param = 'board_seq'  # 스레드 ID URL 파라미터 (IncrementalMixin)
     
     def __init__(self, *args, **kwargs):
         super(GntpSpider, self).__init__(*args, **kwargs)
@@ -21,8 +30,6 @@ class GntpSpider(scrapy.Spider):
         self.logger.info(f"Processing page: {response.url}")
         
         # Try to find thread links - multiple selectors based on common BBS patterns
-        thread_links = []
-        
         # Try specific CSS patterns for this BBS style based on sample.html
         selectors = [
             'table.bdListTbl tbody tr td.subject p.stitle a::attr(href)',  # Matches the sample.html structure
@@ -39,13 +46,8 @@ class GntpSpider(scrapy.Spider):
             'a[onclick*="boardView"]::attr(href)'         # Links with boardView JS function
         ]
         
-        # Try each selector until we find matches
-        for selector in selectors:
-            links = response.css(selector).getall()
-            if links:
-                thread_links.extend(links)
-                self.logger.info(f"Found {len(links)} links with selector: {selector}")
-                break
+        # Try the selector that matched last time first (SelectorChainMixin)
+        thread_links = self.select_first(response, 'thread_links', selectors).getall()
         
         # Clean and convert to absolute URLs
         thread_urls = [response.urljoin(link) for link in thread_links if link]
@@ -59,53 +61,34 @@ class GntpSpider(scrapy.Spider):
                 continue
             filtered_thread_urls.append(url)
         
-        # Add to our collection
-        self.all_thread_urls.extend(filtered_thread_urls)
+        # Skip threads collected in previous runs (IncrementalMixin)
+        new_thread_urls = self.filter_seen_threads(filtered_thread_urls)
+        
+        # Yield thread URLs as soon as each list page is parsed
+        for thread_url in new_thread_urls:
+            self.all_thread_urls.append(thread_url)
+            yield {'thread_url': thread_url}
         
         # Log the found URLs
         self.logger.info(f"Found {len(filtered_thread_urls)} thread URLs on page")
         self.logger.info(f"Total thread URLs so far: {len(self.all_thread_urls)}")
         
-        # Determine current page number
-        current_page = self.get_current_page(response.url)
-        
-        # Proceed to next page if we haven't reached the limit
-        if current_page < self.max_pages:
-            next_page_url = self.get_next_page_url(response, current_page)
-            if next_page_url:
-                self.logger.info(f"Following next page: {next_page_url}")
-                yield scrapy.Request(
-                    url=next_page_url,
-                    callback=self.parse,
-                    meta={'dont_redirect': True, 'handle_httpstatus_list': [302]}
-                )
-        else:
-            # We've processed all pages, now output the collected URLs
-            self.logger.info(f"Completed all {self.max_pages} pages")
-            self.logger.info(f"Total thread URLs collected: {len(self.all_thread_urls)}")
-            
-            # Yield all collected thread URLs
-            for url in self.all_thread_urls:
-                yield {'thread_url': url}
+        # Request the remaining list pages (PaginationMixin)
+        # Stop paginating once a page holds only already seen threads
+        yield from self.list_page_requests(
+            response,
+            meta={'dont_redirect': True, 'handle_httpstatus_list': [302]},
+            stop=bool(filtered_thread_urls) and not new_thread_urls
+        )
     
     def get_current_page(self, url):
         """
-        Extract current page number from URL
+        Extract current page number from the page_param of the URL (page 1 if missing)
         """
-        # Default to page 1
-        current_page = 1
-        
-        # Try to extract page number from URL - based on sample.html pagination
-        page_params = ['page=', 'pageIndex=', 'p=']
-        for param in page_params:
-            if param in url:
-                try:
-                    current_page = int(url.split(param)[1].split('&')[0])
-                    break
-                except (ValueError, IndexError):
-                    pass
-        
-        return current_page
+        try:
+            return int(url_query_parameter(url, self.page_param, '1'))
+        except ValueError:
+            return 1
     
     def get_next_page_url(self, response, current_page):
         """
@@ -118,14 +101,9 @@ class GntpSpider(scrapy.Spider):
         
         # Try to find pagination links based on sample.html
         pagination_selectors = [
-            f'div.bdListPaging a[href*="page={next_page}"]::attr(href)',  # Matches the sample.html pagination structure
-            f'div.pagelist a[href*="page={next_page}"]::attr(href)',  # Alternative pagination class
-            f'a.nextblock::attr(href)',  # Next block link in pagination
-            f'a[href*="pageIndex={next_page}"]::attr(href)',
-            f'a[href*="page={next_page}"]::attr(href)',
-            f'a[href*="p={next_page}"]::attr(href)',
-            '.pagination a::attr(href)',
-            '.paging a::attr(href)'
+            f'div.bdListPaging a[href*="{self.page_param}={next_page}"]::attr(href)',  # Matches the sample.html pagination structure
+            f'div.pagelist a[href*="{self.page_param}={next_page}"]::attr(href)',  # Alternative pagination class
+            f'a[href*="{self.page_param}={next_page}"]::attr(href)',
         ]
         
         for selector in pagination_selectors:
@@ -135,35 +113,8 @@ class GntpSpider(scrapy.Spider):
                 next_page_url = response.urljoin(next_links[0])
                 break
         
-        # If we couldn't find the next page link, construct it manually
+        # If we couldn't find the next page link, set page_param on the current URL
         if not next_page_url:
-            # Get base URL without parameters
-            base_url = response.url.split('?')[0] if '?' in response.url else response.url
-            
-            # Extract parameters from current URL
-            params = {}
-            if '?' in response.url:
-                query_string = response.url.split('?')[1]
-                for param in query_string.split('&'):
-                    if '=' in param:
-                        key, value = param.split('=', 1)
-                        params[key] = value
-            
-            # Set page parameter
-            # Try common pagination parameter names
-            page_param_found = False
-            for param_name in ['pageIndex', 'page', 'p']:
-                if param_name in params:
-                    params[param_name] = str(next_page)
-                    page_param_found = True
-                    break
-            
-            # If no page parameter was found, use 'pageIndex' as default
-            if not page_param_found:
-                params['pageIndex'] = str(next_page)
-            
-            # Construct query string
-            query_parts = [f"{k}={v}" for k, v in params.items()]
-            next_page_url = f"{base_url}?{'&'.join(query_parts)}"
+            next_page_url = self.get_page_url(response.url, next_page)
         
         return next_page_url
@@ -1,18 +1,53 @@
 import scrapy
 import logging
 import os
-import requests
 from pathlib import Path
-from urllib.parse import urlparse, urljoin, unquote
-import html2text
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse, urljoin
+from scrapy_playwright.page import PageMethod
 
+from bizsup.attachments import attachment_spec
+from bizsup.incremental import IncrementalMixin
+from bizsup.markdown import html_to_markdown
+from bizsup.pagination import PaginationMixin
+from bizsup.rendering import RenderingProbeMixin, use_playwright_settings
+from bizsup.selector_chain import SelectorChainMixin
 
-class SnipSpider(scrapy.Spider):
+# portal 상세 페이지의 본문이 렌더링될 때까지 기다리는 스크립트
+# (timeout 이 지나도 오류 없이 false 를 반환해서 렌더링된 만큼은 그대로 수집)
+CONTENT_WAIT_SCRIPT = """
+async ({selector, timeout}) => {
+    const deadline = Date.now() + timeout;
+    while (!document.querySelector(selector)) {
+        if (Date.now() >= deadline) return false;
+        await new Promise(resolve => setTimeout(resolve, 100));
+    }
+    return true;
+}
+"""
+CONTENT_SELECTOR = ".content, .bbs_view_content, .view_cont, h3"
+
+
+class SnipSpider(PaginationMixin, IncrementalMixin, RenderingProbeMixin, SelectorChainMixin, scrapy.Spider):
     name = "snip"
     allowed_domains = ["snip.or.kr", "portal.snip.or.kr"]
     start_urls = ["https://www.snip.or.kr/SNIP/contents/Business1.do?page=1&viewCount=10"]
+    thread_link_selector = 'td.subject a'  # 렌더링 판정용 스레드 링크 선택자
+    page_param = 'page'  # 페이지 번호 URL 파라미터 (PaginationMixin)
+    thread_id_param = 'portlet'  # 스레드 ID URL 파라미터 (IncrementalMixin)
+    block_profile = 'text'  # 본문 텍스트만 읽으므로 스타일시트까지 차단 (scrapy_browser/browser.py)
+    # portal(:8443)은 부하가 걸리면 타임아웃이 나므로 속도 조절 범위를 좁힘 (bizsup/throttle.py)
+    throttle_min_delay = 1.0
+    throttle_max_concurrency = 2
     
+    # JavaScript 렌더링이 필요한 도메인 (목록 페이지는 서버 렌더링)
+    playwright_domains = ["portal.snip.or.kr"]
+    
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        # 목록 페이지 렌더링 판정과 관계없이 portal 상세 페이지는 Playwright 사용
+        use_playwright_settings(settings)
+
     def __init__(self, *args, **kwargs):
         super(SnipSpider, self).__init__(*args, **kwargs)
         self.all_thread_urls = []  # 모든 스레드 URL을 저장할 리스트
@@ -23,14 +58,12 @@ class SnipSpider(scrapy.Spider):
         self.attachments_dir = self.output_dir / "attachments"
         self.attachments_dir.mkdir(exist_ok=True)
     
-    def start_requests(self):
-        for url in self.start_urls:
-            yield scrapy.Request(
-                url=url,
-                callback=self.parse,
-                meta={"playwright": True}  # Playwright 렌더링 활성화
-            )
-            
+    def needs_playwright(self, url):
+        """
+        URL이 JavaScript 렌더링이 필요한 portal 페이지인지 확인
+        """
+        return any(domain in url for domain in self.playwright_domains)
+    
     def parse(self, response):
         """
         BBS 스타일 페이지에서 스레드 링크를 추출하고 페이지네이션을 처리
@@ -66,8 +99,26 @@ class SnipSpider(scrapy.Spider):
                 absolute_url = response.urljoin(url)
                 filtered_thread_urls.append(absolute_url)
         
-        # 수집된 URL을 리스트에 추가
-        self.all_thread_urls.extend(filtered_thread_urls)
+        # 이미 수집한 스레드는 건너뛰거나 조건부 요청으로 재검증 (IncrementalMixin)
+        request_thread_urls = self.threads_to_request(filtered_thread_urls)
+        
+        # 목록 페이지를 파싱하는 즉시 스레드 요청 생성 (마지막 페이지까지 기다리지 않음)
+        for thread_url in request_thread_urls:
+            self.all_thread_urls.append(thread_url)
+            yield scrapy.Request(
+                url=thread_url,
+                callback=self.parse_thread,
+                meta={
+                    'thread_url': thread_url,
+                    'index': self.thread_index(thread_url),  # 인덱스 추가
+                    'revalidate': True,  # 바뀌지 않은 스레드는 304 로 건너뜀
+                    'playwright': self.needs_playwright(thread_url),  # portal 페이지만 Playwright 렌더링
+                    # 본문이 렌더링된 뒤의 HTML 을 받도록 대기 (Playwright 요청에서만 사용)
+                    'playwright_page_methods': [
+                        PageMethod("evaluate", CONTENT_WAIT_SCRIPT, {"selector": CONTENT_SELECTOR, "timeout": 5000}),
+                    ],
+                }
+            )
         
         # 찾은 URL 로깅
         self.logger.info(f"Added {len(filtered_thread_urls)} filtered thread URLs")
@@ -77,44 +128,9 @@ class SnipSpider(scrapy.Spider):
         current_page = self.get_current_page(response.url)
         self.logger.info(f"Current page: {current_page}")
         
-        # 최대 페이지 수에 도달하지 않았다면 다음 페이지로 이동
-        if current_page < self.max_pages:
-            next_page_url = self.get_next_page_url(response, current_page)
-            if next_page_url:
-                self.logger.info(f"Following next page: {next_page_url}")
-                yield scrapy.Request(
-                    url=next_page_url,
-                    callback=self.parse,
-                    meta={"playwright": True}  # Playwright 렌더링 활성화
-                )
-            else:
-                self.logger.warning(f"Could not find next page URL for page {current_page}")
-                # 다음 페이지를 찾지 못했으므로 수집된 스레드 처리
-                for thread_url in self.all_thread_urls:
-                    yield scrapy.Request(
-                        url=thread_url,
-                        callback=self.parse_thread,
-                        meta={
-                            'thread_url': thread_url,
-                            'playwright': True  # Playwright 렌더링 활성화
-                        }
-                    )
-        else:
-            # 모든 페이지를 처리했으므로 수집된 스레드 처리
-            self.logger.info(f"Completed all {self.max_pages} pages")
-            self.logger.info(f"Total thread URLs collected: {len(self.all_thread_urls)}")
-            
-            # 수집된 모든 스레드 URL로 요청 생성
-            for idx, thread_url in enumerate(self.all_thread_urls):
-                yield scrapy.Request(
-                    url=thread_url,
-                    callback=self.parse_thread,
-                    meta={
-                        'thread_url': thread_url, 
-                        'index': idx + 1,  # 인덱스 추가
-                        'playwright': True  # Playwright 렌더링 활성화
-                    }
-                )
+        # 나머지 목록 페이지 요청 (PaginationMixin)
+        # 현재 페이지의 스레드가 모두 이미 수집한 것이면 페이지네이션 중단
+        yield from self.list_page_requests(response, stop=self.all_threads_seen(filtered_thread_urls))
     
     def get_current_page(self, url):
         """
@@ -172,19 +188,23 @@ class SnipSpider(scrapy.Spider):
         index = response.meta.get('index', 0)  # 인덱스 가져오기, 기본값 0
         self.logger.info(f"Processing thread: {thread_url}")
         
+        # 이전 크롤링 이후 바뀌지 않은 스레드는 다시 파싱하지 않음
+        if self.thread_unchanged(response):
+            return
+        
         # JavaScript 렌더링 대기 (portal 사이트의 경우)
-        if "playwright" in response.meta and "portal.snip.or.kr" in response.url:
-            try:
-                # JavaScript 렌더링 대기
-                response.meta["playwright_page"].wait_for_selector(".content, .bbs_view_content, .view_cont, h3", timeout=5000)
+        # 대기는 요청의 playwright_page_methods 로 응답 HTML 을 만들기 전에 끝남
+        if response.meta.get("playwright") and "portal.snip.or.kr" in response.url:
+            page_methods = response.meta.get("playwright_page_methods") or []
+            if page_methods and page_methods[0].result:
                 self.logger.info(f"Waited for JS rendering on portal site")
-                
-                # 로그인 필요 여부 확인
-                login_text = response.css('body::text').re_first(r'로그인.*필요|로그인.*가능')
-                if login_text or ('로그인' in response.text and '필요' in response.text):
-                    self.logger.warning(f"Login required for this page: {response.url}")
-            except Exception as e:
-                self.logger.warning(f"Timeout waiting for content selectors: {str(e)}")
+            else:
+                self.logger.warning(f"Timeout waiting for content selectors: {response.url}")
+            
+            # 로그인 필요 여부 확인
+            login_text = response.css('body::text').re_first(r'로그인.*필요|로그인.*가능')
+            if login_text or ('로그인' in response.text and '필요' in response.text):
+                self.logger.warning(f"Login required for this page: {response.url}")
         
         # 게시글 제목 추출 - 실제 HTML 구조에 맞게 다양한 선택자 시도
         title = None
@@ -203,12 +223,12 @@ class SnipSpider(scrapy.Spider):
             '.page_tit::text'           # portal 사이트 추가 선택자
         ]
         
-        for selector in title_selectors:
-            title = response.css(selector).get()
-            if title and title.strip():
-                title = title.strip()
-                self.logger.info(f"Found title using selector: {selector}")
-                break
+        # 이전에 맞은 선택자부터 시도 (SelectorChainMixin)
+        title = self.select_first(
+            response, 'title', title_selectors, check=lambda result: (result.get() or '').strip()
+        ).get()
+        if title:
+            title = title.strip()
         
         # 제목 추출 시도 2: 테이블 기반 레이아웃
         if not title:
@@ -229,10 +249,6 @@ class SnipSpider(scrapy.Spider):
             
             self.logger.warning(f"Could not extract title, using fallback: {title}")
         
-        # 파일명에 사용할 수 없는 문자 제거
-        safe_title = ''.join(c for c in title if c.isalnum() or c in ' ._-').strip()
-        safe_title = safe_title[:50]  # 파일명 길이 제한
-        
         # 게시글 본문 내용 추출
         content = None
         
@@ -251,65 +267,38 @@ class SnipSpider(scrapy.Spider):
             '.article'                # portal 추가 선택자
         ]
         
-        for selector in content_selectors:
-            content = response.css(selector).get()
-            if content:
-                self.logger.info(f"Found content using selector: {selector}")
-                break
+        # 이전에 맞은 선택자부터 시도 (SelectorChainMixin)
+        content = self.select_first(response, 'content', content_selectors)
         
         # 본문을 찾지 못한 경우 대체 방법 시도
         if not content:
             # 테이블 기반 레이아웃에서 본문 찾기
             content_row = response.xpath('//th[contains(text(), "내용")]/following-sibling::td')
             if content_row:
-                content = content_row.get()
+                content = content_row
         
         # 여전히 본문을 찾지 못한 경우 div.content 같은 일반적인 선택자 시도
         if not content:
-            content = response.css('div.content, div.entry, article').get()
+            content = response.css('div.content, div.entry, article')
+        
+        # 첨부파일 저장 디렉토리 (인덱스 번호 사용)
+        index_dir = self.output_dir / f"{index}"
         
+        # HTML을 Markdown으로 변환 (공유 변환기가 선택자의 lxml 트리를 바로 사용)
+        # 파일 쓰기와 디렉토리 생성은 MarkdownWriterPipeline / AttachmentPipeline 에서 수행
+        markdown_content = None
+        author = None
+        date = None
         if content:
-            # HTML 문서 파싱을 위해 BeautifulSoup 사용
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            # HTML을 Markdown으로 변환
-            h2t = html2text.HTML2Text()
-            h2t.ignore_links = False  # 링크 유지
-            h2t.ignore_images = False  # 이미지 유지
-            h2t.ignore_tables = False  # 테이블 유지
-            h2t.body_width = 0  # 줄바꿈 방지
-            h2t.unicode_snob = True  # 유니코드 문자 유지
-            h2t.mark_code = True  # 코드 블록 마킹
-            
-            # HTML 내용을 마크다운으로 변환
-            markdown_content = h2t.handle(str(soup))
-            
-            # 인덱스 번호를 사용해 파일 저장
-            # 디렉토리 생성 (첨부파일 저장용)
-            index_dir = self.output_dir / f"{index}"
-            index_dir.mkdir(exist_ok=True)
+            markdown_content = html_to_markdown(content[0], self.settings.get('MARKDOWN_ENGINE', 'html2text'))
             
-            # 파일 저장
-            md_filename = self.output_dir / f"{index}.md"
-            with open(md_filename, 'w', encoding='utf-8') as f:
-                # 메타데이터 추가
-                f.write(f"# {title}\n\n")
-                f.write(f"원본 URL: {thread_url}\n\n")
-                
-                # 게시글 정보 추가
-                author = response.css('.writer::text, .info span:first-child::text').get()
-                if author:
-                    f.write(f"작성자: {author.strip()}\n\n")
-                
-                date = response.css('.date::text, .info span:last-child::text').get()
-                if date:
-                    f.write(f"작성일: {date.strip()}\n\n")
-                
-                # 본문 내용
-                f.write("## 내용\n\n")
-                f.write(markdown_content)  # 변환된 마크다운 내용 저장
-            
-            self.logger.info(f"Saved content as Markdown to {md_filename}")
+            # 게시글 정보 추출 (Markdown 머리말에 사용)
+            author = response.css('.writer::text, .info span:first-child::text').get()
+            if author:
+                author = author.strip()
+            date = response.css('.date::text, .info span:last-child::text').get()
+            if date:
+                date = date.strip()
         else:
             self.logger.error(f"Failed to extract content from {thread_url}")
         
@@ -364,131 +353,57 @@ class SnipSpider(scrapy.Spider):
         
         self.logger.info(f"Found {len(attachment_links)} unique attachments")
         
-        # 첨부파일 다운로드 - 인덱스 디렉토리에 저장
+        # 첨부파일 정보 수집 - 실제 다운로드는 AttachmentPipeline 에서 수행
+        attachments = []
         for i, att_url in enumerate(attachment_links):
-            try:
-                # 상대 URL을 절대 URL로 변환
-                absolute_att_url = response.urljoin(att_url)
-                
-                # 파일 이름 결정
-                attachment_text = ""
-                if i < len(attachment_texts):
-                    attachment_text = attachment_texts[i]
-                
-                # URL 매개변수에서 정보 추출
-                file_seq = "unknown"
-                file_no = "0"
-                
-                if "seq=" in absolute_att_url:
-                    try:
-                        file_seq = absolute_att_url.split("seq=")[1].split("&")[0]
-                    except:
-                        pass
-                        
-                if "fileSeq=" in absolute_att_url:
-                    try:
-                        file_no = absolute_att_url.split("fileSeq=")[1].split("&")[0]
-                    except:
-                        pass
-                
-                # 최종 파일명 결정 (링크 텍스트와 URL 정보 결합)
-                if attachment_text:
-                    # 링크 텍스트에서 추출한 이름 사용
-                    base_filename = f"{attachment_text}"
-                    # 파일명에 사용할 수 없는 문자 제거
-                    base_filename = ''.join(c for c in base_filename if c.isalnum() or c in ' ._-').strip()
-                else:
-                    # URL 매개변수에서 정보 추출해 고유한 파일명 생성
-                    base_filename = f"file_{file_seq}_{file_no}"
-                
-                # 파일명 길이 제한
-                base_filename = base_filename[:100]
-                
-                # 첨부파일 다운로드
-                self.logger.info(f"Downloading attachment: {absolute_att_url}")
-                
-                # 파일 다운로드 (브라우저와 같은 헤더 설정)
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Referer': response.url,
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                    'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7',
-                    'Connection': 'keep-alive',
-                    'Upgrade-Insecure-Requests': '1'
-                }
-                
-                # 쿠키 전달 (응답의 쿠키 재사용)
-                cookies = {}
-                for cookie in response.headers.getlist('Set-Cookie'):
-                    if b'=' in cookie:
-                        key, value = cookie.split(b'=', 1)
-                        if b';' in value:
-                            value = value.split(b';', 1)[0]
-                        cookies[key.decode('utf-8')] = value.decode('utf-8')
-                
-                r = requests.get(absolute_att_url, headers=headers, cookies=cookies, stream=True, allow_redirects=True)
-                
-                if r.status_code == 200:
-                    # 파일명 확인 - Content-Disposition 헤더에서 파일명 추출 시도
-                    filename = base_filename
-                    if 'Content-Disposition' in r.headers:
-                        cd = r.headers['Content-Disposition']
-                        if 'filename=' in cd:
-                            try:
-                                server_filename = cd.split('filename=')[1].strip('"\'')
-                                if server_filename:
-                                    # 서버가 제공한 파일명 사용
-                                    filename = unquote(server_filename)
-                            except Exception as e:
-                                self.logger.error(f"Error parsing filename: {str(e)}")
-                    
-                    # 파일 확장자 확인
-                    if "." not in filename[-5:]:
-                        # Content-Type 헤더로 확장자 추측
-                        if 'Content-Type' in r.headers:
-                            content_type = r.headers['Content-Type'].lower()
-                            if 'application/pdf' in content_type:
-                                filename += '.pdf'
-                            elif 'application/msword' in content_type or 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' in content_type:
-                                filename += '.doc'
-                            elif 'application/vnd.ms-excel' in content_type or 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' in content_type:
-                                filename += '.xls'
-                            elif 'image/' in content_type:
-                                ext = content_type.replace('image/', '')
-                                filename += f'.{ext}'
-                            else:
-                                filename  # 확장자가 없으면 그대로 사용
-                    
-                    # 파일명에 사용할 수 없는 문자 제거
-                    filename = ''.join(c for c in filename if c.isalnum() or c in ' ._-').strip()
-                    
-                    # 파일 저장 (인덱스 디렉토리에 저장)
-                    att_path = index_dir / filename
-                    
-                    # HTML 오류 페이지 확인
-                    is_html = False
-                    content_peek = r.content[:1024] if len(r.content) > 0 else b''
-                    
-                    if b'<!doctype html>' in content_peek.lower() or b'<html' in content_peek.lower():
-                        is_html = True
-                        self.logger.warning(f"Received HTML instead of file. Site may require authentication for downloads.")
-                        # 오류 페이지로 판단되면 저장하지 않음
-                        continue
+            # 상대 URL을 절대 URL로 변환
+            absolute_att_url = response.urljoin(att_url)
+            
+            # 파일 이름 결정
+            attachment_text = ""
+            if i < len(attachment_texts):
+                attachment_text = attachment_texts[i]
+            
+            # URL 매개변수에서 정보 추출
+            file_seq = "unknown"
+            file_no = "0"
+            
+            if "seq=" in absolute_att_url:
+                try:
+                    file_seq = absolute_att_url.split("seq=")[1].split("&")[0]
+                except:
+                    pass
                     
-                    # 파일 저장
-                    with open(att_path, 'wb') as f:
-                        for chunk in r.iter_content(chunk_size=8192):
-                            f.write(chunk)
-                    self.logger.info(f"Successfully downloaded attachment to {att_path}")
-                else:
-                    self.logger.error(f"Failed to download attachment: HTTP {r.status_code}")
+            if "fileSeq=" in absolute_att_url:
+                try:
+                    file_no = absolute_att_url.split("fileSeq=")[1].split("&")[0]
+                except:
+                    pass
+            
+            # 최종 파일명 결정 (링크 텍스트와 URL 정보 결합)
+            if attachment_text:
+                # 링크 텍스트에서 추출한 이름 사용
+                base_filename = f"{attachment_text}"
+                # 파일명에 사용할 수 없는 문자 제거
+                base_filename = ''.join(c for c in base_filename if c.isalnum() or c in ' ._-').strip()
+            else:
+                # URL 매개변수에서 정보 추출해 고유한 파일명 생성
+                base_filename = f"file_{file_seq}_{file_no}"
+            
+            # 파일명 길이 제한
+            base_filename = base_filename[:100]
             
-            except Exception as e:
-                self.logger.error(f"Error downloading attachment: {str(e)}")
+            attachments.append(attachment_spec(response, absolute_att_url, base_filename))
         
         yield {
             'url': thread_url,
             'title': title,
             'content_saved': bool(content),
-            'attachments_count': len(attachment_links)
+            'markdown': markdown_content,
+            'markdown_path': str(self.output_dir / f"{index}.md"),
+            'author': author,
+            'date': date,
+            'attachments_count': len(attachment_links),
+            'attachment_dir': str(index_dir),
+            'attachments': attachments
         }
\ No newline at end of file
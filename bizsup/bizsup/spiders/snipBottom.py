@@ -1,11 +1,18 @@
 import scrapy
 import logging
 
+from bizsup.incremental import IncrementalMixin
+from bizsup.pagination import PaginationMixin
+from bizsup.rendering import RenderingProbeMixin
 
-class SnipbottomSpider(scrapy.Spider):
+
+class SnipbottomSpider(PaginationMixin, IncrementalMixin, RenderingProbeMixin, scrapy.Spider):
     name = "snipBottom"
     allowed_domains = ["snip.or.kr"]
     start_urls = ["https://www.snip.or.kr/SNIP/contents/Business1.do"]
+    thread_link_selector = 'td.subject a'  # 렌더링 판정용 스레드 링크 선택자
+    page_param = 'page'  # 페이지 번호 URL 파라미터 (PaginationMixin)
+    thread_id_param = 'portlet'  # 스레드 ID URL 파라미터 (IncrementalMixin)
     
     def __init__(self, *args, **kwargs):
         super(SnipbottomSpider, self).__init__(*args, **kwargs)
@@ -47,8 +54,13 @@ class SnipbottomSpider(scrapy.Spider):
                 absolute_url = response.urljoin(url)
                 filtered_thread_urls.append(absolute_url)
         
-        # 수집된 URL을 리스트에 추가
-        self.all_thread_urls.extend(filtered_thread_urls)
+        # 이전 실행에서 이미 수집한 스레드는 건너뜀 (IncrementalMixin)
+        new_thread_urls = self.filter_seen_threads(filtered_thread_urls)
+        
+        # 목록 페이지를 파싱하는 즉시 스레드 요청 생성 (마지막 페이지까지 기다리지 않음)
+        for thread_url in new_thread_urls:
+            self.all_thread_urls.append(thread_url)
+            yield {'thread_url': thread_url}
         
         # 찾은 URL 로깅
         self.logger.info(f"Added {len(filtered_thread_urls)} filtered thread URLs")
@@ -58,28 +70,9 @@ class SnipbottomSpider(scrapy.Spider):
         current_page = self.get_current_page(response.url)
         self.logger.info(f"Current page: {current_page}")
         
-        # 최대 페이지 수에 도달하지 않았다면 다음 페이지로 이동
-        if current_page < self.max_pages:
-            next_page_url = self.get_next_page_url(response, current_page)
-            if next_page_url:
-                self.logger.info(f"Following next page: {next_page_url}")
-                yield scrapy.Request(
-                    url=next_page_url,
-                    callback=self.parse
-                )
-            else:
-                self.logger.warning(f"Could not find next page URL for page {current_page}")
-                # 모든 페이지를 처리했으므로 수집된 URL 출력
-                for url in self.all_thread_urls:
-                    yield {'thread_url': url}
-        else:
-            # 모든 페이지를 처리했으므로 수집된 URL 출력
-            self.logger.info(f"Completed all {self.max_pages} pages")
-            self.logger.info(f"Total thread URLs collected: {len(self.all_thread_urls)}")
-            
-            # 수집된 모든 스레드 URL 반환
-            for url in self.all_thread_urls:
-                yield {'thread_url': url}
+        # 나머지 목록 페이지 요청 (PaginationMixin)
+        # 현재 페이지의 스레드가 모두 이미 수집한 것이면 페이지네이션 중단
+        yield from self.list_page_requests(response, stop=bool(filtered_thread_urls) and not new_thread_urls)
     
     def get_current_page(self, url):
         """
@@ -0,0 +1,181 @@
+# 호스트별 적응형 요청 속도 조절 (AIMD)
+#
+# 고정된 DOWNLOAD_DELAY 는 빠른 서버에는 너무 느리고, 느려지기 시작한 포털
+# (snip 의 :8443 포털 등)에는 너무 공격적이다. AdaptiveThrottle 은 호스트마다
+# 응답 시간과 오류를 보고 지연 시간(delay)과 동시 요청 수(concurrency)를 조절한다.
+#
+# - 응답이 목표 응답 시간(ADAPTIVE_THROTTLE_TARGET_LATENCY) 안에 오면 조금씩 빠르게:
+#   창(window, 현재 동시 요청 수와 ADAPTIVE_THROTTLE_WINDOW 중 큰 수만큼의 성공 응답)마다
+#   동시 요청 수 +1, 요청 속도(1/delay) +RATE_STEP
+#   작은 공공기관 포털을 상대로 하므로 DOWNLOAD_DELAY / CONCURRENT_REQUESTS_PER_DOMAIN
+#   (3초, 1개)에서 시작해 창마다 천천히 늘린다.
+# - 타임아웃/연결 오류/429/5xx 또는 목표보다 느린 응답이면 크게 느리게:
+#   동시 요청 수와 요청 속도를 절반으로 (지연 시간은 두 배, 창마다 한 번만)
+#
+# 페이지 요청은 Scrapy 다운로더 슬롯(slot.delay, slot.concurrency)에 바로 반영하고,
+# Scrapy 를 거치지 않는 첨부파일 다운로드(AttachmentPipeline)는 attachment_slot() 으로
+# 같은 호스트 상태를 따르며 결과도 같은 상태에 기록한다.
+# 사이트별 하한/상한은 스파이더 속성(throttle_min_delay, throttle_max_delay,
+# throttle_max_concurrency)으로 설정 기본값을 덮어쓴다.
+
+import asyncio
+from contextlib import asynccontextmanager
+from time import monotonic
+
+
+# 서버가 부담을 받고 있다는 뜻으로 보는 응답 상태 코드
+OVERLOAD_STATUSES = (429, 500, 502, 503, 504, 520, 522, 524)
+
+
+class HostState:
+    """
+    호스트 하나의 현재 지연 시간, 동시 요청 수, 평균 응답 시간
+    """
+
+    def __init__(self, delay, concurrency):
+        self.delay = delay
+        self.concurrency = concurrency
+        self.latency = None  # 지수 이동 평균 (초)
+        self.window = 0  # 마지막 조정 이후 받은 성공 응답 수
+        self.decreased_at = 0.0
+        self.attachments_active = 0
+        self.attachment_started_at = 0.0
+
+
+class AdaptiveThrottle:
+    """
+    호스트별 AIMD 속도 조절기
+
+    record(host, latency, ok) 로 결과를 기록하면 상태를 조정하고
+    throttle/<host>/{delay,concurrency,latency_ms} 통계를 갱신한다.
+    조정 횟수는 throttle/{increase,decrease} 통계에 기록한다.
+    """
+
+    # 창마다 늘리는 요청 속도 (초당 요청 수), 지연 시간을 처음 늘릴 때의 최소값 (초), 이동 평균 가중치
+    rate_step = 0.1
+    min_backoff_delay = 0.25
+    latency_weight = 0.3
+
+    def __init__(self, start_delay=3.0, start_concurrency=1, min_delay=1.0, max_delay=30.0,
+                 max_concurrency=2, target_latency=2.0, min_window=10, stats=None):
+        self.start_delay = start_delay
+        self.start_concurrency = start_concurrency
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.min_window = max(1, min_window)
+        self.stats = stats
+        self.hosts = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            start_delay=settings.getfloat("DOWNLOAD_DELAY", 3.0),
+            start_concurrency=max(1, settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN", 1)),
+            min_delay=settings.getfloat("ADAPTIVE_THROTTLE_MIN_DELAY", 1.0),
+            max_delay=settings.getfloat("ADAPTIVE_THROTTLE_MAX_DELAY", 30.0),
+            max_concurrency=settings.getint("ADAPTIVE_THROTTLE_MAX_CONCURRENCY", 2),
+            target_latency=settings.getfloat("ADAPTIVE_THROTTLE_TARGET_LATENCY", 2.0),
+            min_window=settings.getint("ADAPTIVE_THROTTLE_WINDOW", 10),
+            stats=crawler.stats,
+        )
+
+    def configure(self, spider):
+        """
+        스파이더 속성으로 사이트별 하한/상한 적용
+        """
+        self.min_delay = float(getattr(spider, "throttle_min_delay", self.min_delay))
+        self.max_delay = float(getattr(spider, "throttle_max_delay", self.max_delay))
+        self.max_concurrency = int(getattr(spider, "throttle_max_concurrency", self.max_concurrency))
+        self.start_delay = min(max(self.start_delay, self.min_delay), self.max_delay)
+        self.start_concurrency = min(self.start_concurrency, self.max_concurrency)
+
+    def state(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(self.start_delay, self.start_concurrency)
+        return state
+
+    def record(self, host, latency=None, ok=True):
+        """
+        요청 결과 기록 후 AIMD 로 상태 조정 (latency 가 None 이면 응답 시간은 반영하지 않음)
+        """
+        state = self.state(host)
+        if latency is not None:
+            if state.latency is None:
+                state.latency = latency
+            else:
+                state.latency += self.latency_weight * (latency - state.latency)
+
+        slow = latency is not None and latency > self.target_latency
+        if not ok or slow:
+            self.decrease(state)
+        else:
+            state.window += 1
+            if state.window >= max(state.concurrency, self.min_window):
+                self.increase(state)
+        self.update_stats(host, state)
+        return state
+
+    def increase(self, state):
+        state.window = 0
+        concurrency = min(state.concurrency + 1, self.max_concurrency)
+        delay = max(1 / (1 / state.delay + self.rate_step) if state.delay else 0.0, self.min_delay)
+        if (concurrency, delay) != (state.concurrency, state.delay):
+            state.concurrency, state.delay = concurrency, delay
+            self.inc_stat("throttle/increase")
+
+    def decrease(self, state):
+        state.window = 0
+        # 같은 혼잡 때문에 이어서 들어온 오류로 여러 번 줄이지 않도록 창마다 한 번만
+        now = monotonic()
+        if now - state.decreased_at < max(state.delay, state.latency or 0):
+            return
+        state.decreased_at = now
+        state.concurrency = max(1, state.concurrency // 2)
+        state.delay = min(max(state.delay * 2, self.min_backoff_delay, self.min_delay), self.max_delay)
+        self.inc_stat("throttle/decrease")
+
+    def apply(self, host, slot):
+        """
+        호스트 상태를 Scrapy 다운로더 슬롯에 반영
+        """
+        state = self.state(host)
+        slot.delay = state.delay
+        slot.concurrency = state.concurrency
+
+    @asynccontextmanager
+    async def attachment_slot(self, host, downloader_slot=None):
+        """
+        첨부파일 다운로드 하나를 호스트 상태의 지연 시간과 동시 요청 수에 맞춰 실행
+
+        downloader_slot 을 넘기면 같은 호스트에서 전송 중인 페이지 요청도 동시 요청 수에 포함한다.
+        """
+        state = self.state(host)
+        while True:
+            transferring = len(downloader_slot.transferring) if downloader_slot is not None else 0
+            last_started = max(state.attachment_started_at, getattr(downloader_slot, "lastseen", 0.0))
+            wait = last_started + state.delay - monotonic()
+            if state.attachments_active + transferring < state.concurrency and wait <= 0:
+                break
+            await asyncio.sleep(max(wait, 0.05))
+        state.attachments_active += 1
+        state.attachment_started_at = monotonic()
+        try:
+            yield state
+        finally:
+            state.attachments_active -= 1
+
+    def update_stats(self, host, state):
+        if self.stats is None:
+            return
+        self.stats.set_value(f"throttle/{host}/delay", round(state.delay, 3))
+        self.stats.set_value(f"throttle/{host}/concurrency", state.concurrency)
+        if state.latency is not None:
+            self.stats.set_value(f"throttle/{host}/latency_ms", int(state.latency * 1000))
+
+    def inc_stat(self, key):
+        if self.stats is not None:
+            self.stats.inc_value(key)
@@ -0,0 +1,169 @@
+import os
+
+import pytest
+
+from bizsup import attachments
+from bizsup.attachments import PARTIAL_HASH_SIZE, BlobStore, link_file, stream_to_file
+
+
+def chunked(data, size=4096):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def leftovers(directory):
+    return [path.name for path in directory.rglob(".*.part")]
+
+
+class CountingChunks:
+    """
+    몇 개의 청크를 꺼냈는지 세는 청크 이터레이터
+    """
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.taken = 0
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.taken += 1
+            yield chunk
+
+
+def test_stream_to_file_writes_all_chunks(tmp_path):
+    data = os.urandom(50_000)
+    path = tmp_path / "file.bin"
+    # 앞부분 판별용으로 모으는 작은 청크도 빠지지 않아야 함
+    assert stream_to_file(chunked(data, 100), path) is True
+    assert path.read_bytes() == data
+    assert leftovers(tmp_path) == []
+
+
+def test_stream_to_file_rejects_html_error_page(tmp_path):
+    path = tmp_path / "file.pdf"
+    body = b"<!DOCTYPE html><html><body>error</body></html>"
+    assert stream_to_file([body], path) is False
+    assert not path.exists()
+    assert leftovers(tmp_path) == []
+
+
+def test_stream_to_file_failure_keeps_previous_file(tmp_path):
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"old")
+
+    def broken():
+        yield b"x" * 2048
+        raise ConnectionError("reset")
+
+    with pytest.raises(ConnectionError):
+        stream_to_file(broken(), path)
+    assert path.read_bytes() == b"old"
+    assert leftovers(tmp_path) == []
+
+
+def test_stream_to_file_concurrent_writers_use_separate_temp_files(tmp_path):
+    path = tmp_path / "file.bin"
+    first, second = os.urandom(10_000), os.urandom(10_000)
+
+    def interleaved():
+        yield first[:5000]
+        # 첫 번째 쓰기의 임시 파일이 열려 있는 동안 같은 경로로 한 번 더 저장
+        assert stream_to_file(chunked(second), path) is True
+        assert path.read_bytes() == second
+        yield first[5000:]
+
+    assert stream_to_file(interleaved(), path) is True
+    assert path.read_bytes() == first
+    assert leftovers(tmp_path) == []
+
+
+def test_link_file_hardlinks(tmp_path):
+    src = tmp_path / "src"
+    src.write_bytes(b"data")
+    dst = tmp_path / "dst"
+    dst.write_bytes(b"old")
+    link_file(src, dst)
+    assert os.path.samefile(src, dst)
+    # 이미 같은 파일이면 그대로
+    link_file(src, dst)
+    assert os.path.samefile(src, dst)
+
+
+def test_link_file_falls_back_to_copy(tmp_path, monkeypatch):
+    def no_link(src, dst):
+        raise OSError("cross-device link")
+
+    monkeypatch.setattr(attachments.os, "link", no_link)
+    src = tmp_path / "src"
+    src.write_bytes(b"data")
+    dst = tmp_path / "dst"
+    link_file(src, dst)
+    assert dst.read_bytes() == b"data"
+    assert not os.path.samefile(src, dst)
+    assert leftovers(tmp_path) == []
+
+
+def test_blob_store_stores_and_dedups(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    data = os.urandom(PARTIAL_HASH_SIZE * 2 + 123)
+
+    blob, status = store.store(chunked(data))
+    assert status == "stored"
+    assert blob.read_bytes() == data
+    assert blob.parent.name.startswith(f"{len(data)}-")
+
+    # 같은 내용을 끝까지 받으면 기존 blob 사용
+    again, status = store.store(chunked(data))
+    assert (again, status) == (blob, "linked")
+    assert len(list(blob.parent.iterdir())) == 1
+    assert leftovers(tmp_path) == []
+
+
+def test_blob_store_skips_rest_on_partial_hash_match(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    data = os.urandom(PARTIAL_HASH_SIZE * 4)
+    blob, _ = store.store(chunked(data))
+
+    chunks = CountingChunks(chunked(data))
+    found, status = store.store(chunks, expected_size=len(data))
+    assert (found, status) == (blob, "skipped")
+    # 앞부분 해시를 계산할 만큼만 받고 멈춤
+    assert chunks.taken == PARTIAL_HASH_SIZE // 4096
+    assert leftovers(tmp_path) == []
+
+
+def test_blob_store_same_prefix_different_size_is_new_blob(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    data = os.urandom(PARTIAL_HASH_SIZE * 2)
+    first, _ = store.store(chunked(data))
+    longer = data + b"tail"
+
+    second, status = store.store(chunked(longer), expected_size=len(longer))
+    assert status == "stored"
+    assert second != first
+    assert second.read_bytes() == longer
+
+
+def test_blob_store_small_files(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    blob, status = store.store([b"hello"], expected_size=5)
+    assert status == "stored"
+    assert store.store([b"hel", b"lo"], expected_size=5) == (blob, "linked")
+    assert store.store([b"world"], expected_size=5)[1] == "stored"
+
+
+def test_blob_store_rejects_html_error_page(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    assert store.store([b"<html><body>404</body></html>"]) is None
+    assert list((tmp_path / "blobs").iterdir()) == []
+
+
+def test_blob_store_failure_leaves_no_partial_blob(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+
+    def broken():
+        yield os.urandom(PARTIAL_HASH_SIZE)
+        raise ConnectionError("reset")
+
+    with pytest.raises(ConnectionError):
+        store.store(broken())
+    assert list((tmp_path / "blobs").iterdir()) == []
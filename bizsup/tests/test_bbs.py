@@ -0,0 +1,50 @@
+from scrapy.http import HtmlResponse
+from scrapy.settings import Settings
+from scrapy.utils.test import get_crawler
+
+from bizsup.sites import SitePlan
+from bizsup.spiders.bbs import spider_class
+
+
+def make_spidercls(rendering, **kwargs):
+    return spider_class(SitePlan("local", "http://127.0.0.1/board/list?page=1", rendering=rendering, **kwargs))
+
+
+def browser_components(settings):
+    names = list(settings.getdict("DOWNLOADER_MIDDLEWARES")) + list(settings.getdict("SPIDER_MIDDLEWARES"))
+    return [name for name in names if name.startswith("scrapy_browser.")]
+
+
+def test_fixed_rendering_skips_the_probe(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for rendering, needs_js in (("static", False), ("browser", True)):
+        spidercls = make_spidercls(rendering)
+        settings = Settings({"RENDERING_VERDICTS_FILE": str(tmp_path / "verdicts.json")})
+        spidercls.update_settings(settings)
+        assert bool(browser_components(settings)) is needs_js
+
+        crawler = get_crawler(spidercls, {"RENDERING_VERDICTS_FILE": str(tmp_path / "verdicts.json")})
+        spider = spidercls.from_crawler(crawler)
+        assert spider.use_playwright is needs_js
+        [request] = list(spider.start_requests())
+        assert request.callback == spider.parse
+
+
+def test_download_button_uses_the_file_name_next_to_it(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    spidercls = make_spidercls("static", attachment_selectors=(".bbs_filedown a.sbtn_down", "a.file"))
+    spider = spidercls.from_crawler(get_crawler(spidercls, {"INCREMENTAL_CRAWL": False}))
+    response = HtmlResponse(
+        "http://127.0.0.1/board/view?id=1",
+        body="""
+        <dl class="bbs_filedown">
+          <dd>공고문.hwp <a class="sbtn_down" href="/fileDown?seq=1">다운로드</a></dd>
+        </dl>
+        <a class="file" href="/fileDown?seq=2">첨부.pdf</a>
+        """.encode(),
+        encoding="utf-8",
+    )
+    assert spider.extract_attachments(response) == [
+        ("/fileDown?seq=1", "공고문.hwp"),
+        ("/fileDown?seq=2", "첨부.pdf"),
+    ]
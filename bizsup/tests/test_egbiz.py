@@ -0,0 +1,51 @@
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from bizsup.spiders.egbiz import EgbizSpider
+
+
+PAGE = """
+<html><body>
+  <ul class="notice-list">
+    <li><a href="/board/view.do?boardId=1">공지 1</a></li>
+    <li><a href="/board/view.do?boardId=2">공지 2</a></li>
+  </ul>
+  <ul class="biz_list">
+    <li><a href="/biz/view.do?seq=10">사업 10</a></li>
+  </ul>
+  <div class="news_list"><a href="javascript:void(0)" onclick="fnView('30')">뉴스 30</a></div>
+  <table><tr onclick="fnView('31')"><td>행 31</td></tr></table>
+</body></html>
+"""
+
+
+def make_spider():
+    crawler = get_crawler(EgbizSpider)
+    return EgbizSpider.from_crawler(crawler)
+
+
+def test_extract_thread_links_keeps_links_from_every_selector():
+    spider = make_spider()
+    response = HtmlResponse("https://www.egbiz.or.kr/index.do", body=PAGE.encode(), encoding="utf-8")
+    links = spider.extract_thread_links(response)
+    assert links == [
+        "https://www.egbiz.or.kr/board/view.do?boardId=1",
+        "https://www.egbiz.or.kr/board/view.do?boardId=2",
+        "https://www.egbiz.or.kr/biz/view.do?seq=10",
+        "https://www.egbiz.or.kr/board/view.do?boardId=30",
+        "https://www.egbiz.or.kr/board/view.do?boardId=31",
+    ]
+
+
+def test_page_thread_links_combines_links_and_onclicks():
+    spider = make_spider()
+    result = {
+        "button": ".more-btn",
+        "loaded": True,
+        "links": ["https://www.egbiz.or.kr/board/view.do?boardId=3"],
+        "onclicks": ["fnView('3')", "goView(4)", "alert(1)"],
+    }
+    assert spider.page_thread_links(result) == [
+        "https://www.egbiz.or.kr/board/view.do?boardId=3",
+        "https://www.egbiz.or.kr/board/view.do?boardId=4",
+    ]
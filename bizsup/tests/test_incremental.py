@@ -0,0 +1,154 @@
+import scrapy
+from scrapy.http import Request, Response
+from scrapy.settings import Settings
+from scrapy.utils.test import get_crawler
+
+from bizsup.incremental import IncrementalMixin, SeenThreadIndex, ThreadPageCachePolicy
+
+
+LAST_MODIFIED = "Mon, 05 Oct 2026 10:00:00 GMT"
+
+REVALIDATING_CACHE = {"HTTPCACHE_ENABLED": True, "HTTPCACHE_POLICY": "bizsup.incremental.ThreadPageCachePolicy"}
+
+
+class BoardSpider(IncrementalMixin, scrapy.Spider):
+    name = "board"
+    thread_id_param = "wr_id"
+
+
+def make_spider(tmp_path, **settings):
+    settings.setdefault("SEEN_THREADS_DB", str(tmp_path / "seen.db"))
+    crawler = get_crawler(BoardSpider, settings)
+    spider = BoardSpider.from_crawler(crawler)
+    crawler.spider = spider
+    return spider
+
+
+def thread_url(wr_id):
+    return f"https://example.com/bbs/board.php?bo_table=notice&wr_id={wr_id}"
+
+
+def test_seen_index_marks_threads_per_site(tmp_path):
+    index = SeenThreadIndex(tmp_path / "sub" / "seen.db")
+    assert index.count("jbba") == 0
+    assert index.mark_seen("jbba", "10", thread_url(10)) is True
+    # 같은 스레드를 다시 기록하면 False
+    assert index.mark_seen("jbba", "10", thread_url(10)) is False
+    assert index.is_seen("jbba", "10")
+    assert not index.is_seen("jbtp", "10")
+    assert index.count("jbba") == 1
+    index.close()
+
+    reopened = SeenThreadIndex(tmp_path / "sub" / "seen.db")
+    assert reopened.is_seen("jbba", "10")
+    reopened.close()
+
+
+def test_policy_caches_only_revalidated_static_requests():
+    policy = ThreadPageCachePolicy(Settings())
+    assert policy.should_cache_request(Request(thread_url(1), meta={"revalidate": True}))
+    assert not policy.should_cache_request(Request(thread_url(1)))
+    assert not policy.should_cache_request(Request(thread_url(1), meta={"revalidate": True, "playwright": True}))
+
+
+def test_policy_stores_only_responses_with_validators():
+    policy = ThreadPageCachePolicy(Settings())
+    request = Request(thread_url(1), meta={"revalidate": True})
+
+    def response(status=200, **headers):
+        return Response(thread_url(1), status=status, headers=headers)
+
+    assert policy.should_cache_response(response(ETag='"abc"'), request)
+    assert policy.should_cache_response(response(**{"Last-Modified": LAST_MODIFIED}), request)
+    assert not policy.should_cache_response(response(), request)
+    assert not policy.should_cache_response(response(404, ETag='"abc"'), request)
+    assert not policy.should_cache_response(response(ETag='"abc"', **{"Cache-Control": "no-store"}), request)
+
+
+def test_policy_always_revalidates_with_validators():
+    policy = ThreadPageCachePolicy(Settings())
+    request = Request(thread_url(1), meta={"revalidate": True})
+    cached = Response(
+        thread_url(1), headers={"ETag": '"abc"', "Last-Modified": LAST_MODIFIED, "Cache-Control": "max-age=86400"}
+    )
+    assert policy.is_cached_response_fresh(cached, request) is False
+    assert request.headers[b"If-None-Match"] == b'"abc"'
+    assert request.headers[b"If-Modified-Since"] == LAST_MODIFIED.encode()
+
+
+def test_skip_mode_drops_seen_threads(tmp_path):
+    spider = make_spider(tmp_path, HTTPCACHE_ENABLED=False)
+    spider.seen_index.mark_seen("board", "1", thread_url(1))
+    urls = [thread_url(1), thread_url(2)]
+
+    assert spider.revalidate_seen is False
+    assert spider.threads_to_request(urls) == [thread_url(2)]
+    assert spider.crawler.stats.get_value("incremental/skipped") == 1
+    assert not spider.all_threads_seen(urls)
+    assert spider.all_threads_seen([thread_url(1)])
+    assert not spider.all_threads_seen([])
+
+
+def test_revalidate_mode_requests_seen_threads(tmp_path):
+    spider = make_spider(tmp_path, **REVALIDATING_CACHE)
+    spider.seen_index.mark_seen("board", "1", thread_url(1))
+    urls = [thread_url(1), thread_url(2)]
+
+    assert spider.revalidate_seen is True
+    assert spider.threads_to_request(urls) == urls
+    assert spider.crawler.stats.get_value("incremental/revalidate") == 1
+    # 페이지네이션 중단 조건은 그대로
+    assert spider.all_threads_seen([thread_url(1)])
+
+
+def test_revalidate_mode_needs_thread_page_policy(tmp_path):
+    spider = make_spider(
+        tmp_path, HTTPCACHE_ENABLED=True, HTTPCACHE_POLICY="scrapy.extensions.httpcache.RFC2616Policy"
+    )
+    assert spider.revalidate_seen is False
+    spider = make_spider(tmp_path, HTTPCACHE_ENABLED=True, INCREMENTAL_REVALIDATE=False)
+    assert spider.revalidate_seen is False
+
+
+def test_thread_scraped_counts_new_and_updated(tmp_path):
+    spider = make_spider(tmp_path)
+    item = {"url": thread_url(7)}
+    spider.thread_scraped(item, None, spider)
+    spider.thread_scraped(item, None, spider)
+    assert spider.seen_index.is_seen("board", "7")
+    assert spider.crawler.stats.get_value("incremental/new") == 1
+    assert spider.crawler.stats.get_value("incremental/updated") == 1
+
+
+def revalidate_response(flags=(), **headers):
+    request = Request(thread_url(1), headers=headers, meta={"revalidate": True})
+    return Response(thread_url(1), request=request, flags=list(flags))
+
+
+def test_thread_unchanged_only_for_cached_revalidation(tmp_path):
+    spider = make_spider(tmp_path, **REVALIDATING_CACHE)
+    stats = spider.crawler.stats
+    response = revalidate_response
+
+    assert not spider.thread_unchanged(response())
+    assert not spider.thread_unchanged(response(**{"If-None-Match": '"abc"'}))
+    assert spider.thread_unchanged(response(["cached"], **{"If-None-Match": '"abc"'}))
+    assert stats.get_value("revalidation/pages/miss") == 1
+    assert stats.get_value("revalidation/pages/revalidated") == 2
+    assert stats.get_value("revalidation/pages/hit") == 1
+
+
+def test_thread_unchanged_is_not_counted_without_the_cache(tmp_path):
+    spider = make_spider(tmp_path)
+    assert spider.revalidate_seen is False
+    assert not spider.thread_unchanged(revalidate_response())
+    assert not spider.thread_unchanged(revalidate_response(["cached"], **{"If-None-Match": '"abc"'}))
+    assert not any(key.startswith("revalidation/") for key in spider.crawler.stats.get_stats())
+
+
+def test_disabled_by_spider_argument(tmp_path):
+    crawler = get_crawler(BoardSpider, {"SEEN_THREADS_DB": str(tmp_path / "seen.db")})
+    spider = BoardSpider.from_crawler(crawler, incremental="0")
+    assert spider.seen_index is None
+    assert spider.threads_to_request([thread_url(1)]) == [thread_url(1)]
+    assert not (tmp_path / "seen.db").exists()
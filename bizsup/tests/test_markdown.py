@@ -0,0 +1,140 @@
+import pytest
+from scrapy.http import HtmlResponse
+
+from bizsup.markdown import (
+    LxmlMarkdownConverter, html_to_markdown, markdown_document, write_markdown_files, write_text_atomic,
+)
+
+
+def lxml_markdown(html):
+    return html_to_markdown(html, "lxml")
+
+
+def test_default_engine_is_html2text():
+    assert html_to_markdown("<p><b>굵게</b></p>") == html_to_markdown("<p><b>굵게</b></p>", "html2text")
+
+
+def test_selector_and_string_give_same_output():
+    # 스파이더는 response.css(...)[0] 을 넘기므로 이미 파싱된 트리를 그대로 변환
+    html = '<div class="view"><p>본문 <a href="/f?id=1">링크</a></p><ul><li>a</li></ul></div>'
+    response = HtmlResponse("https://example.com/view", body=html.encode(), encoding="utf-8")
+    assert html_to_markdown(response.css("div.view")[0], "lxml") == lxml_markdown(html)
+
+
+def test_nested_lists():
+    html = (
+        "<ul><li>one<ul><li>one-a</li><li>one-b<ol><li>deep</li><li>deeper</li></ol></li></ul></li>"
+        "<li>two</li></ul>"
+    )
+    assert lxml_markdown(html) == (
+        "* one\n"
+        "  * one-a\n"
+        "  * one-b\n"
+        "    1. deep\n"
+        "    2. deeper\n"
+        "* two\n"
+    )
+
+
+def test_list_item_with_paragraphs_is_indented():
+    html = "<ol><li><p>first</p><p>more</p></li><li>second</li></ol>"
+    assert lxml_markdown(html) == "1. first\n\n  more\n2. second\n"
+
+
+def test_table_colspan_keeps_columns_aligned():
+    html = (
+        "<table>"
+        "<tr><th colspan='2'>구분</th><th>내용</th></tr>"
+        "<tr><td>a</td><td>b</td><td>c|d</td></tr>"
+        "<tr><td colspan='3'>합계</td></tr>"
+        "</table>"
+    )
+    assert lxml_markdown(html) == (
+        "| 구분 |  | 내용 |\n"
+        "|---|---|---|\n"
+        "| a | b | c\\|d |\n"
+        "| 합계 |  |  |\n"
+    )
+
+
+def test_table_bad_colspan_counts_as_one():
+    html = "<table><tr><td colspan='x'>a</td><td>b</td></tr></table>"
+    assert lxml_markdown(html) == "| a | b |\n|---|---|\n"
+
+
+def test_nested_table_is_flattened_into_outer_cell():
+    html = (
+        "<table>"
+        "<tr><td>바깥</td><td><table><tr><td>안1</td><td>안2</td></tr></table></td></tr>"
+        "<tr><td>x</td><td>y</td></tr>"
+        "</table>"
+    )
+    # 안쪽 테이블의 행은 바깥 테이블의 행이 되지 않는다
+    assert lxml_markdown(html) == "| 바깥 | 안1 안2 |\n|---|---|\n| x | y |\n"
+
+
+def test_pre_keeps_whitespace():
+    html = "<p>code:</p><pre>  def f():\n      return 1\n</pre><p>after</p>"
+    assert lxml_markdown(html) == "code:\n\n```\n  def f():\n      return 1\n```\n\nafter\n"
+
+
+def test_pre_ignores_inline_markup():
+    html = "<pre><b>x</b> = <i>1</i></pre>"
+    assert lxml_markdown(html) == "```\nx = 1\n```\n"
+
+
+def test_blockquote_paragraphs():
+    html = "<blockquote><p>first <b>bold</b></p><p>second</p></blockquote><p>after</p>"
+    assert lxml_markdown(html) == "> first **bold**\n>\n> second\n\nafter\n"
+
+
+def test_skips_scripts_and_javascript_links():
+    html = '<p>a<script>alert(1)</script> <a href="javascript:go()">b</a></p>'
+    assert lxml_markdown(html) == "a b\n"
+
+
+def test_converter_accepts_lxml_element():
+    from lxml import html as lxml_html
+
+    element = lxml_html.fragment_fromstring("<h2>제목</h2><p>본문</p>", create_parent="div")
+    assert LxmlMarkdownConverter().convert(element) == "## 제목\n\n본문\n"
+
+
+def test_write_text_atomic_creates_parents_and_returns_bytes(tmp_path):
+    path = tmp_path / "a" / "b" / "1.md"
+    assert write_text_atomic(path, "제목\n") == len("제목\n".encode("utf-8"))
+    assert path.read_text(encoding="utf-8") == "제목\n"
+    assert list(path.parent.glob(".*.part")) == []
+
+
+def test_write_text_atomic_replaces_existing_file(tmp_path):
+    path = tmp_path / "1.md"
+    path.write_text("old", encoding="utf-8")
+    write_text_atomic(path, "new")
+    assert path.read_text(encoding="utf-8") == "new"
+
+
+def test_write_text_atomic_failure_leaves_no_part_file(tmp_path):
+    path = tmp_path / "1.md"
+    path.mkdir()  # 디렉토리로는 교체할 수 없음
+    with pytest.raises(OSError):
+        write_text_atomic(path, "body")
+    assert path.is_dir()
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_write_markdown_files_reports_failures_and_keeps_going(tmp_path):
+    (tmp_path / "bad.md").mkdir()
+    batch = [(tmp_path / "1.md", "one"), (tmp_path / "bad.md", "x"), (tmp_path / "2.md", "two")]
+    written, errors = write_markdown_files(batch)
+    assert written == 6
+    assert [path for path, _ in errors] == [tmp_path / "bad.md"]
+    assert (tmp_path / "2.md").read_text(encoding="utf-8") == "two"
+
+
+def test_markdown_document_header():
+    text = markdown_document("제목", "https://example.com/1", "본문\n", author="관리자", date="2026-10-01")
+    assert text == (
+        "# 제목\n\n원본 URL: https://example.com/1\n\n작성자: 관리자\n\n작성일: 2026-10-01\n\n## 내용\n\n본문\n"
+    )
+    assert markdown_document("제목", "u", "본문") == "# 제목\n\n원본 URL: u\n\n## 내용\n\n본문"
@@ -0,0 +1,58 @@
+import scrapy
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+from w3lib.url import url_query_parameter
+
+from bizsup.pagination import PaginationMixin
+from bizsup.spiders.gntp import GntpSpider
+
+
+class ListSpider(PaginationMixin, scrapy.Spider):
+    name = "list"
+    page_param = "page"
+    max_pages = 3
+
+    def get_current_page(self, url):
+        return int(url_query_parameter(url, self.page_param, "1"))
+
+
+def make_spider(spidercls=ListSpider, settings=None, **kwargs):
+    crawler = get_crawler(spidercls, settings)
+    return spidercls.from_crawler(crawler, **kwargs)
+
+
+def list_response(url, body=b"<html></html>"):
+    return HtmlResponse(url, body=body, encoding="utf-8", request=scrapy.Request(url))
+
+
+def test_fanout_requests_remaining_pages_on_first_crawl():
+    spider = make_spider()
+    requests = list(spider.list_page_requests(list_response("https://example.com/list?page=1")))
+    assert [request.url for request in requests] == [
+        "https://example.com/list?page=2",
+        "https://example.com/list?page=3",
+    ]
+
+
+def test_known_threads_switch_fanout_to_serial_unless_chosen_explicitly():
+    spider = make_spider()
+    spider.known_thread_count = 5
+    assert spider.get_pagination_mode() == "serial"
+
+    spider = make_spider(pagination="fanout")
+    spider.known_thread_count = 5
+    assert spider.get_pagination_mode() == "fanout"
+
+
+def test_without_page_param_always_serial():
+    spider = make_spider(pagination="fanout")
+    spider.page_param = None
+    assert spider.get_pagination_mode() == "serial"
+
+
+def test_gntp_next_page_uses_page_param():
+    spider = make_spider(GntpSpider)
+    url = "https://www.btp.or.kr/kor/CMS/Board/Board.do?mCode=MN013"
+    assert spider.get_current_page(url) == 1
+    assert spider.get_next_page_url(list_response(url), 1) == f"{url}&page=2"
+    assert spider.get_current_page(f"{url}&page=2") == 2
@@ -0,0 +1,53 @@
+from scrapy.settings import Settings
+
+from bizsup.rendering import RenderingVerdictStore, use_playwright_settings
+from bizsup.spiders.egbiz import EgbizSpider
+from bizsup.spiders.jbba import JbbaSpider
+
+
+PROJECT_SETTINGS = {
+    "DOWNLOADER_MIDDLEWARES": {
+        "bizsup.middlewares.RenderingMiddleware": 543,
+        "bizsup.middlewares.AdaptiveThrottleMiddleware": 560,
+    },
+}
+
+
+def spider_settings(spidercls, tmp_path):
+    settings = Settings(PROJECT_SETTINGS)
+    settings.set("RENDERING_VERDICTS_FILE", str(tmp_path / "verdicts.json"))
+    spidercls.update_settings(settings)
+    return settings
+
+
+def browser_components(settings):
+    names = list(settings.getdict("DOWNLOADER_MIDDLEWARES")) + list(settings.getdict("SPIDER_MIDDLEWARES"))
+    return [name for name in names if name.startswith("scrapy_browser.")]
+
+
+def test_static_site_does_not_load_browser_middlewares(tmp_path):
+    RenderingVerdictStore(tmp_path / "verdicts.json").set("jbba", False, 10, 10)
+    settings = spider_settings(JbbaSpider, tmp_path)
+    assert browser_components(settings) == []
+    assert "http" not in settings.getdict("DOWNLOAD_HANDLERS")
+
+
+def test_unprobed_site_registers_playwright(tmp_path):
+    settings = spider_settings(JbbaSpider, tmp_path)
+    assert len(browser_components(settings)) == 3
+    assert "scrapy_playwright" in settings.getdict("DOWNLOAD_HANDLERS")["http"]
+
+
+def test_playwright_spider_keeps_project_middlewares(tmp_path):
+    settings = spider_settings(EgbizSpider, tmp_path)
+    middlewares = settings.getdict("DOWNLOADER_MIDDLEWARES")
+    assert middlewares["bizsup.middlewares.RenderingMiddleware"] == 543
+    assert middlewares["bizsup.middlewares.AdaptiveThrottleMiddleware"] == 560
+    assert middlewares["scrapy_browser.middlewares.PagePoolMiddleware"] == 950
+
+
+def test_use_playwright_settings_is_idempotent():
+    settings = Settings(PROJECT_SETTINGS)
+    use_playwright_settings(settings)
+    use_playwright_settings(settings)
+    assert len(settings.getdict("DOWNLOADER_MIDDLEWARES")) == 4
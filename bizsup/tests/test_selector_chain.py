@@ -0,0 +1,84 @@
+import scrapy
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from bizsup.selector_chain import SelectorChainMixin, SelectorWinnerStore
+
+
+SELECTORS = ("a.specific::attr(href)", "div.list a::attr(href)")
+
+
+class ListSpider(SelectorChainMixin, scrapy.Spider):
+    name = "list"
+
+
+def make_spider(tmp_path, **settings):
+    settings.setdefault("SELECTOR_WINNERS_FILE", str(tmp_path / "winners.json"))
+    crawler = get_crawler(ListSpider, settings)
+    spider = ListSpider.from_crawler(crawler)
+    crawler.spider = spider
+    return spider
+
+
+def page(links, specific=0):
+    anchors = "".join(
+        f'<a class="specific" href="/{i}">{i}</a>' if i < specific else f'<a href="/{i}">{i}</a>'
+        for i in range(links)
+    )
+    return HtmlResponse("https://example.com/list", body=f'<div class="list">{anchors}</div>'.encode(), encoding="utf-8")
+
+
+def test_first_match_in_priority_order_becomes_winner(tmp_path):
+    spider = make_spider(tmp_path)
+    assert spider.select_first(page(3, specific=3), "list", SELECTORS).getall() == ["/0", "/1", "/2"]
+    assert spider.selector_winners == {"list": SELECTORS[0]}
+    assert spider.crawler.stats.get_value("selectors/learned") == 1
+
+
+def test_winner_is_evaluated_first(tmp_path):
+    spider = make_spider(tmp_path)
+    spider.select_first(page(3), "list", SELECTORS)
+    assert spider.selector_winners["list"] == SELECTORS[1]
+    spider.select_first(page(3), "list", SELECTORS)
+    assert spider.crawler.stats.get_value("selectors/hit") == 1
+
+
+def test_broad_fallback_gives_way_on_recheck(tmp_path):
+    spider = make_spider(tmp_path, SELECTOR_RECHECK_INTERVAL=3)
+    spider.select_first(page(3), "list", SELECTORS)
+    assert spider.selector_winners["list"] == SELECTORS[1]
+
+    # 구체적인 선택자가 다시 맞는 페이지: 확인 주기 전까지는 winner 를 그대로 사용
+    results = [spider.select_first(page(3, specific=3), "list", SELECTORS).getall() for _ in range(3)]
+    assert results[0] == results[1] == ["/0", "/1", "/2"]
+    assert spider.selector_winners["list"] == SELECTORS[0]
+    assert spider.crawler.stats.get_value("selectors/drift") == 1
+
+
+def test_winner_count_change_triggers_recheck(tmp_path):
+    spider = make_spider(tmp_path, SELECTOR_RECHECK_INTERVAL=0)
+    spider.select_first(page(10), "list", SELECTORS)
+    spider.select_first(page(10), "list", SELECTORS)
+    assert spider.selector_winners["list"] == SELECTORS[1]
+
+    # 넓은 선택자의 결과가 갑자기 줄면 우선순위 순서로 다시 평가
+    assert spider.select_first(page(4, specific=2), "list", SELECTORS).getall() == ["/0", "/1"]
+    assert spider.selector_winners["list"] == SELECTORS[0]
+
+
+def test_miss_and_check(tmp_path):
+    spider = make_spider(tmp_path)
+    response = HtmlResponse("https://example.com/", body=b"<p>empty</p><h1> </h1>", encoding="utf-8")
+    assert not spider.select_first(response, "list", SELECTORS)
+    # check 가 거짓인 결과는 맞지 않은 것으로 봄
+    assert not spider.select_first(response, "title", ("h1::text",), check=lambda r: r.get().strip())
+    assert spider.crawler.stats.get_value("selectors/miss") == 2
+    assert spider.selector_winners == {}
+
+
+def test_winners_saved_on_close_and_loaded(tmp_path):
+    spider = make_spider(tmp_path)
+    spider.select_first(page(3), "list", SELECTORS)
+    spider.save_selector_winners(spider)
+    assert SelectorWinnerStore(tmp_path / "winners.json").get("list") == {"list": SELECTORS[1]}
+    assert make_spider(tmp_path).selector_winners == {"list": SELECTORS[1]}
@@ -0,0 +1,116 @@
+import logging
+
+import pytest
+
+from bizsup import sites
+from bizsup.sites import (
+    DEFAULT_CONTENT_SELECTORS, DEFAULT_LIST_SELECTORS, DEFAULT_MAX_PAGES, SITES_FILE_ENV, load_sites, sites_file,
+)
+
+
+HEADER = "site,url,page_param,thread_id_param,list_selector,title_selector,content_selector,attachment_selector,rendering,max_pages\n"
+
+
+def write_csv(tmp_path, text):
+    path = tmp_path / "server.csv"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_row_with_only_site_and_url_uses_defaults(tmp_path):
+    path = write_csv(tmp_path, HEADER + "gntp,https://www.gntp.or.kr/biz/agency?pageIndex=1,,,,,,,,\n")
+    [plan] = load_sites(path)
+    assert plan.site == "gntp"
+    assert plan.spider_name == "bbs_gntp"
+    assert plan.allowed_domains == ["gntp.or.kr"]
+    # URL 에 있는 흔한 페이지 파라미터를 찾아 씀
+    assert plan.page_param == "pageIndex"
+    assert plan.thread_id_param is None
+    assert plan.list_selectors == DEFAULT_LIST_SELECTORS
+    assert plan.content_selectors == DEFAULT_CONTENT_SELECTORS
+    assert plan.rendering == "auto"
+    assert plan.max_pages == DEFAULT_MAX_PAGES
+
+
+def test_selector_columns_are_split_and_precompiled(tmp_path):
+    path = write_csv(
+        tmp_path,
+        HEADER + 'jbba,https://www.jbba.kr/bbs/board.php?bo_table=sub01_09,page,wr_id,'
+        '".td_subject a | .subject a",.bo_v_tit::text,#bo_v_con,'
+        '"a[href*=""download.php""]|a.file",static,3\n',
+    )
+    [plan] = load_sites(path)
+    assert plan.page_param == "page"
+    assert plan.thread_id_param == "wr_id"
+    assert plan.list_selectors == (".td_subject a", ".subject a")
+    assert plan.link_selectors == (".td_subject a::attr(href)", ".subject a::attr(href)")
+    assert plan.thread_link_selector == ".td_subject a, .subject a"
+    assert plan.title_selectors == (".bo_v_tit::text",)
+    assert plan.attachment_query == 'a[href*="download.php"], a.file'
+    assert plan.rendering == "static"
+    assert plan.max_pages == 3
+
+
+def test_file_without_header_uses_column_order(tmp_path):
+    path = write_csv(tmp_path, "dip,https://www.dip.or.kr/home/notice,,fboardnum,,,,,browser,2\n")
+    [plan] = load_sites(path)
+    assert (plan.site, plan.thread_id_param, plan.rendering, plan.max_pages) == ("dip", "fboardnum", "browser", 2)
+
+
+def test_header_columns_may_be_reordered_or_omitted(tmp_path):
+    path = write_csv(tmp_path, "site,max_pages,url\nexample,2,https://example.com/list\n")
+    [plan] = load_sites(path)
+    assert (plan.site, plan.start_url, plan.max_pages) == ("example", "https://example.com/list", 2)
+
+
+def test_invalid_blank_comment_and_duplicate_rows_are_skipped(tmp_path, caplog):
+    path = write_csv(
+        tmp_path,
+        HEADER
+        + "# 메모 줄\n"
+        + "\n"
+        + "good,https://example.com/a,,,,,,,,\n"
+        + "bad name,https://example.com/b,,,,,,,,\n"
+        + "noscheme,example.com/c,,,,,,,,\n"
+        + "render,https://example.com/d,,,,,,,headless,\n"
+        + "pages,https://example.com/e,,,,,,,,many\n"
+        + "good,https://example.com/other,,,,,,,,\n",
+    )
+    with caplog.at_level(logging.WARNING, logger=sites.__name__):
+        plans = load_sites(path)
+    assert [plan.site for plan in plans] == ["good"]
+    assert plans[0].start_url == "https://example.com/a"
+    assert len(caplog.records) == 5
+
+
+@pytest.mark.parametrize("text", [None, "", HEADER, HEADER + "bad name,https://example.com,,,,,,,,\n"])
+def test_missing_or_empty_config_warns(tmp_path, caplog, text):
+    path = None if text is None else write_csv(tmp_path, text)
+    with caplog.at_level(logging.WARNING, logger=sites.__name__):
+        assert load_sites(path) == []
+    assert caplog.records
+
+
+def test_missing_file_warns(tmp_path, caplog):
+    with caplog.at_level(logging.WARNING, logger=sites.__name__):
+        assert load_sites(tmp_path / "nope.csv") == []
+    assert "not found" in caplog.text
+
+
+def test_sites_file_env_overrides_setting(tmp_path, monkeypatch):
+    monkeypatch.setenv(SITES_FILE_ENV, str(tmp_path / "env.csv"))
+    assert sites_file({"SITES_FILE": str(tmp_path / "setting.csv")}) == tmp_path / "env.csv"
+
+    monkeypatch.delenv(SITES_FILE_ENV)
+    assert sites_file({"SITES_FILE": str(tmp_path / "setting.csv")}) == tmp_path / "setting.csv"
+    assert sites_file({}) is None
+    assert sites_file() is None
+
+
+def test_relative_sites_file_resolves_against_project_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv(SITES_FILE_ENV, raising=False)
+    project = tmp_path / "project"
+    (project / "sub").mkdir(parents=True)
+    (project / "scrapy.cfg").write_text("[settings]\n")
+    monkeypatch.chdir(project / "sub")
+    assert sites_file({"SITES_FILE": "../server.csv"}) == (tmp_path / "server.csv").resolve()
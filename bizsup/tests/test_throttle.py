@@ -0,0 +1,151 @@
+import pytest
+from scrapy.statscollectors import MemoryStatsCollector
+from scrapy.utils.test import get_crawler
+
+from bizsup import throttle
+from bizsup.throttle import AdaptiveThrottle
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    decrease() 가 보는 시간을 테스트에서 직접 움직이는 시계
+    """
+    now = [1000.0]
+    monkeypatch.setattr(throttle, "monotonic", lambda: now[0])
+    return now
+
+
+def make_throttle(**kwargs):
+    # min_window=1: 창 크기가 현재 동시 요청 수와 같음
+    options = dict(start_delay=1.0, start_concurrency=1, min_delay=0.5, max_delay=30.0,
+                   max_concurrency=4, target_latency=2.0, min_window=1)
+    options.update(kwargs)
+    return AdaptiveThrottle(**options)
+
+
+def test_additive_increase_per_window(clock):
+    t = make_throttle()
+    state = t.record("a", 0.1)
+    # 창(동시 요청 수 1)이 찼으므로 동시 요청 +1, 요청 속도 +0.1/s
+    assert state.concurrency == 2
+    assert state.delay == pytest.approx(1 / 1.1)
+
+    t.record("a", 0.1)
+    assert state.concurrency == 2
+    t.record("a", 0.1)
+    assert state.concurrency == 3
+    assert state.delay == pytest.approx(1 / 1.2)
+
+
+def test_min_window_slows_the_ramp_up(clock):
+    t = make_throttle(start_delay=3.0, min_window=10)
+    state = t.state("a")
+    for _ in range(9):
+        t.record("a", 0.1)
+    assert (state.concurrency, state.delay) == (1, 3.0)
+    t.record("a", 0.1)
+    assert state.concurrency == 2
+    assert state.delay == pytest.approx(1 / (1 / 3.0 + 0.1))
+
+
+def test_increase_respects_limits(clock):
+    t = make_throttle(start_delay=0.5, max_concurrency=2)
+    state = t.state("a")
+    for _ in range(20):
+        t.record("a", 0.1)
+    assert state.concurrency == 2
+    assert state.delay == 0.5
+
+
+def test_multiplicative_decrease_on_error(clock):
+    t = make_throttle(start_delay=2.0, start_concurrency=4)
+    state = t.record("a", ok=False)
+    assert state.concurrency == 2
+    assert state.delay == 4.0
+
+
+def test_decrease_on_slow_response(clock):
+    t = make_throttle(start_concurrency=2)
+    state = t.record("a", 5.0)
+    assert state.concurrency == 1
+    assert state.delay == 2.0
+
+
+def test_decrease_once_per_window(clock):
+    t = make_throttle(start_delay=2.0, start_concurrency=4)
+    state = t.record("a", ok=False)
+    # 같은 혼잡으로 이어서 들어온 오류는 무시
+    t.record("a", ok=False)
+    assert (state.concurrency, state.delay) == (2, 4.0)
+
+    clock[0] += 4.0
+    t.record("a", ok=False)
+    assert (state.concurrency, state.delay) == (1, 8.0)
+
+
+def test_decrease_respects_limits(clock):
+    t = make_throttle(start_delay=20.0, start_concurrency=1)
+    state = t.record("a", ok=False)
+    assert (state.concurrency, state.delay) == (1, 30.0)
+
+
+def test_backoff_from_zero_delay(clock):
+    t = make_throttle(start_delay=0.0, min_delay=0.0)
+    state = t.record("a", 0.1)
+    assert state.delay == 0.0
+    t.record("a", ok=False)
+    assert state.delay == t.min_backoff_delay
+
+
+def test_latency_moving_average(clock):
+    t = make_throttle()
+    state = t.record("a", 1.0)
+    t.record("a", 2.0)
+    assert state.latency == pytest.approx(1.3)
+    # 응답 시간을 모르는 결과(None)는 평균에 반영하지 않음
+    t.record("a")
+    assert state.latency == pytest.approx(1.3)
+
+
+def test_hosts_are_independent(clock):
+    t = make_throttle()
+    t.record("a", ok=False)
+    assert t.state("b").delay == 1.0
+
+
+def test_stats(clock):
+    stats = MemoryStatsCollector(get_crawler())
+    t = make_throttle(stats=stats)
+    t.record("a", 0.25)
+    t.record("a", ok=False)
+    assert stats.get_value("throttle/increase") == 1
+    assert stats.get_value("throttle/decrease") == 1
+    assert stats.get_value("throttle/a/concurrency") == 1
+    assert stats.get_value("throttle/a/latency_ms") == 250
+
+
+def test_configure_from_spider_attributes():
+    class Spider:
+        throttle_min_delay = 2
+        throttle_max_delay = 10
+        throttle_max_concurrency = 1
+
+    t = make_throttle(start_delay=1.0, start_concurrency=2)
+    t.configure(Spider())
+    assert (t.min_delay, t.max_delay, t.max_concurrency) == (2.0, 10.0, 1)
+    assert t.state("a").delay == 2.0
+    assert t.state("a").concurrency == 1
+
+
+def test_apply_sets_downloader_slot(clock):
+    class Slot:
+        delay = 0
+        concurrency = 0
+
+    t = make_throttle()
+    t.record("a", 0.1)
+    slot = Slot()
+    t.apply("a", slot)
+    assert slot.concurrency == 2
+    assert slot.delay == pytest.approx(1 / 1.1)
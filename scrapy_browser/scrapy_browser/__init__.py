@@ -0,0 +1,5 @@
+# bizsup, youtube_scrapy 가 함께 쓰는 Playwright 리소스 차단, 페이지 풀과 그 미들웨어
+#
+#   pip install -e scrapy_browser
+#
+# 설정 이름(PLAYWRIGHT_BLOCK_*, PLAYWRIGHT_POOL_*, PLAYWRIGHT_PAGE_*)과 동작은 browser.py 참고.
@@ -0,0 +1,394 @@
+# Playwright 페이지 리소스 차단과 페이지 풀
+#
+# 브라우저로 렌더링하는 페이지는 본문 텍스트만 필요하지만 브라우저는 이미지, 동영상,
+# 웹 폰트, 외부 분석/광고 스크립트까지 모두 내려받는다. ResourceBlocker 는 페이지에
+# 라우트 핸들러를 등록해서 차단 프로필에 해당하는 요청을 네트워크로 보내기 전에
+# 중단(abort)한다. 문서(navigation) 요청과 허용 목록에 맞는 요청은 차단하지 않는다.
+#
+# 차단 프로필은 PLAYWRIGHT_BLOCK_PROFILE 설정, 스파이더의 block_profile 속성,
+# 요청의 meta["playwright_block_profile"] 순서로 덮어쓴다.
+# 사이트에 꼭 필요한 XHR 은 PLAYWRIGHT_BLOCK_ALLOW 설정이나 스파이더의 block_allow
+# 속성에 URL 정규식으로 추가한다.
+#
+# PagePool 은 렌더링이 끝난 페이지를 닫지 않고 사이트(컨텍스트)별로 보관했다가 다음
+# 요청에 다시 사용한다. 같은 컨텍스트를 쓰므로 쿠키와 세션이 유지되고, 요청마다
+# 페이지를 새로 만드는 비용이 들지 않는다. 페이지는 정해진 횟수만큼 탐색했거나
+# 브라우저 메모리(RSS)가 기준을 넘으면 닫고 새로 만든다.
+
+import asyncio
+import os
+import re
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+
+# 프로필별 차단할 리소스 종류 (Playwright request.resource_type) 와 추적기 차단 여부
+BLOCK_PROFILES = {
+    "none": {"resource_types": (), "trackers": False},
+    "default": {"resource_types": ("image", "media", "font", "texttrack"), "trackers": True},
+    # 스타일시트까지 차단 - 화면 표시 여부(offsetParent 등)에 의존하지 않는 스파이더에서만 사용
+    "text": {"resource_types": ("image", "media", "font", "texttrack", "stylesheet"), "trackers": True},
+}
+
+# 알려진 외부 분석/광고 추적기 도메인 (하위 도메인 포함)
+TRACKER_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "googlesyndication.com",
+    "doubleclick.net",
+    "facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "wcs.naver.net",
+    "wcs.naver.com",
+    "acecounter.com",
+    "logger.co.kr",
+)
+
+# 차단 핸들러가 등록하는 라우트 패턴 (scrapy-playwright 의 "**" 라우트와 구분)
+ROUTE_PATTERN = "**/*"
+
+
+class ResourceBlocker:
+    """
+    Playwright 페이지의 불필요한 리소스 요청을 차단하고 통계를 기록
+
+    통계:
+    - playwright/blocked/count, playwright/blocked/resource_type/<종류>: 차단한 요청 수
+    - playwright/blocked/tracker: 추적기 도메인이라 차단한 요청 수
+    - playwright/blocked/allowlisted: 허용 목록에 맞아 차단하지 않은 요청 수
+    - playwright/transfer/bytes, playwright/transfer/bytes/resource_type/<종류>:
+      차단하지 않은 요청이 실제로 주고받은 바이트 수
+
+    중단한 요청은 전송되지 않아 크기를 알 수 없으므로, 절약한 대역폭은 같은 크롤링을
+    PLAYWRIGHT_BLOCK_PROFILE=none 으로 실행했을 때의 transfer 통계와 비교해서 확인한다.
+    """
+
+    def __init__(self, profile="default", allow=(), tracker_domains=TRACKER_DOMAINS, stats=None,
+                 track_transfer=True):
+        self.profile = profile
+        self.allow = [re.compile(pattern) for pattern in allow]
+        self.tracker_domains = tuple(tracker_domains)
+        self.stats = stats
+        self.track_transfer = track_transfer
+        self.tracked_pages = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            profile=settings.get("PLAYWRIGHT_BLOCK_PROFILE", "default"),
+            allow=settings.getlist("PLAYWRIGHT_BLOCK_ALLOW"),
+            tracker_domains=TRACKER_DOMAINS + tuple(settings.getlist("PLAYWRIGHT_BLOCK_DOMAINS")),
+            stats=crawler.stats,
+            track_transfer=settings.getbool("PLAYWRIGHT_TRACK_TRANSFER_BYTES", True),
+        )
+
+    def request_profile(self, request, spider):
+        """
+        요청에 적용할 차단 프로필 이름 (요청 meta > 스파이더 속성 > 설정)
+        """
+        profile = request.meta.get("playwright_block_profile") or getattr(spider, "block_profile", None) or self.profile
+        if profile not in BLOCK_PROFILES:
+            raise ValueError(f"Unknown block profile: {profile}")
+        return profile
+
+    def is_tracker(self, url):
+        host = urlsplit(url).hostname or ""
+        return any(host == domain or host.endswith(f".{domain}") for domain in self.tracker_domains)
+
+    def block_reason(self, url, resource_type, profile, allow=()):
+        """
+        요청을 차단하는 이유 ('resource_type', 'tracker') - 차단하지 않으면 None
+        """
+        rules = BLOCK_PROFILES[profile]
+        if resource_type in rules["resource_types"]:
+            reason = "resource_type"
+        elif rules["trackers"] and self.is_tracker(url):
+            reason = "tracker"
+        else:
+            return None
+        if any(pattern.search(url) for pattern in (*self.allow, *allow)):
+            self.inc_stat("playwright/blocked/allowlisted")
+            return None
+        return reason
+
+    def inc_stat(self, key, count=1):
+        if self.stats is not None:
+            self.stats.inc_value(key, count)
+
+    def page_init_callback(self, spider):
+        """
+        meta["playwright_page_init_callback"] 에 넣을 콜백
+
+        scrapy-playwright 는 요청마다 자신의 라우트를 등록한 뒤 이 콜백을 호출하므로,
+        차단 라우트를 다시 등록해서 항상 먼저 실행되게 한다.
+        """
+        allow = [re.compile(pattern) for pattern in getattr(spider, "block_allow", ())]
+
+        async def init_page(page, request):
+            profile = self.request_profile(request, spider)
+            await page.unroute(ROUTE_PATTERN)
+            if profile != "none":
+                await page.route(ROUTE_PATTERN, self.route_handler(profile, allow))
+            if self.track_transfer and page not in self.tracked_pages:
+                self.tracked_pages.add(page)
+                page.on("requestfinished", self.record_transfer)
+                page.once("close", self.tracked_pages.discard)
+
+        return init_page
+
+    def route_handler(self, profile, allow):
+        async def handle_route(route, playwright_request):
+            reason = None
+            if not playwright_request.is_navigation_request():
+                reason = self.block_reason(playwright_request.url, playwright_request.resource_type, profile, allow)
+            if reason is None:
+                # scrapy-playwright 의 라우트 핸들러로 넘김
+                await route.fallback()
+                return
+            self.inc_stat("playwright/blocked/count")
+            self.inc_stat(f"playwright/blocked/resource_type/{playwright_request.resource_type}")
+            if reason == "tracker":
+                self.inc_stat("playwright/blocked/tracker")
+            await route.abort("blockedbyclient")
+
+        return handle_route
+
+    async def record_transfer(self, playwright_request):
+        try:
+            sizes = await playwright_request.sizes()
+        except Exception:
+            # 페이지가 이미 닫힌 경우
+            return
+        size = sum(max(sizes[key], 0) for key in (
+            "requestHeadersSize", "requestBodySize", "responseHeadersSize", "responseBodySize"
+        ))
+        self.inc_stat("playwright/transfer/bytes", size)
+        self.inc_stat(f"playwright/transfer/bytes/resource_type/{playwright_request.resource_type}", size)
+
+
+def process_tree_rss(pid=None):
+    """
+    pid 프로세스와 모든 하위 프로세스(Playwright 드라이버, 브라우저)의 RSS 합계 (바이트)
+
+    /proc 가 없는 플랫폼에서는 None
+    """
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return None
+    root = pid or os.getpid()
+    children = {}
+    rss = {}
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    for stat_path in proc.glob("[0-9]*/stat"):
+        try:
+            stat = stat_path.read_text()
+            statm = (stat_path.parent / "statm").read_text()
+        except OSError:
+            continue
+        # 프로세스 이름에 공백이나 괄호가 있을 수 있으므로 마지막 ')' 뒤부터 파싱
+        fields = stat[stat.rfind(")") + 2:].split()
+        pid_value = int(stat_path.parent.name)
+        children.setdefault(int(fields[1]), []).append(pid_value)
+        rss[pid_value] = int(statm.split()[1]) * page_size
+
+    total = 0
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, ()))
+    return total
+
+
+class PagePool:
+    """
+    컨텍스트(사이트)별로 Playwright 페이지를 재사용하는 풀
+
+    컨텍스트마다 동시에 사용하는 페이지 수를 size 로 제한하고, 반환된 페이지는
+    닫지 않고 보관했다가 다음 요청에 넘긴다. 보관할 페이지가 없으면 None 을 돌려주고
+    scrapy-playwright 가 새 페이지를 만든다.
+
+    반환할 때 max_navigations 번 사용한 페이지이거나 브라우저를 포함한 프로세스
+    RSS 가 max_rss_mb 를 넘으면 페이지를 닫는다.
+
+    스파이더 콜백에 넘긴 페이지(hand_out)는 콜백이 끝나면 PageLifecycleMiddleware 가
+    반환하고, hold_timeout 초가 지나도 반환되지 않은 페이지는 expire_held_pages() 가 닫는다.
+
+    통계: playwright/pool/{reused,created,closed,timed_out,leaked},
+    playwright/pool/recycled/{navigations,rss,error}
+    게이지: playwright/pages/{open,open_max,in_use,held,idle}
+    """
+
+    # RSS 를 다시 측정하기 전까지의 간격 (초)
+    rss_check_interval = 10
+
+    def __init__(self, size=4, max_navigations=20, max_rss_mb=0, hold_timeout=0, stats=None):
+        self.size = size
+        self.max_navigations = max_navigations
+        self.max_rss = max_rss_mb * 1024 * 1024
+        self.hold_timeout = hold_timeout
+        self.stats = stats
+        self.slots = {}
+        self.idle = {}
+        self.owners = {}
+        self.handed_at = {}
+        self.navigations = {}
+        self.in_use = 0
+        self.rss_checked_at = 0
+        self.rss_exceeded = False
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            size=settings.getint("PLAYWRIGHT_POOL_SIZE", 4),
+            max_navigations=settings.getint("PLAYWRIGHT_POOL_MAX_NAVIGATIONS", 20),
+            max_rss_mb=settings.getint("PLAYWRIGHT_POOL_MAX_RSS_MB", 0),
+            hold_timeout=settings.getint("PLAYWRIGHT_PAGE_HOLD_TIMEOUT", 0),
+            stats=crawler.stats,
+        )
+
+    @property
+    def enabled(self):
+        return self.size > 0
+
+    def inc_stat(self, key, count=1):
+        if self.stats is not None:
+            self.stats.inc_value(key, count)
+
+    def update_gauges(self):
+        if self.stats is None:
+            return
+        idle = sum(len(pages) for pages in self.idle.values())
+        self.stats.set_value("playwright/pages/in_use", self.in_use)
+        self.stats.set_value("playwright/pages/held", len(self.owners))
+        self.stats.set_value("playwright/pages/idle", idle)
+        self.stats.set_value("playwright/pages/open", self.in_use + idle)
+        self.stats.max_value("playwright/pages/open_max", self.in_use + idle)
+
+    async def acquire(self, context):
+        """
+        context 의 페이지 사용 슬롯을 얻고 보관 중인 페이지 반환 (없으면 None)
+
+        슬롯은 release() 로 반드시 돌려줘야 한다.
+        """
+        slot = self.slots.get(context)
+        if slot is None:
+            slot = self.slots[context] = asyncio.Semaphore(self.size)
+        await slot.acquire()
+        self.in_use += 1
+
+        idle = self.idle.get(context, [])
+        page = None
+        while idle and page is None:
+            page = idle.pop()
+            if page.is_closed():
+                self.navigations.pop(page, None)
+                page = None
+        self.inc_stat("playwright/pool/reused" if page is not None else "playwright/pool/created")
+        self.update_gauges()
+        return page
+
+    def hand_out(self, context, page):
+        """
+        슬롯을 가진 채로 스파이더 콜백에 넘기는 페이지 기록 (release_page() 로 반환)
+        """
+        self.owners[page] = context
+        self.handed_at[page] = time.monotonic()
+        self.update_gauges()
+
+    async def release(self, context, page, recycle=False):
+        """
+        context 의 슬롯을 돌려주고 페이지를 보관하거나 닫음 (page 는 None 일 수 있음)
+        """
+        try:
+            if page is not None:
+                await self.put(context, page, recycle)
+        finally:
+            self.in_use -= 1
+            self.slots[context].release()
+            self.update_gauges()
+
+    async def release_page(self, page, recycle=False):
+        """
+        스파이더 콜백이 다 쓴 페이지 반환 - 풀에서 받은 페이지가 아니면 닫는다
+
+        여러 번 호출해도 된다 (이미 반환된 페이지는 무시).
+        """
+        context = self.owners.pop(page, None)
+        self.handed_at.pop(page, None)
+        if context is not None:
+            await self.release(context, page, recycle)
+        elif not any(page in pages for pages in self.idle.values()):
+            await self.close_page(page)
+
+    def is_held(self, page):
+        return page in self.owners
+
+    async def expire_held_pages(self):
+        """
+        hold_timeout 초가 지나도 반환되지 않은 페이지를 닫고 그 URL 목록 반환
+
+        페이지를 쓰고 있던 콜백은 다음 페이지 호출에서 오류로 끝난다.
+        """
+        if not self.hold_timeout:
+            return []
+        now = time.monotonic()
+        expired = [page for page, handed_at in self.handed_at.items() if now - handed_at > self.hold_timeout]
+        urls = []
+        for page in expired:
+            urls.append(page.url)
+            self.inc_stat("playwright/pool/timed_out")
+            await self.release_page(page, recycle=True)
+        return urls
+
+    async def put(self, context, page, recycle):
+        if page.is_closed():
+            self.navigations.pop(page, None)
+            return
+        navigations = self.navigations.get(page, 0) + 1
+        if recycle:
+            reason = "error"
+        elif self.max_navigations and navigations >= self.max_navigations:
+            reason = "navigations"
+        elif self.over_rss():
+            reason = "rss"
+        else:
+            self.navigations[page] = navigations
+            self.idle.setdefault(context, []).append(page)
+            return
+        self.inc_stat(f"playwright/pool/recycled/{reason}")
+        await self.close_page(page)
+
+    def over_rss(self):
+        if not self.max_rss:
+            return False
+        now = time.monotonic()
+        if now - self.rss_checked_at >= self.rss_check_interval:
+            self.rss_checked_at = now
+            rss = process_tree_rss()
+            self.rss_exceeded = rss is not None and rss > self.max_rss
+        return self.rss_exceeded
+
+    async def close_page(self, page):
+        self.navigations.pop(page, None)
+        if not page.is_closed():
+            await page.close()
+            self.inc_stat("playwright/pool/closed")
+
+    async def close(self):
+        """
+        콜백에 넘긴 페이지와 보관 중인 페이지를 모두 닫음
+        """
+        for page in list(self.owners):
+            self.inc_stat("playwright/pool/leaked")
+            await self.release_page(page, recycle=True)
+        for pages in self.idle.values():
+            for page in pages:
+                await self.close_page(page)
+        self.idle.clear()
+        self.update_gauges()
@@ -0,0 +1,180 @@
+# 두 Scrapy 프로젝트(bizsup, youtube_scrapy)가 함께 쓰는 Playwright 미들웨어
+#
+#   DOWNLOADER_MIDDLEWARES = {
+#       "scrapy_browser.middlewares.ResourceBlockingMiddleware": 544,
+#       "scrapy_browser.middlewares.PagePoolMiddleware": 950,
+#   }
+#   SPIDER_MIDDLEWARES = {
+#       "scrapy_browser.middlewares.PageLifecycleMiddleware": 10,
+#   }
+
+import asyncio
+
+from scrapy import signals
+from scrapy.utils.defer import deferred_from_coro
+from twisted.internet import task
+
+from scrapy_browser.browser import PagePool, ResourceBlocker
+
+
+class ResourceBlockingMiddleware:
+    """
+    Playwright 로 렌더링하는 요청에 리소스 차단 프로필 적용
+
+    meta["playwright"] 가 참인 요청에 ResourceBlocker 의 page init 콜백을 넣는다.
+    스파이더가 직접 playwright_page_init_callback 을 지정한 요청은 건드리지 않는다.
+    meta["playwright"] 를 채우는 미들웨어(bizsup 의 RenderingMiddleware 등)보다 큰 번호에 둔다.
+    """
+
+    def __init__(self, blocker):
+        self.blocker = blocker
+        self.callbacks = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(ResourceBlocker.from_crawler(crawler))
+
+    def process_request(self, request, spider):
+        if not request.meta.get("playwright"):
+            return None
+        callback = self.callbacks.get(spider)
+        if callback is None:
+            callback = self.callbacks[spider] = self.blocker.page_init_callback(spider)
+        request.meta.setdefault("playwright_page_init_callback", callback)
+        return None
+
+
+class PagePoolMiddleware:
+    """
+    Playwright 요청에 PagePool 의 페이지를 넘기고 응답 뒤 페이지를 풀로 반환
+
+    - 컨텍스트 이름(meta["playwright_context"])을 지정하지 않은 요청은 스파이더 이름을
+      컨텍스트로 사용해서 사이트별로 쿠키를 유지한다.
+    - 스파이더가 playwright_include_page 를 요청하지 않았으면 응답을 넘기기 전에
+      페이지를 반환한다. 요청했으면 콜백이 spider.page_pool.release_page(page) 로 반환한다.
+    - 스파이더가 직접 meta["playwright_page"] 를 넘긴 요청은 건드리지 않는다.
+
+    재시도/리다이렉트 미들웨어보다 먼저 응답과 예외를 받도록 번호를 크게 둔다.
+    PLAYWRIGHT_PAGE_HOLD_TIMEOUT 이 있으면 콜백이 그 시간 안에 반환하지 않은 페이지를
+    주기적으로 닫는다.
+    """
+
+    # 반환되지 않은 페이지를 확인하는 간격 (초)
+    expire_interval = 30
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.expire_task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls(PagePool.from_crawler(crawler))
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def spider_opened(self, spider):
+        spider.page_pool = self.pool
+        if self.pool.enabled and self.pool.hold_timeout:
+            self.expire_task = task.LoopingCall(self.expire_held_pages, spider)
+            self.expire_task.start(self.expire_interval, now=False)
+
+    async def spider_closed(self, spider):
+        if self.expire_task is not None and self.expire_task.running:
+            self.expire_task.stop()
+        await self.pool.close()
+
+    def expire_held_pages(self, spider):
+        async def expire():
+            for url in await self.pool.expire_held_pages():
+                spider.logger.warning(f"Closed page held longer than {self.pool.hold_timeout}s: {url}")
+        return deferred_from_coro(expire())
+
+    async def process_request(self, request, spider):
+        meta = request.meta
+        if not self.pool.enabled or not meta.get("playwright"):
+            return None
+        if "playwright_page" in meta and "playwright_pool_release" not in meta:
+            return None
+
+        context = meta.setdefault("playwright_context", spider.name)
+        page = await self.pool.acquire(context)
+        meta["playwright_pool_context"] = context
+        # 재시도된 요청에서는 처음 값을 유지
+        meta.setdefault("playwright_pool_release", not meta.get("playwright_include_page"))
+        meta["playwright_include_page"] = True
+        if page is None:
+            meta.pop("playwright_page", None)
+        else:
+            meta["playwright_page"] = page
+        return None
+
+    async def process_response(self, request, response, spider):
+        context = request.meta.pop("playwright_pool_context", None)
+        if context is None:
+            return response
+        page = request.meta.get("playwright_page")
+        if request.meta["playwright_pool_release"] or page is None:
+            request.meta.pop("playwright_page", None)
+            await self.pool.release(context, page)
+        else:
+            self.pool.hand_out(context, page)
+        return response
+
+    async def process_exception(self, request, exception, spider):
+        context = request.meta.pop("playwright_pool_context", None)
+        if context is not None:
+            # 실패한 페이지는 상태를 알 수 없으므로 닫는다
+            await self.pool.release(context, request.meta.pop("playwright_page", None), recycle=True)
+        return None
+
+
+class PageLifecycleMiddleware:
+    """
+    스파이더 콜백에 넘긴 Playwright 페이지를 콜백이 끝나면 반드시 풀로 반환
+
+    콜백의 결과를 모두 내보냈거나, 콜백이 예외로 끝났거나, 결과 처리가 중간에
+    멈춘 경우 모두 페이지를 반환한다. 콜백 안에서 먼저 release_page() 를 호출해도 된다.
+    콜백이 끝나지 않는 경우는 PagePoolMiddleware 의 PLAYWRIGHT_PAGE_HOLD_TIMEOUT 이 처리한다.
+
+    엔진에 가장 가까운 스파이더 미들웨어로 두어 다른 미들웨어의 처리까지 끝난 뒤 반환한다.
+    """
+
+    def __init__(self):
+        self.pending = set()
+
+    def held_page(self, response, spider):
+        pool = getattr(spider, "page_pool", None)
+        page = response.meta.get("playwright_page") if response is not None else None
+        if pool is None or page is None or not pool.is_held(page):
+            return None
+        return page
+
+    def release_later(self, page, spider):
+        # 동기 콜백의 결과 처리에서는 await 할 수 없으므로 작업으로 예약
+        future = asyncio.ensure_future(spider.page_pool.release_page(page))
+        self.pending.add(future)
+        future.add_done_callback(self.pending.discard)
+
+    def process_spider_output(self, response, result, spider):
+        page = self.held_page(response, spider)
+        try:
+            yield from result
+        finally:
+            if page is not None:
+                self.release_later(page, spider)
+
+    async def process_spider_output_async(self, response, result, spider):
+        page = self.held_page(response, spider)
+        try:
+            async for item in result:
+                yield item
+        finally:
+            if page is not None:
+                await spider.page_pool.release_page(page)
+
+    def process_spider_exception(self, response, exception, spider):
+        page = self.held_page(response, spider)
+        if page is not None:
+            self.release_later(page, spider)
+        return None
@@ -0,0 +1,100 @@
+import json
+
+from youtube_scrapy.ytdata import (
+    continuation_items, extract_initial_data, extract_ytcfg, iter_continuations, iter_videos, parse_count,
+)
+
+
+def video(video_id, title, views=None, renderer="videoRenderer", **extra):
+    fields = {"videoId": video_id, "title": {"runs": [{"text": title}]}, **extra}
+    if views is not None:
+        fields["viewCountText"] = {"simpleText": views}
+    return {renderer: fields}
+
+
+def continuation(token, api_url=None):
+    endpoint = {"continuationCommand": {"token": token}}
+    if api_url:
+        endpoint["commandMetadata"] = {"webCommandMetadata": {"apiUrl": api_url}}
+    return {"continuationItemRenderer": {"continuationEndpoint": endpoint}}
+
+
+INITIAL_DATA = {
+    "contents": {
+        "sections": [
+            {"items": [
+                video("a1", "첫 영상", "1,234 views", ownerText={"runs": [{"text": "채널"}]}),
+                video("b2", "두 번째 </script> 영상", "조회수 5회", renderer="gridVideoRenderer"),
+            ]},
+            {"items": [video("a1", "중복"), continuation("TOKEN1")]},
+        ]
+    }
+}
+
+
+def page(script):
+    return f"<html><head><script>{script}</script></head><body><div>{{not json}}</div></body></html>"
+
+
+def test_extract_initial_data_decodes_only_the_object():
+    # 객체 뒤에 이어지는 자바스크립트와 HTML 은 읽지 않음
+    html = page(f"var ytInitialData = {json.dumps(INITIAL_DATA)};if (window.x) {{ y({{}}); }}")
+    assert extract_initial_data(html) == INITIAL_DATA
+
+
+def test_extract_initial_data_other_markers_and_missing():
+    assert extract_initial_data(page(f'window["ytInitialData"] = {json.dumps({"a": 1})};')) == {"a": 1}
+    assert extract_initial_data(page("var ytInitialPlayerResponse = {};")) is None
+    # 마커 뒤가 객체가 아니거나 깨진 JSON 이면 None
+    assert extract_initial_data(page("var ytInitialData = null;")) is None
+    assert extract_initial_data(page('var ytInitialData = {"a": ;')) is None
+
+
+def test_extract_ytcfg_picks_config_with_api_key():
+    cfg = {"INNERTUBE_API_KEY": "KEY", "INNERTUBE_CONTEXT": {"client": {"clientName": "WEB"}}}
+    html = page(f'ytcfg.set({{"EXPERIMENT_FLAGS": {{}}}}); ytcfg.set({json.dumps(cfg)}); ytcfg.set("k", 1);')
+    assert extract_ytcfg(html) == cfg
+    assert extract_ytcfg(page('ytcfg.set({"A": 1});')) is None
+
+
+def test_iter_videos_in_document_order_without_duplicates():
+    videos = list(iter_videos(INITIAL_DATA))
+    assert videos == [
+        {"video_id": "a1", "title": "첫 영상", "channel": "채널", "view_count": 1234},
+        {"video_id": "b2", "title": "두 번째 </script> 영상", "channel": None, "view_count": 5},
+    ]
+
+
+def test_iter_videos_skips_seen_across_pages():
+    seen = set()
+    assert [v["video_id"] for v in iter_videos(INITIAL_DATA, seen)] == ["a1", "b2"]
+    more = {"items": [video("b2", "again"), video("c3", "new", renderer="compactVideoRenderer")]}
+    assert [v["video_id"] for v in iter_videos(more, seen)] == ["c3"]
+
+
+def test_iter_continuations():
+    data = {"a": [continuation("T1"), {"b": continuation("T2", "/youtubei/v1/next")}]}
+    assert list(iter_continuations(data)) == [("T1", "/youtubei/v1/browse"), ("T2", "/youtubei/v1/next")]
+    assert list(iter_continuations(INITIAL_DATA)) == [("TOKEN1", "/youtubei/v1/browse")]
+
+
+def test_continuation_items_reads_only_actions():
+    payload = {
+        "onResponseReceivedActions": [
+            {"appendContinuationItemsAction": {"continuationItems": [video("d4", "x"), continuation("T3")]}},
+        ],
+        "onResponseReceivedEndpoints": [
+            {"reloadContinuationItemsCommand": {"continuationItems": [video("e5", "y")]}},
+        ],
+        "contents": video("zz", "응답의 나머지 부분"),
+    }
+    items = continuation_items(payload)
+    assert [v["video_id"] for v in iter_videos(items)] == ["d4", "e5"]
+    assert list(iter_continuations(items)) == [("T3", "/youtubei/v1/browse")]
+
+
+def test_parse_count():
+    assert parse_count("1,234,567 views") == 1234567
+    assert parse_count("조회수 1,234회") == 1234
+    assert parse_count("No views") is None
+    assert parse_count(None) is None
@@ -0,0 +1,92 @@
+# 기록한 응답(fixture)으로 스파이더 모드별 처리 속도 비교
+#
+#   python -m youtube_scrapy.bench fixtures/quotes quotes --mode data --mode browser
+#
+# replay 서버를 로컬에 띄우고 모드마다 별도 프로세스에서 크롤링한 뒤
+# 받은 페이지 수, 아이템 수, 걸린 시간, 초당 페이지 수를 출력한다.
+
+import argparse
+import json
+import subprocess
+import sys
+
+from youtube_scrapy.replay import serve
+
+
+def run_crawl(spider, mode, base_url):
+    """
+    현재 프로세스에서 크롤링 한 번 실행하고 결과 통계를 JSON 으로 출력
+    """
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    settings = get_project_settings()
+    settings.set("LOG_LEVEL", "ERROR")
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(spider)
+    process.crawl(crawler, mode=mode, base_url=base_url)
+    process.start()
+
+    stats = crawler.stats.get_stats()
+    # 크롤링이 시작되지 않았거나 응답을 하나도 받지 못하면 0 으로 보고하지 않고 실패 처리 (원인은 위 로그)
+    finish_reason = stats.get("finish_reason")
+    if finish_reason is None:
+        sys.exit(f"{spider} ({mode}): crawl did not run")
+    if finish_reason != "finished":
+        sys.exit(f"{spider} ({mode}): crawl did not finish ({finish_reason})")
+    if not stats.get("response_received_count"):
+        sys.exit(f"{spider} ({mode}): no responses received from {base_url}")
+    # 프로세스 시작 시간을 빼고 스파이더가 열려 있던 시간만 사용
+    elapsed = stats.get("elapsed_time_seconds", 0)
+    pages = stats.get("response_received_count", 0)
+    print(json.dumps({
+        "mode": mode,
+        "pages": pages,
+        "items": stats.get("item_scraped_count", 0),
+        "errors": stats.get("log_count/ERROR", 0),
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 2) if elapsed else None,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기록한 응답으로 스파이더 모드별 속도 비교")
+    parser.add_argument("fixtures", help="FIXTURE_RECORD_DIR 로 기록한 디렉토리")
+    parser.add_argument("spider")
+    parser.add_argument("--mode", action="append", dest="modes", help="스파이더 mode 인자 (여러 번 지정 가능)")
+    parser.add_argument("--base-url", help="(내부용) 이미 떠 있는 replay 서버 주소로 한 번만 실행")
+    args = parser.parse_args()
+
+    if args.base_url:
+        run_crawl(args.spider, args.modes[0], args.base_url)
+        return
+
+    server = serve(args.fixtures)
+    base_url = f"http://{server.server_address[0]}:{server.server_address[1]}"
+    print(f"Replaying {args.fixtures} on {base_url}")
+    failed = False
+    try:
+        for mode in args.modes or ["data"]:
+            result = subprocess.run(
+                [sys.executable, "-m", "youtube_scrapy.bench", args.fixtures, args.spider, "--mode", mode, "--base-url", base_url],
+                capture_output=True,
+                text=True,
+            )
+            lines = result.stdout.strip().splitlines()
+            if result.returncode != 0 or not lines:
+                print(f"{mode}: failed\n{result.stderr[-2000:]}")
+                failed = True
+                continue
+            report = json.loads(lines[-1])
+            print(
+                f"{report['mode']:>10}: {report['pages']} pages, {report['items']} items, "
+                f"{report['errors']} errors in {report['seconds']}s ({report['pages_per_sec']} pages/s)"
+            )
+    finally:
+        server.shutdown()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
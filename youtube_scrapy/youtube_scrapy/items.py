@@ -8,5 +8,7 @@ import scrapy
 
 
 class VideoItem(scrapy.Item):
+    video_id = scrapy.Field()       # 영상 ID (watch?v=)
     title = scrapy.Field()          # 영상 제목
-    channel = scrapy.Field()        # 채널명
\ No newline at end of file
+    channel = scrapy.Field()        # 채널명
+    view_count = scrapy.Field()     # 조회수
\ No newline at end of file
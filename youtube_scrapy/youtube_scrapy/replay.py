@@ -0,0 +1,161 @@
+# 응답 기록(fixture)과 로컬 재생 서버
+#
+# FIXTURE_RECORD_DIR 설정을 주고 크롤링하면 FixtureRecorderMiddleware 가 받은 응답을
+# 그 디렉토리에 파일로 저장하고 index.json 에 (method, path, 요청 본문 해시) 를 기록한다.
+# 기록한 디렉토리를 replay 서버로 띄우면 같은 요청에 같은 응답을 돌려주므로,
+# 스파이더를 base_url 만 바꿔서 네트워크 없이 실행하고 벤치마크할 수 있다.
+#
+#   scrapy crawl youtube -s FIXTURE_RECORD_DIR=fixtures/youtube
+#   python -m youtube_scrapy.replay fixtures/youtube --port 8800
+#   scrapy crawl youtube -a base_url=http://127.0.0.1:8800
+
+import argparse
+import hashlib
+import json
+import mimetypes
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+
+INDEX_FILE = "index.json"
+
+
+def request_key(method, path, body):
+    """
+    기록과 재생에서 같은 요청을 찾는 키
+    """
+    return f"{method.upper()} {path} {hashlib.sha1(body or b'').hexdigest()}"
+
+
+def url_path(url):
+    parts = urlsplit(url)
+    return f"{parts.path or '/'}{'?' + parts.query if parts.query else ''}"
+
+
+class FixtureStore:
+    """
+    기록한 응답 디렉토리 (index.json + 응답 본문 파일)
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        index_path = self.path / INDEX_FILE
+        if index_path.exists():
+            with open(index_path, encoding="utf-8") as f:
+                for entry in json.load(f):
+                    self.entries[entry["key"]] = entry
+
+    def add(self, method, url, request_body, status, content_type, body):
+        key = request_key(method, url_path(url), request_body)
+        entry = self.entries.get(key)
+        if entry is None:
+            extension = mimetypes.guess_extension((content_type or "").split(";")[0].strip()) or ".bin"
+            entry = {"key": key, "file": f"{len(self.entries) + 1:04d}{extension}"}
+            self.entries[key] = entry
+        entry.update({"url": url, "status": status, "content_type": content_type})
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / entry["file"]).write_bytes(body)
+
+    def find(self, method, path, body):
+        return self.entries.get(request_key(method, path, body))
+
+    def read(self, entry):
+        return (self.path / entry["file"]).read_bytes()
+
+    def save(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / INDEX_FILE, "w", encoding="utf-8") as f:
+            json.dump(list(self.entries.values()), f, ensure_ascii=False, indent=2)
+
+
+class FixtureRecorderMiddleware:
+    """
+    받은 응답을 FIXTURE_RECORD_DIR 에 기록하는 다운로더 미들웨어
+
+    압축 해제가 끝난 본문을 기록하도록 HttpCompressionMiddleware(590) 보다 작은 번호에 둔다.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get("FIXTURE_RECORD_DIR")
+        if not path:
+            raise NotConfigured
+        middleware = cls(FixtureStore(path))
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_response(self, request, response, spider):
+        content_type = response.headers.get("Content-Type", b"").decode("latin-1") or None
+        self.store.add(request.method, request.url, request.body, response.status, content_type, response.body)
+        return response
+
+    def spider_closed(self, spider):
+        self.store.save()
+        spider.logger.info(f"Recorded {len(self.store.entries)} responses to {self.store.path}")
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    store = None
+
+    def replay(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        entry = self.store.find(self.command, self.path, body)
+        if entry is None:
+            self.send_error(404, "No recorded response")
+            return
+        content = self.store.read(entry)
+        self.send_response(entry["status"])
+        if entry.get("content_type"):
+            self.send_header("Content-Type", entry["content_type"])
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = replay
+    do_POST = replay
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(path, host="127.0.0.1", port=0):
+    handler = type("FixtureReplayHandler", (ReplayHandler,), {"store": FixtureStore(path)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(path, host="127.0.0.1", port=0):
+    """
+    기록한 디렉토리를 재생하는 서버를 백그라운드 스레드로 시작 (server.server_address 로 주소 확인)
+    """
+    server = make_server(path, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기록한 응답을 재생하는 로컬 서버")
+    parser.add_argument("path", help="FIXTURE_RECORD_DIR 로 기록한 디렉토리")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    args = parser.parse_args()
+
+    server = make_server(args.path, args.host, args.port)
+    print(f"Replaying {len(server.RequestHandlerClass.store.entries)} responses from {args.path} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
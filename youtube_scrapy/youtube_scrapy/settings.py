@@ -50,9 +50,10 @@ ROBOTSTXT_OBEY = False
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "youtube_scrapy.middlewares.YoutubeScrapyDownloaderMiddleware": 543,
-#}
+DOWNLOADER_MIDDLEWARES = {
+    # FIXTURE_RECORD_DIR 가 있을 때만 동작 (youtube_scrapy/replay.py)
+    "youtube_scrapy.replay.FixtureRecorderMiddleware": 100,
+}
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -92,8 +93,12 @@ TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
 FEED_EXPORT_ENCODING = "utf-8"
 
 
-DOWNLOAD_HANDLERS = {
-    "http": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
-    "https": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
-}
+# Playwright 다운로드 핸들러는 브라우저 렌더링이 필요한 스파이더(quotes)만
+# custom_settings 로 등록한다. 나머지는 기본 HTTP/1.1 핸들러를 사용한다.
+
+# 받은 응답을 기록할 디렉토리 (python -m youtube_scrapy.replay 로 재생)
+FIXTURE_RECORD_DIR = None
 
+# youtube 스파이더가 따라갈 continuation 깊이와 동시 요청 수
+YOUTUBE_CONTINUATION_DEPTH = 5
+YOUTUBE_CONTINUATION_CONCURRENCY = 4
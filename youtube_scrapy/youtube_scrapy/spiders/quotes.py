@@ -1,48 +1,158 @@
 # spiders/quotes.py
 # https://scrapeops.io/python-scrapy-playbook/scrapy-playwright/
 
+import json
 import scrapy
 from youtube_scrapy.qitems import QuoteItem
 from scrapy_playwright.page import PageMethod
 
+# /js/ 페이지는 인용문을 <script> 안의 var data = [...] 배열로 내려주고 브라우저에서 그린다
+DATA_MARKER = 'var data = '
+
+_decoder = json.JSONDecoder()
+
+
+def extract_quote_data(text):
+	"""
+	원본 HTML 의 인용문 데이터 배열 (없으면 None)
+	"""
+	start = text.find(DATA_MARKER)
+	if start == -1:
+		return None
+	try:
+		return _decoder.raw_decode(text, start + len(DATA_MARKER))[0]
+	except ValueError:
+		return None
+
+
 class QuotesSpider(scrapy.Spider):
 	name = 'quotes'
+	custom_settings = {
+		'DOWNLOAD_HANDLERS': {
+			'http': 'scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler',
+			'https': 'scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler',
+		},
+		'DOWNLOADER_MIDDLEWARES': {
+			'youtube_scrapy.replay.FixtureRecorderMiddleware': 100,
+			'scrapy_browser.middlewares.ResourceBlockingMiddleware': 544,
+			'scrapy_browser.middlewares.PagePoolMiddleware': 950,
+		},
+		'SPIDER_MIDDLEWARES': {
+			'scrapy_browser.middlewares.PageLifecycleMiddleware': 10,
+		},
+		'PLAYWRIGHT_PAGE_HOLD_TIMEOUT': 300,
+	}
+	block_profile = 'text'  # 인용문 텍스트만 필요하므로 이미지/폰트/스타일시트 차단 (scrapy_browser/browser.py)
 
-	def start_requests(self):
-		url = 'https://quotes.toscrape.com/js/'
-		yield scrapy.Request(url, meta=dict(
+	# data: 원본 HTML 의 데이터 배열을 바로 읽고 나머지 페이지를 한 번에 요청 (브라우저 없음)
+	# browser: 페이지마다 Playwright 로 렌더링하고 .next 링크를 차례로 따라감 (-a mode=browser)
+	mode = 'data'
+	max_pages = 10  # data 모드에서 한 번에 요청할 페이지 수 (-a max_pages=)
+	verify = 0  # data 모드에서 Playwright 로 렌더링해서 결과를 비교할 앞쪽 페이지 수 (-a verify=)
+
+	def __init__(self, base_url='https://quotes.toscrape.com', *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		# -a base_url=http://127.0.0.1:8800 : 기록한 응답을 재생하는 로컬 서버로 크롤링
+		self.base_url = base_url.rstrip('/')
+
+	def page_url(self, page):
+		if page == 1:
+			return f'{self.base_url}/js/'
+		return f'{self.base_url}/js/page/{page}/'
+
+	def browser_request(self, url, callback=None, **kwargs):
+		return scrapy.Request(url, meta=dict(
 			playwright = True,
-			playwright_include_page = True,
 			playwright_page_methods =[PageMethod('wait_for_selector', 'div.quote')],
-			errback = self.errback,
-		))
+		), callback=callback or self.parse, errback=self.errback, **kwargs)
 
-	async def parse(self, response):
-		page = response.meta["playwright_page"]
-		await page.close()
+	async def start(self):
+		# Scrapy 2.13 이상은 start() 를 사용하므로 start_requests() 로 위임
+		for request in self.start_requests():
+			yield request
 
+	def start_requests(self):
+		url = self.page_url(1)
+		if self.mode == 'browser':
+			yield self.browser_request(url)
+		else:
+			yield scrapy.Request(url, callback=self.parse_data, cb_kwargs={'page': 1}, errback=self.errback)
+
+	def parse_data(self, response, page):
+		quotes = extract_quote_data(response.text)
+		if quotes is None:
+			# 데이터 배열이 없으면 (사이트 구조가 바뀐 경우) 이 페이지만 브라우저로 렌더링
+			self.logger.warning(f'Quote data not found, rendering with Playwright: {response.url}')
+			self.crawler.stats.inc_value('quotes/browser_fallback')
+			yield self.browser_request(response.url, callback=self.parse_rendered, dont_filter=True)
+		else:
+			for quote in quotes:
+				yield self.get_quote_item(quote['text'], quote['author']['name'], quote['tags'])
+			if page <= int(self.verify):
+				yield self.browser_request(
+					response.url,
+					callback=self.verify_page,
+					cb_kwargs={'expected': [quote['text'] for quote in quotes]},
+					dont_filter=True,
+				)
+
+		if page == 1 and response.css('.next>a'):
+			# 페이지 URL 규칙이 정해져 있으므로 .next 를 하나씩 따라가지 않고 나머지 페이지를 한 번에 요청
+			self.logger.info(f'Fanning out pages 2-{self.max_pages}')
+			for next_page in range(2, int(self.max_pages) + 1):
+				yield scrapy.Request(
+					self.page_url(next_page),
+					callback=self.parse_data,
+					cb_kwargs={'page': next_page},
+					errback=self.errback,
+				)
+		elif page == int(self.max_pages) and response.css('.next>a'):
+			self.logger.info(f'More pages after {page}, raise max_pages to crawl them')
+
+	def parse_rendered(self, response):
+		for quote in response.css('div.quote'):
+			yield self.get_quote_item(
+				quote.css('span.text::text').get(),
+				quote.css('small.author::text').get(),
+				quote.css('div.tags a.tag::text').getall(),
+			)
+
+	def verify_page(self, response, expected):
+		"""
+		렌더링한 페이지의 인용문이 데이터 배열과 같은지 확인 (아이템은 내보내지 않음)
+		"""
+		rendered = response.css('div.quote span.text::text').getall()
+		if rendered == expected:
+			self.crawler.stats.inc_value('quotes/verify/match')
+		else:
+			self.crawler.stats.inc_value('quotes/verify/mismatch')
+			self.logger.warning(f'Rendered quotes differ from page data: {response.url} ({len(rendered)} vs {len(expected)})')
+
+	async def parse(self, response):
+		# 페이지는 PagePoolMiddleware 가 풀로 반환하므로 콜백에서 닫지 않는다
 		for quote in response.css('div.quote'):
-			quote_item = QuoteItem()
-			quote_item['text'] = quote.css('span.text::text').get()
-			quote_item['author'] = quote.css('small.author::text').get()
-			quote_item['tags'] = quote.css('div.tags a.tag::text').getall()
-			yield quote_item
+			yield self.get_quote_item(
+				quote.css('span.text::text').get(),
+				quote.css('small.author::text').get(),
+				quote.css('div.tags a.tag::text').getall(),
+			)
 			
 		next_page = response.css('.next>a ::attr(href)').get()
 
 		if next_page is not None:
-			next_page_url = 'http://quotes.toscrape.com' + next_page
-			yield scrapy.Request(next_page_url, meta=dict(
-                playwright = True,
-                playwright_include_page = True, 
-                playwright_page_methods =[PageMethod('wait_for_selector', 'div.quote')],
-                errback=self.errback,
-            ))
-			
-
-
+			next_page_url = self.base_url + next_page
+			yield self.browser_request(next_page_url)
 
+	def get_quote_item(self, text, author, tags):
+		quote_item = QuoteItem()
+		quote_item['text'] = text
+		quote_item['author'] = author
+		quote_item['tags'] = tags
+		return quote_item
 
 	async def errback(self, failure):
-		page = failure.request.meta["playwright_page"]
-		await page.close()
\ No newline at end of file
+		self.logger.error(f'Request failed: {failure.request.url} ({failure.value!r})')
+		# 실패한 요청의 페이지는 PagePoolMiddleware 가 이미 닫았지만, 풀을 거치지 않은 페이지가 남아 있으면 닫는다
+		page = failure.request.meta.get('playwright_page')
+		if page is not None and not page.is_closed():
+			await page.close()
@@ -1,12 +1,91 @@
 import scrapy
+from scrapy.http import JsonRequest
+from urllib.parse import urljoin, urlsplit
 from .. import items
+from ..ytdata import continuation_items, extract_initial_data, extract_ytcfg, iter_continuations, iter_videos
 
 class YoutubeSpider(scrapy.Spider):
     name = "youtube"
     allowed_domains = ["youtube.com"]
     start_urls = ["https://youtube.com/"]
 
+    # json: HTML 에 포함된 ytInitialData 에서 모든 영상 추출 (브라우저 불필요)
+    # dom: 렌더링된 ytd-rich-item-renderer 요소에서 추출 (-a mode=dom)
+    mode = "json"
+
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        # continuation 요청 동시 실행 수
+        settings.set(
+            "CONCURRENT_REQUESTS_PER_DOMAIN",
+            settings.getint("YOUTUBE_CONTINUATION_CONCURRENCY", 4),
+            priority="spider",
+        )
+
+    def __init__(self, base_url=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # -a base_url=http://127.0.0.1:8800 : 기록한 응답을 재생하는 로컬 서버로 크롤링
+        if base_url:
+            self.start_urls = [urljoin(base_url, "/")]
+            self.allowed_domains = self.allowed_domains + [urlsplit(base_url).hostname]
+        self.innertube = None
+        self.seen_video_ids = set()
+
     def parse(self, response):
+        if self.mode == "dom":
+            yield from self.parse_dom(response)
+            return
+
+        data = extract_initial_data(response.text)
+        if data is None:
+            self.logger.warning(f"ytInitialData not found: {response.url}")
+            return
+        count = 0
+        for fields in iter_videos(data, self.seen_video_ids):
+            count += 1
+            yield self.get_video_item(**fields)
+        self.logger.info(f"{count} videos from ytInitialData: {response.url}")
+
+        self.innertube = extract_ytcfg(response.text)
+        if self.innertube is None:
+            self.logger.warning(f"ytcfg not found, not following continuations: {response.url}")
+            return
+        for token, api_url in iter_continuations(data):
+            yield self.continuation_request(response, token, api_url, 1)
+
+    def continuation_request(self, response, token, api_url, depth):
+        """
+        페이지가 쓰는 browse API 로 continuation 토큰 요청
+        """
+        url = urljoin(response.url, api_url)
+        url += f"{'&' if '?' in url else '?'}prettyPrint=false"
+        return JsonRequest(
+            url,
+            data={"context": self.innertube["INNERTUBE_CONTEXT"], "continuation": token},
+            headers={
+                "X-YouTube-Client-Name": str(self.innertube.get("INNERTUBE_CONTEXT_CLIENT_NAME", 1)),
+                "X-YouTube-Client-Version": self.innertube.get("INNERTUBE_CLIENT_VERSION", ""),
+            },
+            callback=self.parse_continuation,
+            meta={"continuation_depth": depth},
+        )
+
+    def parse_continuation(self, response):
+        depth = response.meta["continuation_depth"]
+        new_items = continuation_items(response.json())
+        count = 0
+        for fields in iter_videos(new_items, self.seen_video_ids):
+            count += 1
+            yield self.get_video_item(**fields)
+        self.logger.info(f"{count} videos from continuation #{depth}")
+
+        if depth >= self.settings.getint("YOUTUBE_CONTINUATION_DEPTH", 5):
+            return
+        for token, api_url in iter_continuations(new_items):
+            yield self.continuation_request(response, token, api_url, depth + 1)
+
+    def parse_dom(self, response):
         videos_element = response.css('ytd-rich-item-renderer')
         details_div = videos_element.xpath('//div[@id="details"]')
         title = details_div.xpath('//a[@id="video-title-link"]/@title').get()
@@ -15,8 +94,10 @@ class YoutubeSpider(scrapy.Spider):
         self.log(item)
         yield item
 
-    def get_video_item(self, title, channel):
+    def get_video_item(self, title, channel, video_id=None, view_count=None):
         video_item = items.VideoItem()
+        video_item['video_id'] = video_id
         video_item['title'] = title
         video_item['channel'] = channel
-        return video_item 
\ No newline at end of file
+        video_item['view_count'] = view_count
+        return video_item
@@ -0,0 +1,185 @@
+# YouTube 페이지에 포함된 JSON 데이터(ytInitialData) 추출
+#
+# YouTube 페이지의 영상 목록은 브라우저가 렌더링하기 전에 이미 HTML 안의
+# <script> 에 ytInitialData JSON 으로 들어 있다. 마커 문자열 위치를 찾은 뒤
+# json.JSONDecoder.raw_decode() 로 그 위치부터 객체 하나만 디코딩하므로,
+# HTML 전체를 정규식으로 훑거나 JSON 을 여러 번 파싱하지 않는다.
+#
+# 첫 페이지 뒤의 영상은 페이지가 쓰는 JSON API(youtubei/v1/browse)에 continuation
+# 토큰을 POST 해서 받는다. API 키와 클라이언트 정보(INNERTUBE_CONTEXT)는 같은 페이지의
+# ytcfg.set({...}) 에 들어 있다.
+
+import json
+import re
+
+
+INITIAL_DATA_MARKERS = (
+    "var ytInitialData = ",
+    'window["ytInitialData"] = ',
+    "ytInitialData = ",
+)
+
+# 영상 하나를 나타내는 렌더러 키 (홈/검색/채널/관련 영상 목록)
+VIDEO_RENDERERS = ("videoRenderer", "gridVideoRenderer", "compactVideoRenderer")
+
+YTCFG_MARKER = "ytcfg.set("
+
+_decoder = json.JSONDecoder()
+_DIGITS = re.compile(r"\d")
+
+
+def find_json_object(text, markers):
+    """
+    text 에서 markers 중 처음 찾은 마커 바로 뒤의 JSON 객체 (없으면 None)
+    """
+    for marker in markers:
+        start = text.find(marker)
+        if start == -1:
+            continue
+        start += len(marker)
+        if text.startswith("{", start):
+            try:
+                return _decoder.raw_decode(text, start)[0]
+            except ValueError:
+                continue
+    return None
+
+
+def extract_initial_data(text):
+    """
+    페이지 HTML 의 ytInitialData (없으면 None)
+    """
+    return find_json_object(text, INITIAL_DATA_MARKERS)
+
+
+def extract_ytcfg(text):
+    """
+    페이지 HTML 의 ytcfg 설정 중 INNERTUBE_API_KEY 가 있는 것 (없으면 None)
+    """
+    start = text.find(YTCFG_MARKER)
+    while start != -1:
+        start += len(YTCFG_MARKER)
+        if text.startswith("{", start):
+            try:
+                cfg = _decoder.raw_decode(text, start)[0]
+            except ValueError:
+                cfg = None
+            if isinstance(cfg, dict) and "INNERTUBE_API_KEY" in cfg:
+                return cfg
+        start = text.find(YTCFG_MARKER, start)
+    return None
+
+
+def iter_video_renderers(data):
+    """
+    JSON 트리에서 영상 렌더러를 문서 순서대로 찾음
+    """
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            children = []
+            for key, value in node.items():
+                if key in VIDEO_RENDERERS and isinstance(value, dict) and "videoId" in value:
+                    yield value
+                else:
+                    children.append(value)
+            stack.extend(reversed(children))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+def text_of(node):
+    """
+    {"simpleText": ...} 또는 {"runs": [{"text": ...}, ...]} 형식의 텍스트
+    """
+    if not isinstance(node, dict):
+        return None
+    if "simpleText" in node:
+        return node["simpleText"]
+    runs = node.get("runs")
+    if runs:
+        return "".join(run.get("text", "") for run in runs)
+    return None
+
+
+def parse_count(text):
+    """
+    "1,234,567 views", "조회수 1,234회" 같은 문자열의 숫자 (숫자가 없으면 None)
+    """
+    if not text:
+        return None
+    digits = "".join(_DIGITS.findall(text))
+    return int(digits) if digits else None
+
+
+def video_fields(renderer):
+    """
+    영상 렌더러에서 VideoItem 필드 추출
+    """
+    channel = None
+    for key in ("ownerText", "longBylineText", "shortBylineText"):
+        channel = text_of(renderer.get(key))
+        if channel:
+            break
+    return {
+        "video_id": renderer["videoId"],
+        "title": text_of(renderer.get("title")),
+        "channel": channel,
+        "view_count": parse_count(text_of(renderer.get("viewCountText"))),
+    }
+
+
+def iter_videos(data, seen=None):
+    """
+    JSON 트리의 모든 영상 필드 (같은 영상이 여러 목록에 있으면 한 번만)
+
+    seen 을 넘기면 여러 페이지에 걸쳐 이미 나온 영상도 건너뛴다.
+    """
+    if seen is None:
+        seen = set()
+    for renderer in iter_video_renderers(data):
+        if renderer["videoId"] in seen:
+            continue
+        seen.add(renderer["videoId"])
+        yield video_fields(renderer)
+
+
+def iter_continuations(data):
+    """
+    JSON 트리의 continuation 요청 (token, apiUrl) 을 문서 순서대로 찾음
+    """
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            renderer = node.get("continuationItemRenderer")
+            if isinstance(renderer, dict):
+                endpoint = renderer.get("continuationEndpoint") or {}
+                token = (endpoint.get("continuationCommand") or {}).get("token")
+                if token:
+                    api_url = (
+                        endpoint.get("commandMetadata", {}).get("webCommandMetadata", {}).get("apiUrl")
+                        or "/youtubei/v1/browse"
+                    )
+                    yield token, api_url
+                continue
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+# continuation 응답에서 새 항목이 들어 있는 키
+CONTINUATION_ACTIONS = ("appendContinuationItemsAction", "reloadContinuationItemsCommand")
+
+
+def continuation_items(payload):
+    """
+    browse API 응답에서 새로 추가된 항목 목록만 꺼냄 (응답의 나머지 부분은 보지 않음)
+    """
+    items = []
+    for key in ("onResponseReceivedActions", "onResponseReceivedEndpoints", "onResponseReceivedCommands"):
+        for action in payload.get(key) or ():
+            for name in CONTINUATION_ACTIONS:
+                items.extend((action.get(name) or {}).get("continuationItems") or ())
+    return items